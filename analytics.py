@@ -0,0 +1,178 @@
+import itertools
+import logging
+import multiprocessing
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+
+from common import configure_logging
+
+analytics_logger = logging.getLogger("analytics")
+
+MAX_WORKERS = 1
+MAX_PENDING = 4  # Jobs queued or running before new submissions are dropped
+JOB_HISTORY = 100  # Finished jobs kept for status reporting
+
+# Kept by each pool process across jobs; see post_trade_report
+_report_state = {'ledger': None, 'loss_rowid': 0, 'dictator_rows': None}
+
+
+def _init_worker():
+    configure_logging()
+    from ledger import PnLLedger
+
+    _report_state['ledger'] = PnLLedger()
+
+
+def post_trade_report():
+    """
+    Projector summary and Dictator report for the trades closed so far.
+
+    Runs in a pool process, which keeps one ledger open and refreshes its totals
+    from the journal database, so it sees every close the trading process has
+    committed without replaying them. Only the loss trades recorded since the
+    previous report go through the Dictator; its workbook is rewritten from the
+    rows this process has collected.
+    """
+    import pandas as pd
+
+    from dictator import DICTATOR_OUTPUT_FILE, Dictator
+    from projector import Projector
+
+    if _report_state['ledger'] is None:
+        _init_worker()
+    ledger = _report_state['ledger']
+    ledger.refresh()
+    summary = Projector(ledger).calculate_profit_loss()
+    new_losses = ledger.loss_trades_frame(after=_report_state['loss_rowid'])
+    if summary and not new_losses.empty:
+        rows = Dictator.filter_open_trades(loss_trades=new_losses, output_file=None)
+        if rows is not None:
+            _report_state['loss_rowid'] = new_losses.attrs['last_rowid']
+            if not rows.empty:
+                _report_state['dictator_rows'] = pd.concat([_report_state['dictator_rows'], rows],
+                                                           ignore_index=True)
+                _report_state['dictator_rows'].to_excel(DICTATOR_OUTPUT_FILE, index=False)
+                analytics_logger.info(f"{len(rows)} open trades added to {DICTATOR_OUTPUT_FILE}")
+    return summary
+
+
+class AnalyticsPool:
+    """
+    Background process pool for post-trade analytics.
+
+    Jobs run in separate processes so pandas and Excel work never holds the GIL
+    of the trading process. At most max_pending jobs are queued or running;
+    beyond that submissions are dropped, and a job that is still waiting to
+    start absorbs resubmissions of the same function. Each job's status
+    (queued, running, done, failed, dropped) can be looked up by ID.
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, max_pending=MAX_PENDING):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pool = None
+        self.lock = Lock()
+        self.ids = itertools.count(1)
+        self.jobs = OrderedDict()  # job ID -> status record
+        self.futures = {}  # job ID -> future, for the jobs still in history
+
+    def _get_pool(self):
+        if self.pool is None:
+            # Spawned workers don't inherit the trading process's threads or the locks they hold
+            self.pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                            mp_context=multiprocessing.get_context('spawn'),
+                                            initializer=_init_worker)
+        return self.pool
+
+    def submit(self, function, *args):
+        """Queue function(*args) in a worker process; returns the job ID."""
+        name = getattr(function, '__name__', str(function))
+        with self.lock:
+            pending = [job_id for job_id, future in self.futures.items() if not future.done()]
+            for job_id in pending:
+                if self.jobs[job_id]['name'] == name and not self.futures[job_id].running():
+                    analytics_logger.debug(f"{name} already queued as job {job_id}")
+                    return job_id
+
+            job_id = next(self.ids)
+            job = {'id': job_id, 'name': name, 'status': 'queued', 'submitted': time.time(), 'finished': None,
+                   'duration': None, 'error': None}
+            self.jobs[job_id] = job
+            if len(pending) >= self.max_pending:
+                job.update(status='dropped', finished=time.time())
+                analytics_logger.warning(f"Analytics queue full ({self.max_pending}); dropped {name}")
+                self._trim()
+                return job_id
+            try:
+                future = self._get_pool().submit(function, *args)
+            except BrokenProcessPool:
+                # A worker died (e.g. killed); start a fresh pool rather than failing every later job
+                analytics_logger.warning("Analytics pool was broken; restarting it.")
+                self.pool = None
+                future = self._get_pool().submit(function, *args)
+            self.futures[job_id] = future
+        future.add_done_callback(lambda done, job_id=job_id: self._finished(job_id, done))
+        return job_id
+
+    def _finished(self, job_id, future):
+        with self.lock:
+            job = self.jobs[job_id]
+            job['finished'] = time.time()
+            job['duration'] = job['finished'] - job['submitted']
+            error = future.exception()
+            if error is None:
+                job['status'] = 'done'
+            else:
+                job.update(status='failed', error=repr(error))
+                analytics_logger.error(f"Analytics job {job_id} ({job['name']}) failed: {error}")
+            self._trim()
+
+    def _trim(self):
+        while len(self.jobs) > JOB_HISTORY:
+            oldest = next(iter(self.jobs))
+            if oldest in self.futures and not self.futures[oldest].done():
+                break
+            self.jobs.pop(oldest)
+            self.futures.pop(oldest, None)
+
+    def status(self, job_id=None):
+        """One job's status record, or all recent ones when job_id is None."""
+        with self.lock:
+            for running, future in self.futures.items():
+                if self.jobs[running]['status'] == 'queued' and future.running():
+                    self.jobs[running]['status'] = 'running'
+            if job_id is not None:
+                return dict(self.jobs[job_id]) if job_id in self.jobs else None
+            return [dict(job) for job in self.jobs.values()]
+
+    def result(self, job_id, timeout=None):
+        """Wait for a job and return its result (raises if it failed)."""
+        with self.lock:
+            future = self.futures.get(job_id)
+        return future.result(timeout) if future is not None else None
+
+    def shutdown(self, wait=True):
+        with self.lock:
+            pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=not wait)
+
+
+_analytics = None
+_analytics_lock = Lock()
+
+
+def get_analytics():
+    """Return the shared analytics pool; its worker process starts with the first job."""
+    global _analytics
+    with _analytics_lock:
+        if _analytics is None:
+            _analytics = AnalyticsPool()
+        return _analytics
+
+
+def submit_post_trade_report():
+    return get_analytics().submit(post_trade_report)
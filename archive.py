@@ -0,0 +1,230 @@
+import argparse
+import json
+import logging
+import os
+import time
+from threading import RLock
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("archive")
+
+ARCHIVE_DIR = "ohlcv_archive"
+# Fixed-width column files; timestamps are kline open times in milliseconds
+COLUMNS = {
+    'timestamp': np.int64,
+    'open': np.float64,
+    'high': np.float64,
+    'low': np.float64,
+    'close': np.float64,
+    'volume': np.float64,
+}
+INITIAL_CAPACITY = 4096  # Rows; the files double in size when full
+
+
+class OHLCVArchive:
+    """
+    On-disk OHLCV history for one symbol, interval and market type.
+
+    Each column is a fixed-width NumPy array in its own memory-mapped file, so
+    appending a candle is a write into the page cache and a range query is a
+    binary search on the sorted timestamp column. The row count lives in
+    meta.json and is only advanced after the rows are written.
+    """
+
+    def __init__(self, symbol, interval, market_type='spot', root=ARCHIVE_DIR):
+        self.symbol = symbol.upper()
+        self.interval = interval
+        self.market_type = market_type
+        self.path = os.path.join(root, market_type, self.symbol, interval)
+        os.makedirs(self.path, exist_ok=True)
+        self.lock = RLock()
+        self.length = self._read_length()
+        self.columns = {}
+        self._map(max(self.length, INITIAL_CAPACITY))
+
+    def _column_path(self, name):
+        return os.path.join(self.path, f"{name}.bin")
+
+    def _read_length(self):
+        try:
+            with open(os.path.join(self.path, 'meta.json'), 'r') as file:
+                return int(json.load(file)['length'])
+        except (OSError, ValueError, KeyError):
+            return 0
+
+    def _write_length(self):
+        meta_path = os.path.join(self.path, 'meta.json')
+        temp_path = f"{meta_path}.tmp"
+        with open(temp_path, 'w') as file:
+            json.dump({'length': self.length, 'interval': self.interval}, file)
+        os.replace(temp_path, meta_path)
+
+    def _map(self, capacity):
+        """(Re)open the column files with room for at least capacity rows."""
+        self.columns = {}  # Drop the old maps before resizing the files
+        for name, dtype in COLUMNS.items():
+            path = self._column_path(name)
+            size = capacity * np.dtype(dtype).itemsize
+            with open(path, 'ab') as file:
+                if file.tell() < size:
+                    file.truncate(size)
+            capacity = min(capacity, os.path.getsize(path) // np.dtype(dtype).itemsize)
+        for name, dtype in COLUMNS.items():
+            self.columns[name] = np.memmap(self._column_path(name), dtype=dtype, mode='r+', shape=(capacity,))
+        self.capacity = capacity
+
+    def _reserve(self, rows):
+        if rows > self.capacity:
+            capacity = self.capacity
+            while capacity < rows:
+                capacity *= 2
+            self._map(capacity)
+
+    def __len__(self):
+        return self.length
+
+    @property
+    def first_open(self):
+        with self.lock:
+            return int(self.columns['timestamp'][0]) if self.length else None
+
+    @property
+    def last_open(self):
+        with self.lock:
+            return int(self.columns['timestamp'][self.length - 1]) if self.length else None
+
+    def append(self, data):
+        """
+        Merge candles (a dict or DataFrame of COLUMNS, sorted by timestamp) into the archive.
+
+        Candles at or after the first one they overlap replace the stored tail; anything
+        older is merged and rewritten.
+        """
+        incoming = {name: np.asarray(data[name], dtype=dtype) for name, dtype in COLUMNS.items()}
+        timestamps = incoming['timestamp']
+        if not len(timestamps):
+            return
+        with self.lock:
+            stored = self.columns['timestamp'][:self.length]
+            sorted_input = len(timestamps) == 1 or bool(np.all(np.diff(timestamps) > 0))
+            if sorted_input and (not self.length or timestamps[-1] >= stored[-1]):
+                start = int(np.searchsorted(stored, timestamps[0], side='left'))
+            else:
+                incoming = self._merged(incoming)
+                start = 0
+            end = start + len(incoming['timestamp'])
+            self._reserve(end)
+            for name, values in incoming.items():
+                self.columns[name][start:end] = values
+            if end != self.length:
+                for column in self.columns.values():
+                    column.flush()
+                self.length = end
+                self._write_length()
+
+    def _merged(self, incoming):
+        stored = {name: np.array(column[:self.length]) for name, column in self.columns.items()}
+        combined = {name: np.concatenate([incoming[name], stored[name]]) for name in COLUMNS}
+        # np.unique keeps the first occurrence, so incoming candles win over stored ones
+        _, keep = np.unique(combined['timestamp'], return_index=True)
+        return {name: values[keep] for name, values in combined.items()}
+
+    def append_klines(self, klines, now_ms=None):
+        """
+        Merge the closed klines (Binance REST row layout) the archive doesn't hold yet.
+
+        A kline is closed once its close time (column 6) is before now_ms. The
+        still-forming candle and candles already inside the archived span are
+        skipped, so polling an up-to-date archive writes nothing. Returns the
+        number of candles added.
+        """
+        now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+        with self.lock:
+            first_open, last_open = self.first_open, self.last_open
+            klines = [row for row in klines if int(row[6]) < now_ms and
+                      (last_open is None or not first_open <= row[0] <= last_open)]
+            if not klines:
+                return 0
+            length = self.length
+            rows = np.array([row[:6] for row in klines], dtype=object)
+            self.append({name: rows[:, index].astype(float if dtype is np.float64 else np.int64)
+                         for index, (name, dtype) in enumerate(COLUMNS.items())})
+            return self.length - length
+
+    def _frame(self, start, end):
+        # Copy out of the maps so frames stay valid after the files are resized
+        data = {name: np.array(column[start:end]) for name, column in self.columns.items()}
+        data['timestamp'] = pd.to_datetime(data['timestamp'], unit='ms')
+        return pd.DataFrame(data)
+
+    def range(self, start_ms=None, end_ms=None):
+        """Candles with start_ms <= open time < end_ms (either bound may be None)."""
+        with self.lock:
+            timestamps = self.columns['timestamp'][:self.length]
+            start = 0 if start_ms is None else int(np.searchsorted(timestamps, start_ms, side='left'))
+            end = self.length if end_ms is None else int(np.searchsorted(timestamps, end_ms, side='left'))
+            return self._frame(start, max(start, end))
+
+    def tail(self, count):
+        """The latest count candles."""
+        with self.lock:
+            return self._frame(max(0, self.length - count), self.length)
+
+
+_archives = {}
+_archives_lock = RLock()
+
+
+def get_archive(symbol, interval='1m', market_type='spot', root=ARCHIVE_DIR):
+    """Return the shared archive for symbol/interval/market type, opening it on first use."""
+    key = (root, symbol.upper(), interval, market_type)
+    with _archives_lock:
+        if key not in _archives:
+            _archives[key] = OHLCVArchive(symbol, interval, market_type, root)
+        return _archives[key]
+
+
+def backfill(symbol, interval='1m', market_type='spot', days=30):
+    """Download history into the archive, page by page, starting days ago."""
+    import bot
+
+    archive = get_archive(symbol, interval, market_type)
+    interval_ms = bot.interval_to_ms(interval)
+    start = int(time.time() * 1000) - days * 86_400_000
+    if archive.first_open is not None and archive.first_open <= start:
+        start = archive.last_open  # Older history is already there; only catch up
+    while True:
+        data = bot._fetch_klines(symbol.upper(), interval, bot.MAX_KLINE_LIMIT, market_type, start_time=start)
+        archive.append_klines(data)
+        if len(data) < bot.MAX_KLINE_LIMIT:
+            break
+        start = data[-1][0] + interval_ms
+    logger.info(f"{archive.symbol} {interval} {market_type}: {len(archive)} candles archived")
+    return archive
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Manage the local OHLCV archive.")
+    parser.add_argument("command", choices=["backfill", "export", "info"])
+    parser.add_argument("symbol")
+    parser.add_argument("--interval", default="1m")
+    parser.add_argument("--market-type", default="spot")
+    parser.add_argument("--days", type=int, default=30, help="History to download for backfill")
+    parser.add_argument("--output", help="CSV path for export (readable by backtest.py and sweep.py)")
+    args = parser.parse_args()
+
+    if args.command == "backfill":
+        backfill(args.symbol, args.interval, args.market_type, args.days)
+    elif args.command == "export":
+        archive = get_archive(args.symbol, args.interval, args.market_type)
+        output = args.output or f"{archive.symbol}_{args.interval}_{args.market_type}.csv"
+        frame = archive.range()
+        frame['timestamp'] = (frame['timestamp'] - pd.Timestamp(0)) // pd.Timedelta(milliseconds=1)
+        frame.to_csv(output, index=False)
+        logger.info(f"Exported {len(frame)} candles to {output}")
+    else:
+        archive = get_archive(args.symbol, args.interval, args.market_type)
+        print(f"{len(archive)} candles from {archive.first_open} to {archive.last_open}")
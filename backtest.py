@@ -0,0 +1,228 @@
+import argparse
+import logging
+
+import numpy as np
+import pandas as pd
+
+import bot
+from ma_engine import MovingAverageEngine
+from monitoring import TRADE_TRANSITIONS
+from triggers import crossed, exit_levels
+
+logger = logging.getLogger("backtest")
+
+# MA periods in the roles determine_market_condition gives them: (ma_5, ma_7, ma_21, ma_200)
+DEFAULT_PERIODS = (5, 7, 21, 200)
+
+# Mirrors Bridge.get_hotkey_options, used by Bridge.can_execute_trade
+HOTKEY_OPTIONS = {
+    'Bullish': ('market_buy', 'limit_buy'),
+    'Shortbull': ('market_buy', 'limit_buy'),
+    'Bearish': ('market_sell', 'limit_sell'),
+    'Longbear': ('market_sell', 'limit_sell'),
+}
+
+TRADE_COLUMNS = ['open_index', 'open_time', 'trade_type', 'open_price', 'close_index', 'close_time', 'close_price',
+                 'exit_reason', 'return_pct', 'profit_loss']
+
+
+def moving_averages(closes, periods=DEFAULT_PERIODS):
+    """Rolling means for every bar from prefix sums; NaN until a period has enough bars."""
+    closes = np.asarray(closes, dtype=float)
+    # Offsetting by the first close keeps the prefix sums small and the differences accurate
+    offset = closes[0] if len(closes) else 0.0
+    sums = np.concatenate(([0.0], np.cumsum(closes - offset)))
+    result = {}
+    for period in periods:
+        values = np.full(len(closes), np.nan)
+        if len(closes) >= period:
+            values[period - 1:] = (sums[period:] - sums[:-period]) / period + offset
+        result[period] = values
+    return result
+
+
+def engine_moving_averages(closes, periods=DEFAULT_PERIODS):
+    """Per-bar values from the live MovingAverageEngine, bit-identical to what the monitor sees."""
+    engine = MovingAverageEngine(periods)
+    result = {period: np.empty(len(closes)) for period in periods}
+    for index, close in enumerate(np.asarray(closes, dtype=float).tolist()):
+        engine.update(index, close)
+        for period in periods:
+            result[period][index] = engine.value(period)
+    return result
+
+
+def market_conditions(current_prices, ma_5, ma_7, ma_21, ma_200):
+    """
+    Vectorized determine_market_condition for every bar.
+
+    Returns an object array of condition names, None where an MA is not yet defined.
+    """
+    values = np.column_stack([current_prices, ma_5, ma_7, ma_21, ma_200]).astype(float)
+    # Stable sort on the negated values orders highest first with ties in label order, like sorted(reverse=True)
+    order = np.argsort(-values, axis=1, kind='stable')
+
+    codes = np.zeros(len(values), dtype=np.int64)
+    width = order.shape[1]
+    for position in range(width):
+        # Lehmer digit: how many of the later labels have a smaller index
+        digit = (order[:, position + 1:] < order[:, position:position + 1]).sum(axis=1)
+        codes = codes * (width - position) + digit
+
+    condition_lookup = np.array([condition for condition, _ in bot.condition_table], dtype=object)
+    conditions = condition_lookup[codes]
+    conditions[np.isnan(values).any(axis=1)] = None
+    return conditions
+
+
+def _exit(trade, price, high, low, profit_margin, loss_margin, exit_on):
+    # Same thresholds and comparisons as the executor and the trigger engine; returns (reason, exit price)
+    take_profit, stop_loss = exit_levels(trade['trade_type'], trade['open_price'], profit_margin, loss_margin)
+    if exit_on != 'trigger':
+        return crossed(trade['trade_type'], take_profit, stop_loss, price), price
+    # A trigger fires as soon as the bar's range reaches a level; when both were reached, assume the stop came first
+    long = trade['trade_type'] == 'market_buy'
+    if (low <= stop_loss) if long else (high >= stop_loss):
+        return 'stop_loss', stop_loss
+    if (high >= take_profit) if long else (low <= take_profit):
+        return 'take_profit', take_profit
+    return None, price
+
+
+def simulate(conditions, prices, timestamps, return_percentage, loss_risk_percentage, fee_margin=0.0, amount=1.0,
+             exit_on='trigger', highs=None, lows=None):
+    """
+    Replay the live open and exit rules bar by bar.
+
+    Each bar is one monitor tick. As in the live Bridge, the transition that opens a
+    trade compares the new condition with the one from two ticks ago, and the
+    gate passes when the last two ticks agreed, or the last condition allows the
+    side and amount is positive (like can_execute_trade, the amount is only
+    checked on the second path). exit_on='trigger' models the trigger engine: from the bar after the
+    open, a trade closes at its take-profit or stop-loss level as soon as the
+    bar's high/low reaches it (closes stand in for highs/lows when not given).
+    exit_on='signal' only checks exits when a gated signal reaches
+    execute_trade, the executor's own fallback check; exit_on='bar' checks
+    every bar's close.
+    """
+    profit_margin = return_percentage / 100
+    loss_margin = loss_risk_percentage / 100
+    fee = fee_margin / 100
+    trades = []
+    position = None
+    current, previous = None, None  # Bridge.market_condition / previous_market_condition
+
+    prices = np.asarray(prices, dtype=float).tolist()
+    highs = prices if highs is None else np.asarray(highs, dtype=float).tolist()
+    lows = prices if lows is None else np.asarray(lows, dtype=float).tolist()
+    for index, condition in enumerate(conditions):
+        if condition is None:
+            continue
+        price = prices[index]
+        trade_type = TRADE_TRANSITIONS.get((previous, condition))
+        signalled = trade_type is not None and (
+            previous == current or (trade_type in HOTKEY_OPTIONS.get(current, ()) and amount > 0))
+
+        # The trigger is armed at the open's close, so it watches from the next bar on
+        if exit_on == 'trigger' and position is not None:
+            position = _close_position(trades, position, index, timestamps, highs[index], lows[index], price,
+                                       profit_margin, loss_margin, fee, amount, exit_on)
+
+        if signalled and position is None:
+            position = {'open_index': index, 'open_time': timestamps[index], 'trade_type': trade_type,
+                        'open_price': price}
+        if position is not None and (signalled or exit_on == 'bar'):
+            position = _close_position(trades, position, index, timestamps, price, price, price,
+                                       profit_margin, loss_margin, fee, amount, 'signal')
+
+        previous, current = current, condition
+
+    if position is not None:
+        trades.append(dict(position, close_index=None, close_time=None, close_price=None, exit_reason='open',
+                           return_pct=np.nan, profit_loss=np.nan))
+    return pd.DataFrame(trades, columns=TRADE_COLUMNS)
+
+
+def _close_position(trades, position, index, timestamps, high, low, price, profit_margin, loss_margin, fee, amount,
+                    exit_on):
+    # Record the close and return None when an exit level was hit, else keep the position
+    reason, exit_price = _exit(position, price, high, low, profit_margin, loss_margin, exit_on)
+    if not reason:
+        return position
+    direction = 1 if position['trade_type'] == 'market_buy' else -1
+    return_pct = direction * (exit_price - position['open_price']) / position['open_price'] * 100
+    return_pct -= fee * 100
+    trades.append(dict(position, close_index=index, close_time=timestamps[index], close_price=exit_price,
+                       exit_reason=reason, return_pct=return_pct, profit_loss=amount * return_pct / 100))
+    return None
+
+
+def summarize(trades, bars):
+    """Equity curve (cumulative profit/loss per bar) and summary statistics for a trade list."""
+    closed = trades[trades['exit_reason'] != 'open']
+    equity = pd.Series(0.0, index=range(bars))
+    if not closed.empty:
+        equity = closed.groupby('close_index')['profit_loss'].sum().reindex(equity.index, fill_value=0.0).cumsum()
+    wins = int((closed['profit_loss'] > 0).sum())
+    summary = {
+        'trades': len(closed),
+        'wins': wins,
+        'win_rate': wins / len(closed) if len(closed) else 0.0,
+        'total_return_pct': float(closed['return_pct'].sum()),
+        'profit_loss': float(closed['profit_loss'].sum()),
+        'max_drawdown': float((equity.cummax() - equity).max()) if len(equity) else 0.0,
+        'open_position': len(trades) != len(closed),
+    }
+    return equity, summary
+
+
+def run_backtest(prices, return_percentage, loss_risk_percentage, fee_margin=0.0, amount=1.0,
+                 periods=DEFAULT_PERIODS, exact=False, exit_on='trigger'):
+    """
+    Backtest the MA-ordering strategy over a kline history.
+
+    prices needs 'close' (and optionally 'timestamp'); each bar's close is used as the
+    current price. exact=True computes the MAs with the live engine instead of prefix
+    sums so near-ties resolve bit-for-bit as they would live, at some cost in speed.
+    Returns {'trades', 'equity', 'summary'}.
+    """
+    closes = prices['close'].to_numpy(dtype=float)
+    timestamps = prices['timestamp'].to_numpy() if 'timestamp' in prices else np.arange(len(closes))
+    averages = (engine_moving_averages if exact else moving_averages)(closes, periods)
+    conditions = market_conditions(closes, *(averages[period] for period in periods))
+    highs = prices['high'].to_numpy(dtype=float) if 'high' in prices else None
+    lows = prices['low'].to_numpy(dtype=float) if 'low' in prices else None
+    trades = simulate(conditions, closes, timestamps, return_percentage, loss_risk_percentage, fee_margin, amount,
+                      exit_on, highs, lows)
+
+    equity, summary = summarize(trades, len(closes))
+    return {'trades': trades, 'equity': equity, 'summary': summary}
+
+
+def load_klines(path):
+    """Load a kline history saved as CSV with at least timestamp and close columns."""
+    prices = pd.read_csv(path)
+    if 'timestamp' in prices and np.issubdtype(prices['timestamp'].dtype, np.number):
+        prices['timestamp'] = pd.to_datetime(prices['timestamp'], unit='ms')
+    return prices
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Backtest the MA-ordering strategy on a kline CSV.")
+    parser.add_argument("klines", help="CSV with timestamp, open, high, low, close columns")
+    parser.add_argument("--return-percentage", type=float, default=0.01)
+    parser.add_argument("--loss-risk-percentage", type=float, default=0.01)
+    parser.add_argument("--fee-margin", type=float, default=0.0)
+    parser.add_argument("--amount", type=float, default=1.0)
+    parser.add_argument("--exact", action="store_true", help="Use the live MA engine for bit-exact parity")
+    parser.add_argument("--exit-on", choices=["trigger", "signal", "bar"], default="trigger")
+    parser.add_argument("--trades-out", help="Write the trade list to this CSV")
+    args = parser.parse_args()
+
+    result = run_backtest(load_klines(args.klines), args.return_percentage, args.loss_risk_percentage,
+                          args.fee_margin, args.amount, exact=args.exact, exit_on=args.exit_on)
+    logger.info(f"Summary: {result['summary']}")
+    if args.trades_out:
+        result['trades'].to_csv(args.trades_out, index=False)
+        logger.info(f"Trades written to {args.trades_out}")
@@ -0,0 +1,295 @@
+import argparse
+import itertools
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+RESULTS_FILE = "benchmark_results.json"
+BASELINE_FILE = "benchmark_baseline.json"
+REGRESSION_THRESHOLD = 0.25  # A case is flagged when it got more than 25% slower than its baseline
+MIN_TIME = 0.2  # Seconds each repeat should run for; the call count per repeat is sized to reach it
+REPEATS = 5
+REPO_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+CANDLE_SIZES = (200, 10_000, 1_000_000)
+ROW_SIZES = (10, 1_000, 100_000)
+QUICK_CANDLE_SIZES = (200, 10_000)
+QUICK_ROW_SIZES = (10, 1_000)
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+# Imports a fresh interpreter makes before each entry point is ready: the GUI window, the headless
+# monitor (main.py plus the monitoring stack) and the executor the trade worker loads
+STARTUP_IMPORTS = {'gui': 'gui', 'headless': 'main, monitoring', 'executor': 'executor'}
+
+
+def synthetic_candles(count, seed=7):
+    """Random-walk OHLC candles with the columns the kline parser produces."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, count)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.001, count)) * close
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=count, freq='1min'),
+        'open': open_, 'high': np.maximum(open_, close) + spread, 'low': np.minimum(open_, close) - spread,
+        'close': close, 'volume': rng.uniform(1, 10, count),
+    })
+
+
+def synthetic_trades(count, seed=7):
+    """A trade log of count trades (an open and a close row each) in the journal's column layout."""
+    rng = np.random.default_rng(seed)
+    ids = [f"trade-{index}" for index in range(count)]
+    trade_types = rng.choice(['market_buy', 'market_sell'], count)
+    open_prices = rng.uniform(90, 110, count)
+    close_prices = open_prices * (1 + rng.normal(0, 0.003, count))
+    mas = rng.uniform(90, 110, (2 * count, 4))
+    frame = pd.DataFrame({
+        'Trade ID': np.repeat(ids, 2),
+        'Timestamp': '2024-01-01 00:00:00',
+        'Symbol': 'BTCUSDT',
+        'Trade Type': np.repeat(trade_types, 2),
+        'Price': np.column_stack((open_prices, close_prices)).ravel(),
+        'Market Type': 'spot',
+        'Status': np.tile(['Opened', 'Closed'], count),
+        'Market Condition': 'Bullish',
+    })
+    for position, column in enumerate(['ma_200', 'ma_21', 'ma_7', 'ma_5']):
+        frame[column] = mas[:, position]
+    return frame
+
+
+def _journal_row(trade_id, status='Opened'):
+    return {'trade_id': trade_id, 'timestamp': '2024-01-01 00:00:00', 'symbol': 'BTCUSDT', 'trade_type': 'market_buy',
+            'price': 100.0, 'market_type': 'spot', 'status': status, 'market_condition': 'Bullish',
+            'ma_200': 99.0, 'ma_21': 99.5, 'ma_7': 99.8, 'ma_5': 99.9}
+
+
+# Each case builder does its setup and returns the function to time, called with no arguments
+def case_market_condition():
+    import bot
+
+    # All 120 orderings of price, ma_5, ma_7, ma_21 and ma_200
+    orderings = list(itertools.permutations((1.0, 2.0, 3.0, 4.0, 5.0)))
+
+    def run():
+        for values in orderings:
+            bot.determine_market_condition(*values)
+    return run
+
+
+def case_moving_averages(count):
+    import bot
+
+    candles = synthetic_candles(count)
+    return lambda: bot.calculate_moving_averages(candles)
+
+
+def case_market_pressure(count):
+    import bot
+
+    candles = synthetic_candles(count)
+    return lambda: bot.calculate_market_pressure(candles)
+
+
+def case_journal_append(rows, directory):
+    from journal import TradeJournal
+
+    journal = TradeJournal(os.path.join(directory, f"journal_{rows}.db"))
+    for index in range(rows):
+        journal.append(_journal_row(f"existing-{index}"))
+    journal.flush()
+    ids = itertools.count()
+    # wait=True: the trade is committed before the call returns, as durable as the old Excel write
+    return lambda: journal.append(_journal_row(f"new-{next(ids)}"), wait=True)
+
+
+def case_projector(trades, directory):
+    from ledger import PnLLedger
+    from projector import Projector
+
+    ledger = PnLLedger(os.path.join(directory, f"ledger_{trades}.db"))
+    ledger.rebuild(synthetic_trades(trades))
+    projector = Projector(ledger)
+    projector.calculate_profit_loss()  # The loss-trade export happens once, when the loss set changes
+    return projector.calculate_profit_loss
+
+
+def case_dictator(trades):
+    from dictator import Dictator
+
+    trade_log = synthetic_trades(trades)
+    closed = trade_log[trade_log['Status'] == 'Closed']
+    loss_trades = closed[closed.index % 2 == 1][['Trade ID']]
+    return lambda: Dictator.filter_open_trades(trade_log=trade_log, loss_trades=loss_trades, output_file=None)
+
+
+def case_startup(imports):
+    # A new interpreter per call, so nothing is already cached in sys.modules
+    command = [sys.executable, '-c', f"import {imports}"]
+    return lambda: subprocess.run(command, cwd=REPO_DIR, check=True, stdout=subprocess.DEVNULL)
+
+
+def cases(quick=False, directory=None):
+    """(name, builder) pairs for every benchmark; builders are only run for the selected cases."""
+    candle_sizes = QUICK_CANDLE_SIZES if quick else CANDLE_SIZES
+    row_sizes = QUICK_ROW_SIZES if quick else ROW_SIZES
+    listed = [('determine_market_condition[120 orderings]', case_market_condition)]
+    for count in candle_sizes:
+        listed.append((f'calculate_moving_averages[{count}]', lambda count=count: case_moving_averages(count)))
+        listed.append((f'calculate_market_pressure[{count}]', lambda count=count: case_market_pressure(count)))
+    for rows in row_sizes:
+        listed.append((f'journal_append[{rows} rows]', lambda rows=rows: case_journal_append(rows, directory)))
+    for trades in row_sizes:
+        listed.append((f'projector_profit_loss[{trades} trades]', lambda trades=trades: case_projector(trades, directory)))
+        listed.append((f'dictator_filter_open_trades[{trades} trades]', lambda trades=trades: case_dictator(trades)))
+    for name, imports in STARTUP_IMPORTS.items():
+        listed.append((f'startup[{name}]', lambda imports=imports: case_startup(imports)))
+    return listed
+
+
+def measure(function, min_time=MIN_TIME, repeats=REPEATS):
+    """Per-call seconds of function: median and min over repeats, each sized to last about min_time."""
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time / 10 or number >= 1_000_000:
+            break
+        number *= 10
+    number = max(1, round(number * min_time / elapsed)) if elapsed else number
+
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        timings.append((time.perf_counter() - started) / number)
+    return {'seconds': statistics.median(timings), 'min': min(timings), 'number': number, 'repeats': repeats}
+
+
+def run_benchmarks(quick=False, only=None, min_time=MIN_TIME, repeats=REPEATS):
+    """Run every case (or those whose name contains one of only) and return the results document."""
+    # The case builders import the bot's modules lazily, which must still work after leaving the repo directory
+    if REPO_DIRECTORY not in sys.path:
+        sys.path.insert(0, REPO_DIRECTORY)
+
+    results = {}
+    previous_directory = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        # Projector and Dictator write their reports to the working directory; keep them out of the repo
+        os.chdir(directory)
+        try:
+            for name, builder in cases(quick, directory):
+                if only and not any(part in name for part in only):
+                    continue
+                function = builder()
+                results[name] = measure(function, min_time, repeats)
+                print(f"{name}: {_format_seconds(results[name]['seconds'])} per call", flush=True)
+        finally:
+            os.chdir(previous_directory)
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': f"{platform.system()} {platform.machine()}",
+        'quick': quick,
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold=REGRESSION_THRESHOLD, only=None):
+    """Rows of (name, baseline seconds, current seconds, ratio, status) for cases in either document."""
+    rows = []
+    for name in sorted(set(baseline['results']) | set(current['results'])):
+        if only and not any(part in name for part in only):
+            continue
+        before = baseline['results'].get(name, {}).get('seconds')
+        after = current['results'].get(name, {}).get('seconds')
+        if before is None or after is None:
+            rows.append((name, before, after, None, 'new' if before is None else 'missing'))
+            continue
+        ratio = after / before if before else float('inf')
+        if ratio > 1 + threshold:
+            status = 'REGRESSION'
+        elif ratio < 1 / (1 + threshold):
+            status = 'faster'
+        else:
+            status = 'ok'
+        rows.append((name, before, after, ratio, status))
+    return rows
+
+
+def _format_seconds(seconds):
+    if seconds is None:
+        return '-'
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def load_results(path):
+    with open(path, 'r') as file:
+        return json.load(file)
+
+
+def save_results(document, path):
+    with open(path, 'w') as file:
+        json.dump(document, file, indent=2)
+    print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    # WARNING keeps the per-call log lines of the measured code out of the timings
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Offline micro-benchmarks for the bot's hot paths.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the benchmarks and save the results")
+    run_parser.add_argument("--out", default=RESULTS_FILE, help=f"Results file (save as {BASELINE_FILE} "
+                                                                 "to make a baseline)")
+    run_parser.add_argument("--quick", action="store_true", help="Skip the largest sizes")
+    run_parser.add_argument("--only", action="append", help="Run only cases whose name contains this")
+    run_parser.add_argument("--min-time", type=float, default=MIN_TIME)
+    run_parser.add_argument("--repeats", type=int, default=REPEATS)
+
+    compare_parser = commands.add_parser("compare", help="Compare results against a baseline")
+    compare_parser.add_argument("--baseline", default=BASELINE_FILE)
+    compare_parser.add_argument("--current", help="Results file to compare; runs the benchmarks when omitted")
+    compare_parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                                help="Allowed slowdown as a fraction (0.25 = 25%%)")
+    compare_parser.add_argument("--quick", action="store_true")
+    compare_parser.add_argument("--only", action="append")
+    compare_parser.add_argument("--min-time", type=float, default=MIN_TIME)
+    compare_parser.add_argument("--repeats", type=int, default=REPEATS)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        save_results(run_benchmarks(args.quick, args.only, args.min_time, args.repeats), args.out)
+        sys.exit(0)
+
+    baseline = load_results(args.baseline)
+    if args.current:
+        current = load_results(args.current)
+    else:
+        current = run_benchmarks(args.quick or baseline.get('quick', False), args.only, args.min_time, args.repeats)
+        save_results(current, RESULTS_FILE)
+    rows = compare(baseline, current, args.threshold, args.only)
+    width = max(len(row[0]) for row in rows) if rows else 10
+    print(f"{'case':<{width}}  {'baseline':>10}  {'current':>10}  {'ratio':>6}  status")
+    for name, before, after, ratio, status in rows:
+        ratio_text = f"{ratio:.2f}x" if ratio is not None else '-'
+        print(f"{name:<{width}}  {_format_seconds(before):>10}  {_format_seconds(after):>10}  {ratio_text:>6}  {status}")
+    regressions = [row for row in rows if row[4] == 'REGRESSION']
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%}")
+    sys.exit(1 if regressions else 0)
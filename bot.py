@@ -1,74 +1,266 @@
-import requests
 import pandas as pd
 import numpy as np
 import time
+import json
+import os
+from itertools import permutations
+from threading import Lock
+import http_client
+from archive import get_archive
+from ma_engine import MovingAverageEngine, DEFAULT_MA_PERIODS
 
 # Global flags and variables
 moving_averages = pd.DataFrame()  # For storing moving averages
-candle_size_data = {'bullish': [], 'bearish': []}  # For market pressure calculation
+ma_engine = MovingAverageEngine(DEFAULT_MA_PERIODS)  # Streaming moving averages
+MARKET_PRESSURE_SAMPLE = 10  # Candles sampled for market pressure
+
+CONDITION_LABELS = ("Current Price", "5-MA", "7-MA", "21-MA", "200-MA")
+CONDITION_RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'market_conditions.json')
+
+
+KLINE_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume',
+                 'close_time', 'quote_asset_volume', 'number_of_trades',
+                 'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume',
+                 'ignore']
+INTERVAL_UNITS_MS = {'m': 60_000, 'h': 3_600_000, 'd': 86_400_000, 'w': 604_800_000}
+MAX_KLINE_LIMIT = 1000  # Largest page Binance serves for a single klines request
+
+# Kline history per (symbol, interval, market_type), refreshed by delta sync
+kline_cache = {}
+kline_cache_lock = Lock()  # Guards kline_locks only; each key's history has its own lock
+kline_locks = {}
+
+
+def _kline_lock(key):
+    # Per-key lock, so a slow fetch for one symbol never blocks the others
+    with kline_cache_lock:
+        lock = kline_locks.get(key)
+        if lock is None:
+            lock = kline_locks[key] = Lock()
+        return lock
+
+
+def interval_to_ms(interval):
+    """Convert a Binance interval string such as '1m' or '4h' to milliseconds."""
+    return int(interval[:-1]) * INTERVAL_UNITS_MS[interval[-1]]
+
+
+def _klines_url(market_type):
+    return (
+        'https://fapi.binance.com/fapi/v1/klines'
+        if market_type == 'futures' else
+        'https://api.binance.com/api/v3/klines'
+    )
+
+
+def _fetch_klines(symbol, interval, limit, market_type, start_time=None):
+    params = {'symbol': symbol, 'interval': interval, 'limit': limit}
+    if start_time is not None:
+        params['startTime'] = start_time
+    return http_client.get_json(_klines_url(market_type), params=params)
+
+
+def _parse_klines(data):
+    if len(data[0]) == 12:
+        prices = pd.DataFrame(data, columns=KLINE_COLUMNS)
+    else:
+        prices = pd.DataFrame(data, columns=KLINE_COLUMNS[:len(data[0])])
+
+    prices['timestamp'] = pd.to_datetime(prices['timestamp'], unit='ms')
+    prices['close'] = pd.to_numeric(prices['close'])
+    prices['open'] = pd.to_numeric(prices['open'])
+    prices['high'] = pd.to_numeric(prices['high'])
+    prices['low'] = pd.to_numeric(prices['low'])
+    prices['volume'] = pd.to_numeric(prices['volume'])
+    return prices
+
+
+def _archive_klines(key, data):
+    # The archive is an optimisation; a disk problem must never stop price updates
+    try:
+        get_archive(*key).append_klines(data)
+    except Exception as e:
+        print(f"Error archiving klines: {e}")
+
+
+def _open_time_ms(timestamps):
+    return (timestamps - pd.Timestamp(0)) // pd.Timedelta(milliseconds=1)
+
+
+def _is_contiguous(prices, interval):
+    return bool((np.diff(_open_time_ms(prices['timestamp']).values) == interval_to_ms(interval)).all())
+
+
+def _archived_history(key, limit):
+    """Serve the history from the archive, fetching only the candles it is missing."""
+    symbol, interval, market_type = key
+    archive = get_archive(*key)
+    last_open = archive.last_open
+    if last_open is None or len(archive) < limit:
+        return None
+
+    missing = (int(time.time() * 1000) - last_open) // interval_to_ms(interval) + 1
+    if missing >= MAX_KLINE_LIMIT:
+        return None
+    # Start at the archived last candle so the fetch proves there is no gap after it
+    data = _fetch_klines(symbol, interval, max(int(missing) + 1, 2), market_type, start_time=last_open)
+    if not data or data[0][0] != last_open:
+        return None
+    archive.append_klines(data)
+
+    # The archive only holds closed candles; the still-forming one comes from the fetch
+    forming = [row for row in data if row[0] > archive.last_open]
+    prices = archive.tail(limit - len(forming))
+    if forming:
+        prices = pd.concat([prices, _parse_klines(forming)[prices.columns]], ignore_index=True)
+    return prices if _is_contiguous(prices, interval) else None
+
+
+def _full_resync(key, limit):
+    try:
+        prices = _archived_history(key, limit)
+    except Exception as e:
+        print(f"Error reading archived prices: {e}")
+        prices = None
+
+    if prices is None:
+        symbol, interval, market_type = key
+        data = _fetch_klines(symbol, interval, limit, market_type)
+        _archive_klines(key, data)
+        prices = _parse_klines(data)
+    last_open = int(_open_time_ms(prices['timestamp'].iloc[-1]))
+    kline_cache[key] = {'prices': prices, 'limit': limit, 'last_open': last_open}
+    return prices
+
+
+def _delta_sync(key, limit):
+    """Fetch only the still-forming candle and anything newer, then merge into the cache."""
+    symbol, interval, market_type = key
+    entry = kline_cache[key]
+    interval_ms = interval_to_ms(interval)
+    last_open = entry['last_open']
+
+    # After a long outage the missing span no longer fits in one page, so start over
+    missing = (int(time.time() * 1000) - last_open) // interval_ms + 1
+    if missing >= limit or missing > MAX_KLINE_LIMIT:
+        return _full_resync(key, limit)
+
+    data = _fetch_klines(symbol, interval, max(int(missing) + 1, 2), market_type, start_time=last_open)
+    if not data or data[0][0] != last_open:
+        # The candle we were building on is gone; the history can't be trusted
+        return _full_resync(key, limit)
+
+    # Every fetched candle must follow the previous one, otherwise backfill from scratch
+    for previous, current in zip(data, data[1:]):
+        if current[0] - previous[0] != interval_ms:
+            return _full_resync(key, limit)
+
+    _archive_klines(key, data)
+    new_rows = _parse_klines(data)
+    cached = entry['prices']
+    prices = pd.concat([cached.iloc[:-1], new_rows], ignore_index=True)
+    if len(prices) > limit:
+        prices = prices.iloc[-limit:].reset_index(drop=True)
+    entry['prices'] = prices
+    entry['last_open'] = data[-1][0]
+    return prices
 
 
 # Function to get historical prices based on the selected market type
 def get_historical_prices(symbol, interval='1m', limit=200, market_type='spot'):
     try:
-        base_url = (
-            'https://fapi.binance.com/fapi/v1/klines'
-            if market_type == 'futures' else
-            'https://api.binance.com/api/v3/klines'
-        )
-        symbol = symbol.upper()
-        url = f'{base_url}?symbol={symbol}&interval={interval}&limit={limit}'
-        response = requests.get(url)
-        response.raise_for_status()  # Check if request was successful
-        data = response.json()
-
-        columns = ['timestamp', 'open', 'high', 'low', 'close', 'volume',
-                   'close_time', 'quote_asset_volume', 'number_of_trades',
-                   'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume',
-                   'ignore']
-        if len(data[0]) == 12:
-            prices = pd.DataFrame(data, columns=columns)
-        else:
-            prices = pd.DataFrame(data, columns=columns[:len(data[0])])
-
-        prices['timestamp'] = pd.to_datetime(prices['timestamp'], unit='ms')
-        prices['close'] = pd.to_numeric(prices['close'])
-        prices['open'] = pd.to_numeric(prices['open'])
-        prices['high'] = pd.to_numeric(prices['high'])
-        prices['low'] = pd.to_numeric(prices['low'])
-        return prices
+        key = (symbol.upper(), interval, market_type)
+        with _kline_lock(key):
+            entry = kline_cache.get(key)
+            # A history seeded from pushed klines is short; backfill it once REST is reachable
+            if entry is None or entry['limit'] != limit or len(entry['prices']) < limit:
+                prices = _full_resync(key, limit)
+            else:
+                prices = _delta_sync(key, limit)
+        return prices.copy()  # Callers add indicator columns to the frame they get back
     except Exception as e:
         print(f"Error fetching historical prices: {e}")
         return pd.DataFrame()  # Return empty DataFrame on error
 
 
+# Function to merge a single pushed kline into the cached history
+def apply_kline(symbol, interval, market_type, kline, limit=200):
+    """
+    Merge one kline (REST row layout) into the cache.
+
+    With nothing cached yet (REST unreachable, e.g. offline against the replay
+    server) the kline starts the history. Returns False when the kline does not
+    continue the cached history, in which case the caller should resync through
+    get_historical_prices.
+    """
+    key = (symbol.upper(), interval, market_type)
+    with _kline_lock(key):
+        entry = kline_cache.get(key)
+        if entry is None:
+            _archive_klines(key, [kline])
+            kline_cache[key] = {'prices': _parse_klines([kline]), 'limit': limit, 'last_open': kline[0]}
+            return True
+        open_time = kline[0]
+        last_open = entry['last_open']
+        if open_time < last_open:
+            return True  # Stale update for a candle we already have
+        if open_time == last_open:
+            history = entry['prices'].iloc[:-1]
+        elif open_time == last_open + interval_to_ms(interval):
+            history = entry['prices'].iloc[1:] if len(entry['prices']) >= entry['limit'] else entry['prices']
+        else:
+            return False
+        _archive_klines(key, [kline])
+        entry['prices'] = pd.concat([history, _parse_klines([kline])], ignore_index=True)
+        entry['last_open'] = open_time
+        return True
+
+
+# Function to seed the kline cache from the local archive without a network call
+def load_archived_prices(symbol, interval='1m', limit=200, market_type='spot'):
+    """
+    Return the archived history as the cached history, or an empty DataFrame.
+
+    Only a full, gap-free tail is used; the next get_historical_prices call then
+    fetches just the candles missed since it was archived.
+    """
+    key = (symbol.upper(), interval, market_type)
+    try:
+        prices = get_archive(*key).tail(limit)
+    except Exception as e:
+        print(f"Error reading archived prices: {e}")
+        return pd.DataFrame()
+    if len(prices) < limit or not _is_contiguous(prices, interval):
+        return pd.DataFrame()
+    with _kline_lock(key):
+        last_open = int(_open_time_ms(prices['timestamp'].iloc[-1]))
+        kline_cache[key] = {'prices': prices, 'limit': limit, 'last_open': last_open}
+    return prices.copy()
+
+
+# Function to get the cached history without a network call
+def get_cached_prices(symbol, interval='1m', market_type='spot'):
+    entry = kline_cache.get((symbol.upper(), interval, market_type))
+    return entry['prices'] if entry else pd.DataFrame()
+
+
 # Function to get the current price and 24-hour high/low based on the selected market type
 def get_price_data(symbol, market_type='spot'):
-    retries = 3
-    while retries > 0:
-        try:
-            base_url = (
-                'https://fapi.binance.com/fapi/v1/ticker/24hr'
-                if market_type == 'futures' else
-                'https://api.binance.com/api/v3/ticker/24hr'
-            )
-            symbol = symbol.upper()
-            # list of symbol
-            # loop list
-            url = f'{base_url}?symbol={symbol}'
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-            # implement order obj here
-            return {
-                'current_price': float(data['lastPrice']),
-                'high_price': float(data['highPrice']),
-                'low_price': float(data['lowPrice'])
-            }
-        except Exception as e:
-            print(f"Error fetching price data: {e}")
-            retries -= 1
-            time.sleep(1)  # Wait before retrying
+    base_url = (
+        'https://fapi.binance.com/fapi/v1/ticker/24hr'
+        if market_type == 'futures' else
+        'https://api.binance.com/api/v3/ticker/24hr'
+    )
+    try:
+        data = http_client.get_json(base_url, params={'symbol': symbol.upper()})
+        # implement order obj here
+        return {
+            'current_price': float(data['lastPrice']),
+            'high_price': float(data['highPrice']),
+            'low_price': float(data['lowPrice'])
+        }
+    except Exception as e:
+        print(f"Error fetching price data: {e}")
     return {
         'current_price': 0.0,
         'high_price': 0.0,
@@ -77,7 +269,7 @@ def get_price_data(symbol, market_type='spot'):
 
 
 # Function to calculate moving averages
-def calculate_moving_averages(prices, periods=[5, 7, 21, 150, 200]):
+def calculate_moving_averages(prices, periods=DEFAULT_MA_PERIODS):
     global moving_averages
     for period in periods:
         prices[f'MA_{period}'] = prices['close'].rolling(window=period).mean()
@@ -85,192 +277,162 @@ def calculate_moving_averages(prices, periods=[5, 7, 21, 150, 200]):
     return prices
 
 
-# Function to get the current moving average value
-def get_current_ma(period):
-    global moving_averages
-    if not moving_averages.empty:
-        return moving_averages[f'MA_{period}'].iloc[-1]
-    return None
+# Function to update a streaming moving-average engine from the latest kline history
+def update_moving_averages(prices, engine=None):
+    engine = engine or ma_engine
+    engine.sync_frame(prices)
+    return engine
 
 
-# Function to calculate market pressure
-def calculate_market_pressure(prices):
-    global candle_size_data
-    sample_size = 10
+# Function to get the current moving average value; None until the engine has seen a kline history
+def get_current_ma(period, engine=None):
+    engine = engine or ma_engine
+    if period not in engine.periods:
+        raise ValueError(f"MA period {period} is not tracked; the engine has {engine.periods}")
+    if not engine.ready:
+        return None
+    return engine.value(period)
 
+
+# Function to calculate market pressure
+def calculate_market_pressure(prices, sample_size=MARKET_PRESSURE_SAMPLE):
     if len(prices) < sample_size:
         return {'bullish_avg': 0, 'bearish_avg': 0}
 
-    # Reset candle size data for each calculation
-    candle_size_data = {'bullish': [], 'bearish': []}
-
-    for index in range(-sample_size, -1):
-        candle = prices.iloc[index]
-        candle_size = candle['high'] - candle['low']
-        if candle['close'] > candle['open']:
-            candle_size_data['bullish'].append(candle_size)
-        else:
-            candle_size_data['bearish'].append(candle_size)
+    # The last candle is still forming, so only the closed ones before it are sampled
+    window = slice(-sample_size, -1)
+    high = prices['high'].values[window]
+    low = prices['low'].values[window]
+    bullish = prices['close'].values[window] > prices['open'].values[window]
 
-    bullish_avg = np.mean(candle_size_data['bullish']) if candle_size_data['bullish'] else 0
-    bearish_avg = np.mean(candle_size_data['bearish']) if candle_size_data['bearish'] else 0
+    sizes = high - low
+    bullish_count = np.count_nonzero(bullish)
+    bearish_count = len(sizes) - bullish_count
+    bullish_avg = sizes[bullish].sum() / bullish_count if bullish_count else 0
+    bearish_avg = sizes[~bullish].sum() / bearish_count if bearish_count else 0
     return {'bullish_avg': bullish_avg, 'bearish_avg': bearish_avg}
 
 
-# Function to determine market condition and trend strength
-def determine_market_condition(current_price, ma_5, ma_7, ma_21, ma_200):
-    # Order the values from highest to lowest
-    values = sorted(
-        [("Current Price", current_price), ("5-MA", ma_5), ("7-MA", ma_7), ("21-MA", ma_21), ("200-MA", ma_200)],
-        key=lambda x: x[1],
-        reverse=True
-    )
+# Function to calculate market pressure for every window of a price history
+def calculate_market_pressure_series(prices, sample_size=MARKET_PRESSURE_SAMPLE):
+    """
+    Return bullish_avg/bearish_avg for each row as if it were the last (forming) candle.
 
-    # Extract just the labels for comparison
-    order = [label for label, value in values]
-
-    # Determine market condition
-    if order == ["Current Price", "5-MA", "7-MA", "21-MA", "200-MA"] or \
-            order == ["5-MA", "Current Price", "7-MA", "21-MA", "200-MA"] or \
-            order == ["21-MA", "Current Price", "5-MA", "7-MA", "200-MA"] or \
-            order == ["Current Price", "21-MA", "5-MA", "7-MA", "200-MA"] or \
-            order == ["21-MA", "Current Price", "5-MA", "7-MA", "200-MA"] or \
-            order == ["Current Price", "7-MA", "5-MA", "21-MA", "200-MA"] or \
-            order == ["21-MA", "Current Price", "7-MA", "5-MA", "200-MA"] or \
-            order == ["Current Price", "21-MA", "7-MA", "5-MA", "200-MA"] or \
-            order == ["Current Price", "7-MA", "21-MA", "5-MA", "200-MA"] or \
-            order == ["7-MA", "21-MA", "Current Price", "5-MA", "200-MA"] or \
-            order == ["Current Price", "5-MA", "21-MA", "7-MA", "200-MA"] or \
-            order == ["Current Price", "200-MA", "5-MA", "7-MA", "21-MA"] or \
-            order == ["Current Price", "5-MA", "200-MA", "7-MA", "21-MA"] or \
-            order == ["Current Price", "5-MA", "7-MA", "200-MA", "21-MA"] or \
-            order == ["Current Price", "5-MA", "200-MA", "7-MA", "21-MA"] or \
-            order == ["Current Price", "5-MA", "7-MA", "200-MA", "21-MA"] or \
-            order == ["Current Price", "21-MA", "200-MA", "5-MA", "7-MA"] or \
-            order == ["21-MA", "Current Price", "200-MA", "5-MA", "7-MA"] or \
-            order == ["Current Price", "200-MA", "5-MA", "21-MA", "7-MA"] or \
-            order == ["5-MA", "Current Price", "7-MA", "200-MA", "21-MA"] or \
-            order == ["Current Price", "7-MA", "5-MA", "200-MA", "21-MA"] or \
-            order == ["Current Price", "7-MA", "200-MA", "5-MA", "21-MA"] or \
-            order == ["Current Price", "200-MA", "21-MA", "5-MA", "7-MA"] or \
-            order == ["Current Price", "200-MA", "5-MA", "7-MA", "21-MA"] or \
-            order == ["5-MA", "21-MA", "Current Price", "200-MA", "7-MA"] or \
-            order == ["21-MA", "Current Price", "200-MA", "7-MA", "5-MA"] or \
-            order == ["21-MA", "5-MA", "Current Price", "7-MA", "200-MA"]:
-        return "Bullish"
-
-    elif order == ["200-MA", "21-MA", "Current Price", "5-MA", "7-MA"] or \
-        order == ["200-MA", "Current Price", "5-MA", "7-MA", "21-MA"] or \
-        order == ["200-MA", "5-MA", "Current Price", "7-MA", "21-MA"] or \
-        order == ["200-MA", "21-MA", "Current Price", "7-MA", "5-MA"] or \
-        order == ["200-MA", "Current Price", "21-MA", "7-MA", "5-MA"] or \
-        order == ["200-MA", "Current Price", "5-MA", "21-MA", "7-MA"] or \
-        order == ["200-MA", "Current Price", "21-MA", "5-MA", "7-MA"] or \
-        order == ["200-MA", "Current Price", "7-MA", "5-MA", "21-MA"] or \
-        order == ["21-MA", "200-MA", "Current Price", "5-MA", "7-MA"] or \
-        order == ["21-MA", "200-MA", "Current Price", "7-MA", "5-MA"] or \
-        order == ["200-MA", "Current Price", "21-MA", "5-MA", "7-MA"] or \
-        order == ["200-MA", "Current Price", "7-MA", "21-MA", "5-MA"] or \
-        order == ["5-MA", "200-MA", "Current Price", "21-MA", "7-MA"] or \
-            order == ["200-MA", "Current Price", "7-MA", "21-MA", "5-MA"]:
-        market_condition = "Shortbull"
-
-    elif order == ["21-MA", "7-MA", "5-MA", "Current Price", "200-MA"] or \
-            order == ["7-MA", "5-MA", "Current Price", "21-MA", "200-MA"] or \
-            order == ["21-MA", "7-MA", "Current Price", "5-MA", "200-MA"] or \
-            order == ["5-MA", "7-MA", "Current Price", "21-MA", "200-MA"] or \
-            order == ["5-MA", "7-MA", "21-MA", "Current Price", "200-MA"] or \
-            order == ["7-MA", "21-MA", "5-MA", "Current Price", "200-MA"] or \
-            order == ["21-MA", "5-MA", "7-MA", "Current Price", "200-MA"] or \
-            order == ["5-MA", "21-MA", "7-MA", "Current Price", "200-MA"] or \
-            order == ["7-MA", "5-MA", "21-MA", "Current Price", "200-MA"] or \
-            order == ["7-MA", "21-MA", "5-MA", "Current Price", "200-MA"] or \
-            order == ["5-MA", "7-MA", "Current Price", "200-MA", "21-MA"] or \
-            order == ["7-MA", "5-MA", "Current Price", "200-MA", "21-MA"] or \
-            order == ["7-MA", "5-MA", "Current Price", "200-MA", "21-MA"] or \
-            order == ["5-MA", "21-MA", "7-MA", "Current Price", "200-MA"] or \
-            order == ["7-MA", "Current Price", "5-MA", "200-MA", "21-MA"] or \
-            order == ["5-MA", "7-MA", "Current Price", "21-MA", "200-MA"] or \
-            order == ["7-MA", "Current Price", "5-MA", "21-MA", "200-MA"]:
-        return "Longbear"
-
-    elif order == ["200-MA", "21-MA", "7-MA", "5-MA", "Current Price"] or \
-            order == ["200-MA", "7-MA", "5-MA", "Current Price", "21-MA"] or \
-            order == ["200-MA", "21-MA", "7-MA", "Current Price", "5-MA"] or \
-            order == ["200-MA", "7-MA", "21-MA", "5-MA", "Current Price"] or \
-            order == ["7-MA", "5-MA", "200-MA", "21-MA", "Current Price"] or \
-            order == ["7-MA", "200-MA", "5-MA", "21-MA", "Current Price"] or \
-            order == ["200-MA", "5-MA", "7-MA", "Current Price", "21-MA"] or \
-            order == ["200-MA", "7-MA", "5-MA", "21-MA", "Current Price"] or \
-            order == ["21-MA", "200-MA", "7-MA", "5-MA", "Current Price"] or \
-            order == ["21-MA", "7-MA", "5-MA", "200-MA", "Current Price"] or \
-            order == ["21-MA", "7-MA", "200-MA", "5-MA", "Current Price"] or \
-            order == ["200-MA", "21-MA", "5-MA", "7-MA", "Current Price"] or \
-            order == ["21-MA", "200-MA", "5-MA", "7-MA", "Current Price"] or \
-            order == ["200-MA", "7-MA", "21-MA", "Current Price", "5-MA"] or \
-            order == ["200-MA", "5-MA", "7-MA", "21-MA", "Current Price"] or \
-            order == ["5-MA", "200-MA", "7-MA", "21-MA", "Current Price"] or \
-            order == ["5-MA", "200-MA", "7-MA", "Current Price", "21-MA"] or \
-            order == ["5-MA", "7-MA", "200-MA", "Current Price", "21-MA"] or \
-            order == ["5-MA", "7-MA", "200-MA", "21-MA", "Current Price"] or \
-            order == ["200-MA", "5-MA", "21-MA", "7-MA", "Current Price"] or \
-            order == ["7-MA", "5-MA", "200-MA", "Current Price", "21-MA"] or \
-            order == ["21-MA", "7-MA", "5-MA", "200-MA", "Current Price"] or \
-            order == ["7-MA", "5-MA", "21-MA", "200-MA", "Current Price"] or \
-            order == ["7-MA", "21-MA", "5-MA", "200-MA", "Current Price"] or \
-            order == ["21-MA", "200-MA", "7-MA", "Current Price", "5-MA"] or \
-            order == ["7-MA", "200-MA", "Current Price", "5-MA", "21-MA"] or \
-            order == ["21-MA", "5-MA", "200-MA", "7-MA", "Current Price"] or \
-            order == ["21-MA", "7-MA", "200-MA", "5-MA", "Current Price"] or \
-            order == ["200-MA", "21-MA", "5-MA", "7-MA", "Current Price"] or \
-            order == ["200-MA", "5-MA", "7-MA", "Current Price", "21-MA"] or \
-            order == ["7-MA", "5-MA", "21-MA", "200-MA", "Current Price"] or \
-            order == ["7-MA", "200-MA", "5-MA", "21-MA", "Current Price"] or \
-            order == ["200-MA", "7-MA", "Current Price", "5-MA", "21-MA"]:
-        market_condition = "Bearish"
-
-    elif order == ["200-MA", "21-MA", "Current Price", "5-MA", "7-MA"] or \
-            order == ["200-MA", "Current Price", "5-MA", "7-MA", "21-MA"] or \
-            order == ["200-MA", "5-MA", "Current Price", "7-MA", "21-MA"] or \
-            order == ["200-MA", "21-MA", "Current Price", "7-MA", "5-MA"] or \
-            order == ["200-MA", "Current Price", "21-MA", "7-MA", "5-MA"] or \
-            order == ["200-MA", "Current Price", "5-MA", "21-MA", "7-MA"] or \
-            order == ["200-MA", "Current Price", "21-MA", "5-MA", "7-MA"] or \
-            order == ["200-MA", "Current Price", "7-MA", "5-MA", "21-MA"] or \
-            order == ["21-MA", "200-MA", "Current Price", "5-MA", "7-MA"] or \
-            order == ["21-MA", "200-MA", "Current Price", "7-MA", "5-MA"] or \
-            order == ["200-MA", "Current Price", "21-MA", "5-MA", "7-MA"] or \
-            order == ["200-MA", "Current Price", "7-MA", "21-MA", "5-MA"] or \
-            order == ["5-MA", "200-MA", "Current Price", "21-MA", "7-MA"] or \
-            order == ["200-MA", "Current Price", "7-MA", "21-MA", "5-MA"] or \
-            order == ["200-MA", "21-MA", "5-MA", "Current Price", "7-MA"]:
-        return "Shortbull"
+    Row i matches calculate_market_pressure(prices.iloc[:i + 1]); rows without a
+    full sample are 0, like the single-window function.
+    """
+    sizes = prices['high'].values - prices['low'].values
+    bullish = prices['close'].values > prices['open'].values
 
-    else:
-        market_condition = "Neutral"
+    # Prefix sums shifted by one so each window can be read as a difference
+    bullish_sizes = np.concatenate(([0.0], np.cumsum(np.where(bullish, sizes, 0.0))))
+    bearish_sizes = np.concatenate(([0.0], np.cumsum(np.where(bullish, 0.0, sizes))))
+    bullish_counts = np.concatenate(([0], np.cumsum(bullish)))
+
+    result = pd.DataFrame({'bullish_avg': 0.0, 'bearish_avg': 0.0}, index=prices.index)
+    if len(prices) < sample_size:
+        return result
+
+    # Row i samples candles i - sample_size + 1 .. i - 1
+    ends = np.arange(sample_size - 1, len(prices))
+    starts = ends - sample_size + 1
+    bullish_count = bullish_counts[ends] - bullish_counts[starts]
+    bearish_count = (sample_size - 1) - bullish_count
+    bullish_sum = bullish_sizes[ends] - bullish_sizes[starts]
+    bearish_sum = bearish_sizes[ends] - bearish_sizes[starts]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result.iloc[sample_size - 1:, 0] = np.where(bullish_count > 0, bullish_sum / bullish_count, 0.0)
+        result.iloc[sample_size - 1:, 1] = np.where(bearish_count > 0, bearish_sum / bearish_count, 0.0)
+    return result
+
+
+def encode_order(order):
+    """Encode an ordering of label indices (highest first) as its rank in 0..119."""
+    code = 0
+    remaining = list(range(len(order)))
+    for index in order:
+        position = remaining.index(index)
+        code = code * len(remaining) + position
+        remaining.pop(position)
+    return code
+
+
+ORDER_CODES = {order: encode_order(order) for order in permutations(range(len(CONDITION_LABELS)))}
+
+
+def _trend_strength(market_condition, order):
+    # Positions in the ordering: a smaller position means a higher value
+    rank = {index: position for position, index in enumerate(order)}
+    price, ma_5, ma_7, ma_21 = rank[0], rank[1], rank[2], rank[3]
 
-    # Determine trend strength
     if market_condition in ["Bullish", "Shortbull"]:
-        if current_price > ma_21 and ma_5 > ma_21 and ma_7 > ma_21:
-            trend_strength = "Strong"
-        elif current_price < ma_21 and ma_5 < ma_21 and ma_7 < ma_21:
-            trend_strength = "Weak"
-        elif (current_price > ma_5 > ma_7 > ma_21) or (current_price > ma_7 > ma_5 > ma_21):
-            trend_strength = "Strong"
-        else:
-            trend_strength = "Neutral"
-
-    elif market_condition in ["Bearish", "Longbear"]:
-        if current_price < ma_21 and ma_5 < ma_21 and ma_7 < ma_21:
-            trend_strength = "Strong"
-        elif current_price > ma_21 and ma_5 > ma_21 and ma_7 > ma_21:
-            trend_strength = "Weak"
-        elif (ma_21 > ma_5 > ma_7 > current_price) or (ma_21 > ma_7 > ma_5 > current_price):
-            trend_strength = "Weak"
-        else:
-            trend_strength = "Neutral"
+        if price < ma_21 and ma_5 < ma_21 and ma_7 < ma_21:
+            return "Strong"
+        if price > ma_21 and ma_5 > ma_21 and ma_7 > ma_21:
+            return "Weak"
+        if price < ma_5 < ma_7 < ma_21 or price < ma_7 < ma_5 < ma_21:
+            return "Strong"
+        return "Neutral"
 
-    else:
-        trend_strength = "Neutral"
+    if market_condition in ["Bearish", "Longbear"]:
+        if price > ma_21 and ma_5 > ma_21 and ma_7 > ma_21:
+            return "Strong"
+        if price < ma_21 and ma_5 < ma_21 and ma_7 < ma_21:
+            return "Weak"
+        if ma_21 < ma_5 < ma_7 < price or ma_21 < ma_7 < ma_5 < price:
+            return "Weak"
+        return "Neutral"
+
+    return "Neutral"
+
+
+def compile_condition_rules(document):
+    """
+    Compile a rule document into a table of (market condition, trend strength) per order code.
 
-    return market_condition
+    Rules are tried in file order and the first one listing an ordering wins, so
+    later duplicates are shadowed exactly as they were in the original if/elif chain.
+    """
+    labels = document.get("labels", list(CONDITION_LABELS))
+    if sorted(labels) != sorted(CONDITION_LABELS):
+        raise ValueError(f"Condition rules must use the labels {list(CONDITION_LABELS)}")
+    label_index = {label: CONDITION_LABELS.index(label) for label in labels}
+
+    conditions = {}
+    for rule in document["rules"]:
+        for labelled_order in rule["orders"]:
+            order = tuple(label_index[label] for label in labelled_order)
+            if order not in ORDER_CODES:
+                raise ValueError(f"Invalid ordering in condition rules: {labelled_order}")
+            conditions.setdefault(ORDER_CODES[order], rule["condition"])
+
+    table = [None] * len(ORDER_CODES)
+    for order, code in ORDER_CODES.items():
+        market_condition = conditions.get(code, document.get("default", "Neutral"))
+        table[code] = (market_condition, _trend_strength(market_condition, order))
+    return table
+
+
+# Function to load the market condition rules from a data file
+def load_condition_rules(path=CONDITION_RULES_FILE):
+    global condition_table
+    with open(path, 'r') as file:
+        condition_table = compile_condition_rules(json.load(file))
+    return condition_table
+
+
+condition_table = load_condition_rules()
+
+
+# Function to determine market condition and trend strength
+def classify_market(current_price, ma_5, ma_7, ma_21, ma_200):
+    values = (current_price, ma_5, ma_7, ma_21, ma_200)
+    # Order the values from highest to lowest; ties keep their label order
+    order = sorted(range(len(values)), key=values.__getitem__, reverse=True)
+    return condition_table[ORDER_CODES[tuple(order)]]
+
+
+# Function to determine market condition
+def determine_market_condition(current_price, ma_5, ma_7, ma_21, ma_200):
+    return classify_market(current_price, ma_5, ma_7, ma_21, ma_200)[0]
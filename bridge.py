@@ -1,7 +1,7 @@
 import logging
 from threading import Lock
-from bot import determine_market_condition
-from common import load_settings
+from common import load_settings, get_settings
+from position import Position
 
 # Create a logger specifically for the Bridge script
 bridge_logger = logging.getLogger("bridge")
@@ -25,8 +25,9 @@ if not bridge_logger.handlers:
 
 
 class Bridge:
-    def __init__(self, current_price=None, ma_5=None, ma_7=None, ma_21=None, ma_200=None):
+    def __init__(self, current_price=None, ma_5=None, ma_7=None, ma_21=None, ma_200=None, position=None):
         self.lock = Lock()
+        self.position = position  # PositionState of the symbol this bridge gates, if any
         self.market_condition = None
         self.previous_market_condition = None
 
@@ -36,6 +37,8 @@ class Bridge:
                 ma_7 is not None and
                 ma_21 is not None and
                 ma_200 is not None):
+            from bot import determine_market_condition
+
             self.market_condition = determine_market_condition(
                 current_price, ma_5, ma_7, ma_21, ma_200
             )
@@ -62,6 +65,11 @@ class Bridge:
 
         self.log(f"Checking if trade can be executed: Type: {trade_type}, Amount: {amount}, Limit Price: {limit_price}")
 
+        # An order is already in flight; the executor would block this one anyway
+        if self.position is not None and self.position.state in (Position.OPENING, Position.CLOSING):
+            self.log(f"Position is {self.position.state.value}; skipping {trade_type}.")
+            return False
+
         if self.previous_market_condition == self.market_condition:
             if trade_type in ['market_buy', 'limit_buy', 'market_sell', 'limit_sell']:
                 self.log(f"Market condition remains {self.market_condition}; executing trade: {trade_type}.")
@@ -98,8 +106,7 @@ class Bridge:
 
     def get_traded_amount(self):
         self.log("Trying to get traded amount")
-        settings = load_settings()
-        return float(settings.get('amount', 1))  # Ensure amount is a float
+        return get_settings().amount  # Parsed to float once per settings change
 
     @staticmethod
     def gather_trade_data():
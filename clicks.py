@@ -1,7 +1,37 @@
+import sys
 import pyautogui
+from hotkey import SEQUENCES_FILE, load_layout, save_layout
 
-print("Click anywhere on the screen to get the coordinates. Press Ctrl+C to exit.")
 
-while True:
-    x, y = pyautogui.position()
-    print(f"Mouse Position: ({x}, {y})", end="\r")
\ No newline at end of file
+# Function to show the live mouse position
+def watch_position():
+    print("Move the mouse anywhere on the screen to get the coordinates. Press Ctrl+C to exit.")
+    while True:
+        x, y = pyautogui.position()
+        print(f"Mouse Position: ({x}, {y})", end="\r")
+
+
+# Function to capture the screen points used by the hotkey sequences
+def capture_points(names=None, path=SEQUENCES_FILE):
+    layout = load_layout(path)
+    names = names or list(layout['points'])
+    print("Hover over each control in the trading window and press Enter. Type 's' to skip, 'q' to stop.")
+    for name in names:
+        current = layout['points'].get(name)
+        answer = input(f"{name} (now {current}): ").strip().lower()
+        if answer == 'q':
+            break
+        if answer == 's':
+            continue
+        x, y = pyautogui.position()
+        layout['points'][name] = [x, y]
+        print(f"  {name} -> ({x}, {y})")
+    save_layout(layout, path)
+    print(f"Points saved to {path}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ['--watch']:
+        watch_position()
+    else:
+        capture_points(sys.argv[1:])
@@ -1,56 +1,24 @@
-import json
 import logging
-import os
-from common import load_settings
 from bridge import Bridge
+from triggers import get_trigger_engine
 
 # Configure logging
 closer_logger = logging.getLogger("closer")
 closer_logger.setLevel(logging.DEBUG)
 
-SETTINGS_FILE = "settings.json"
-
 
 class TradeCloser:
-    def __init__(self, active_open_queue, executor):
-        self.active_open_queue = active_open_queue
-        self.executor = executor  # Reference to the executor module
-        self.bridge = Bridge()
-
-    def load_last_trade_price(self):
-        """Load the last trade price from settings.json"""
-        if os.path.exists(SETTINGS_FILE):
-            with open(SETTINGS_FILE, "r") as file:
-                try:
-                    data = json.load(file)
-                    if "trades" in data and data["trades"]:
-                        return data["trades"][-1]["price"]
-                except json.JSONDecodeError:
-                    return None
-        return None
+    def __init__(self, position, engine=None):
+        self.position = position  # PositionState shared with the executor
+        self.engine = engine or get_trigger_engine()  # Holds the TP/SL levels armed when trades open
+        self.bridge = Bridge(position=position)
 
     def check_and_close_trade(self, symbol, current_price):
-        """Check if trade should be closed based on profit/loss thresholds."""
-        if self.active_open_queue.qsize() == 0:
-            return  # No active open trade
-
-        settings = load_settings()
-        last_trade_price = self.load_last_trade_price()
-
-        if last_trade_price is None:
-            closer_logger.warning("No last trade price found.")
-            return
-
-        profit_margin = float(settings.get("return_percentage", 0)) / 100
-        loss_margin = float(settings.get("loss_risk_percentage", 0)) / 100
-
-        profit_threshold = last_trade_price * (1 + profit_margin)
-        loss_threshold = last_trade_price * (1 - loss_margin)
-
-        if current_price >= profit_threshold:
-            closer_logger.info(f"Closing trade: Profit target reached at {current_price}")
-            self.executor.execute_trade(symbol, "close_market_sell")  # Example trade type
-
-        elif current_price <= loss_threshold:
-            closer_logger.info(f"Closing trade: Loss threshold reached at {current_price}")
-            self.executor.execute_trade(symbol, "close_market_sell")  # Example trade type
+        """Close any open trade of symbol whose take-profit or stop-loss current_price has crossed."""
+        if not self.position.is_open:
+            return []  # No active open trade
+
+        fired = self.engine.check(symbol, current_price)
+        for trigger, reason in fired:
+            closer_logger.info(f"Closing {trigger['trade_type']} trade {trigger['id']}: {reason} at {current_price}")
+        return fired
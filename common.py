@@ -1,23 +1,144 @@
 import json
+import logging
+import os
+from threading import RLock
 
 settings_file = 'settings.json'
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+class Settings:
+    """Typed view of settings.json; numeric fields are parsed once per file change."""
+
+    FIELDS = {
+        'symbol': (str, 'BTCUSDT'),
+        'interval': (str, '1m'),
+        'market_type': (str, 'spot'),
+        'amount': (float, 1.0),
+        # Unit of amount for REST orders: 'quote' (e.g. USDT to spend) or 'base' (e.g. BTC). The hotkey backend
+        # types amount into the trading window as is; the REST gateway refuses to trade while this is unset.
+        'amount_unit': (str, None),
+        'trade_type': (str, 'market'),
+        'limit_price': (float, None),
+        'return_percentage': (float, 0.0),
+        'loss_risk_percentage': (float, 0.0),
+        'fee_margin': (float, 0.0),
+        'data_feed': (str, 'rest'),
+        'feed_url': (str, None),
+        'execution_backend': (str, 'hotkey'),
+        'exchange_url': (str, None),
+        'trigger_poll_interval': (float, 0.25),
+        'metrics_port': (int, 0),
+    }
+
+    def __init__(self, raw):
+        self.raw = raw
+        for name, (kind, default) in self.FIELDS.items():
+            value = raw.get(name)
+            try:
+                value = kind(value) if value not in (None, '') else default
+            except (TypeError, ValueError):
+                value = default
+            setattr(self, name, value)
+
+    def get(self, key, default=None):
+        return self.raw.get(key, default)
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.FIELDS)
+        return f"Settings({fields})"
+
+
+_lock = RLock()
+_file_key = None  # (mtime_ns, size) of the file the cache was built from
+_raw_settings = {}
+_settings = Settings({})
+_subscribers = []
+
+
+def _stat_key():
+    try:
+        stat = os.stat(settings_file)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _apply(raw, file_key):
+    global _file_key, _raw_settings, _settings
+    changed = {key for key in set(raw) | set(_raw_settings) if raw.get(key) != _raw_settings.get(key)}
+    _file_key = file_key
+    _raw_settings = raw
+    _settings = Settings(raw)
+    if changed:
+        for callback in list(_subscribers):
+            try:
+                callback(_settings, changed)
+            except Exception as e:
+                print(f"Error notifying settings subscriber: {e}")
+
+
+def _refresh():
+    # A stat call is much cheaper than parsing; only reload when the file changed
+    file_key = _stat_key()
+    if file_key is not None and file_key == _file_key:
+        return
+    with _lock:
+        if file_key is not None and file_key == _file_key:
+            return
+        try:
+            with open(settings_file, 'r') as file:
+                raw = json.load(file)
+        except Exception as e:
+            # Keep serving the last good settings; the file is read again on the next call
+            print(f"Error loading settings: {e}")
+            return
+        _apply(raw, file_key)
 
 
 # Function to load settings from a file
 def load_settings():
-    try:
-        with open(settings_file, 'r') as file:
-            settings = json.load(file)
-            return settings
-    except Exception as e:
-        print(f"Error loading settings: {e}")
-        return {}
+    _refresh()
+    return dict(_raw_settings)  # Callers may modify their copy
+
+
+# Function to get the typed, cached settings
+def get_settings():
+    _refresh()
+    return _settings
+
+
+# Function to register a callback(settings, changed_keys) run whenever settings change
+def subscribe(callback):
+    with _lock:
+        _subscribers.append(callback)
+    return callback
+
+
+def unsubscribe(callback):
+    with _lock:
+        if callback in _subscribers:
+            _subscribers.remove(callback)
 
 
 # Function to save settings to a file
 def save_settings(settings):
     try:
-        with open(settings_file, 'w') as file:
-            json.dump(settings, file, indent=4)
+        with _lock:
+            # Write a temp file and rename it over the old one, so readers never see a half-written file
+            temp_path = f"{settings_file}.tmp"
+            with open(temp_path, 'w') as file:
+                json.dump(settings, file, indent=4)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, settings_file)
+            # Update the cache in place so readers see the new values without a reload
+            _apply(dict(settings), _stat_key())
     except Exception as e:
         print(f"Error saving settings: {e}")
+
+
+# Function to set up console logging; entry points call it once at startup, modules never at import
+def configure_logging(level=logging.DEBUG):
+    logging.basicConfig(level=level, format=LOG_FORMAT)
+    logging.getLogger("urllib3").setLevel(logging.WARNING)
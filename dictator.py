@@ -1,63 +1,87 @@
 import pandas as pd
+import numpy as np
 import logging
 import os
+from common import configure_logging
+from journal import get_journal
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("dictator")
 
 # File paths
-TRADE_LOG_FILE = "trade_log.xlsx"
 PROJECTOR_FILE = "loss_trades.xlsx"
 DICTATOR_OUTPUT_FILE = "dictator_output.xlsx"
 
+MA_COLUMNS = ["ma_200", "ma_21", "ma_7", "ma_5"]
+# Known issue: the executor logs opens as "Opened", so journal rows don't match; kept as the original filter
+OPEN_STATUS = "Open"
 
-class Dictator:
-    logger.info("dictator script")
 
+class Dictator:
     @staticmethod
     def calculate_percentage(ma_value, price):
         """Calculate the percentage difference between a moving average and the price."""
         return round(((ma_value - price) / price) * 100, 2) if price else None
 
     @staticmethod
-    def filter_open_trades():
-        """Filter trades that are open and match trade IDs from projector output, then save them."""
-        if not os.path.exists(TRADE_LOG_FILE) or not os.path.exists(PROJECTOR_FILE):
-            logger.error("One or both required Excel files are missing.")
+    def calculate_percentages(ma_values, prices):
+        """Vectorized calculate_percentage over arrays; rows with a zero price are NaN."""
+        ma_values = np.asarray(ma_values, dtype=float)
+        prices = np.asarray(prices, dtype=float)
+        if ma_values.ndim == 2:
+            prices = prices[:, np.newaxis]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            percentages = np.round((ma_values - prices) / prices * 100, 2)
+        return np.where(prices != 0, percentages, np.nan)
+
+    @staticmethod
+    def filter_open_trades(trade_log=None, loss_trades=PROJECTOR_FILE, output_file=DICTATOR_OUTPUT_FILE):
+        """
+        Filter trades that are open and match trade IDs from projector output, then save them.
+
+        trade_log and loss_trades may be DataFrames or Excel paths; the trade log
+        defaults to the rows of the loss trades in the trade journal. Returns the
+        filtered frame, and writes it to output_file unless that is None.
+        """
+        if isinstance(loss_trades, str) and not os.path.exists(loss_trades):
+            logger.error(f"{loss_trades} is missing.")
             return
 
         try:
             # Load trade log and projector output
-            trade_log_df = pd.read_excel(TRADE_LOG_FILE, sheet_name="Trade Log")
-            projector_df = pd.read_excel(PROJECTOR_FILE)
-
-            # Get trade IDs from projector output
-            valid_trade_ids = set(projector_df["Trade ID"].tolist())
+            projector_df = pd.read_excel(loss_trades) if isinstance(loss_trades, str) else loss_trades
+            if trade_log is None:
+                trade_log_df = get_journal().read_trades(projector_df["Trade ID"])
+            elif isinstance(trade_log, str):
+                trade_log_df = pd.read_excel(trade_log, sheet_name="Trade Log")
+            else:
+                trade_log_df = trade_log
 
             # Filter trade log for matching trade IDs with 'Open' status
             filtered_df = trade_log_df[
-                (trade_log_df["Trade ID"].isin(valid_trade_ids)) & (trade_log_df["Status"] == "Open")
-            ]
+                (trade_log_df["Trade ID"].isin(projector_df["Trade ID"])) & (trade_log_df["Status"] == OPEN_STATUS)
+            ].copy()
 
             if filtered_df.empty:
                 logger.info("No matching open trades found.")
-                return
+                return filtered_df
 
-            # Convert moving averages to percentage
-            for ma in ["ma_200", "ma_21", "ma_7", "ma_5"]:
-                if ma in filtered_df.columns:
-                    filtered_df[f"{ma}_percentage"] = filtered_df.apply(
-                        lambda row: Dictator.calculate_percentage(row[ma], row["Price"]), axis=1
-                    )
+            # Convert all moving averages to percentages in one array operation
+            ma_columns = [ma for ma in MA_COLUMNS if ma in filtered_df.columns]
+            if ma_columns:
+                percentages = Dictator.calculate_percentages(filtered_df[ma_columns], filtered_df["Price"])
+                for position, ma in enumerate(ma_columns):
+                    filtered_df[f"{ma}_percentage"] = percentages[:, position]
 
             # Save the filtered data to a new Excel file
-            filtered_df.to_excel(DICTATOR_OUTPUT_FILE, index=False)
-            logger.info(f"Filtered open trades saved to {DICTATOR_OUTPUT_FILE}")
+            if output_file:
+                filtered_df.to_excel(output_file, index=False)
+                logger.info(f"Filtered open trades saved to {output_file}")
+            return filtered_df
 
         except Exception as e:
             logger.error(f"Error processing trade logs: {e}")
 
 
 if __name__ == "__main__":
+    configure_logging(logging.INFO)
     Dictator.filter_open_trades()
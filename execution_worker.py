@@ -0,0 +1,137 @@
+import logging
+import time
+from collections import OrderedDict
+from threading import Condition, Lock, Thread
+
+import executor
+import metrics
+
+worker_logger = logging.getLogger("execution_worker")
+
+
+class ExecutionWorker:
+    """
+    Runs executor.execute_trade on a dedicated thread so the monitor never blocks on it.
+
+    submit() only records the command and returns. Commands are keyed by
+    (symbol, trade_type): while one is queued, a repeat of the same signal
+    replaces its arguments with the newer ones instead of queueing again, so a
+    condition that fires on every tick while an order is in flight yields at
+    most one follow-up execution. Callbacks get a result dict once the command
+    has run.
+    """
+
+    def __init__(self, execute=None):
+        self.execute = execute or executor.execute_trade
+        self.condition = Condition()
+        self.pending = OrderedDict()  # (symbol, trade_type) -> command, oldest first
+        self.in_flight = None
+        self.callbacks = []
+        self.running = False
+        self.thread = None
+        self.stats = {'submitted': 0, 'coalesced': 0, 'executed': 0, 'failed': 0}
+
+    def start(self):
+        with self.condition:
+            if self.running:
+                return self
+            self.running = True
+        self.thread = Thread(target=self._run, name="execution-worker", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Stop after the command in flight; queued commands are dropped."""
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def add_callback(self, callback):
+        """Register callback(result) to be run for every finished command."""
+        self.callbacks.append(callback)
+        return callback
+
+    def submit(self, trade_type, symbol, callback=None, execute=None, **trade):
+        """
+        Queue a trade (the execute_trade keyword arguments); returns False when it was
+        merged into an identical signal that is already queued. execute runs the
+        command with another function than execute_trade, e.g. a triggered close.
+        """
+        key = (symbol, trade_type)
+        trade.update(trade_type=trade_type, symbol=symbol)
+        with self.condition:
+            self.stats['submitted'] += 1
+            command = self.pending.get(key)
+            if command is not None:
+                command['trade'] = trade  # The latest market condition and MAs win
+                command['execute'] = execute
+                if callback:
+                    command['callbacks'].append(callback)
+                self.stats['coalesced'] += 1
+                return False
+            self.pending[key] = {'trade': trade, 'execute': execute, 'callbacks': [callback] if callback else [],
+                                 'queued': time.monotonic()}
+            self.condition.notify()
+            return True
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while self.running and not self.pending:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                key, command = self.pending.popitem(last=False)
+                self.in_flight = key
+            self._execute(key, command)
+            with self.condition:
+                self.in_flight = None
+                self.condition.notify_all()
+
+    def _execute(self, key, command):
+        started = time.monotonic()
+        result = {'symbol': key[0], 'trade_type': key[1], 'ok': True, 'error': None,
+                  'waited': started - command['queued']}
+        try:
+            result['value'] = (command['execute'] or self.execute)(**command['trade'])
+            self.stats['executed'] += 1
+        except Exception as e:
+            result.update(ok=False, error=e)
+            self.stats['failed'] += 1
+            worker_logger.error(f"Error executing {key[1]} for {key[0]}: {e}")
+        result['duration'] = time.monotonic() - started
+        metrics.observe(metrics.STAGE_SECONDS, result['waited'], stage='execution_wait')
+        metrics.observe(metrics.STAGE_SECONDS, result['duration'], stage='execute_trade')
+        worker_logger.debug(f"{key[1]} for {key[0]} waited {result['waited'] * 1000:.0f} ms, "
+                            f"ran {result['duration'] * 1000:.0f} ms")
+        for callback in command['callbacks'] + self.callbacks:
+            try:
+                callback(result)
+            except Exception as e:
+                worker_logger.error(f"Error in execution callback: {e}")
+
+    def wait_idle(self, timeout=None):
+        """Block until nothing is queued or in flight; returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            while self.pending or self.in_flight is not None:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.condition.wait(remaining)
+            return True
+
+
+_worker = None
+_worker_lock = Lock()
+
+
+def get_worker():
+    """Return the shared execution worker, starting it on first use."""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = ExecutionWorker().start()
+        return _worker
@@ -1,90 +1,55 @@
 import logging
 import time
-import requests
-import json
-import os
+import http_client
 import common
-import pandas as pd
-from openpyxl import Workbook
+import metrics
 import uuid
-from projector import Projector
-from dictator import Dictator
-
-EXCEL_FILE = "trade_log.xlsx"
-
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+from analytics import submit_post_trade_report
+from journal import get_journal
+from ledger import get_ledger
+from state import get_state
+from order_gateway import get_execution_backend
+from position import OPEN_POSITIONS, Position
+from triggers import exit_levels, get_trigger_engine
 
 executor_logger = logging.getLogger("executor")
-SETTINGS_FILE = "settings.json"
-
-
-# Ensure the file exists before writing
-if not os.path.exists(EXCEL_FILE):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Trade Log"
-    wb.save(EXCEL_FILE)
-
 
-def clear_last_trade_id():
-    """Remove the last trade ID from settings.json."""
-    try:
-        with open(SETTINGS_FILE, 'r') as file:
-            settings = json.load(file)
-
-        settings.pop("last_trade_id", None)  # Remove the key if it exists
+# Open trade types the executor closes, and the backend operation that closes each
+CLOSE_ACTIONS = {'market_buy': 'close_market_buy_trade', 'market_sell': 'close_market_sell_trade'}
 
-        with open(SETTINGS_FILE, 'w') as file:
-            json.dump(settings, file, indent=4)
 
-    except (FileNotFoundError, json.JSONDecodeError):
-        pass  # Ignore if file doesn't exist or is empty
+def clear_last_trade_id(symbol):
+    """Remove the symbol's last trade ID from the trade state."""
+    get_state().pop_item("last_trade_id", symbol.upper())
 
 
-def generate_trade_id(active_open_queue):
-    """Generate or reuse a trade ID based on active trade status."""
-    if active_open_queue.empty() or "0" in list(active_open_queue.queue):
+def generate_trade_id(position, symbol):
+    """Generate a trade ID while opening, or reuse the symbol's open trade ID while closing."""
+    if position.state in (Position.FLAT, Position.OPENING):
         trade_id = str(uuid.uuid4())  # Generate a new unique ID
-        save_trade_id(trade_id)  # Save the new trade ID
+        save_trade_id(symbol, trade_id)  # Save the new trade ID
         executor_logger.info(f"generating TID and saving")
         return trade_id
     else:
         executor_logger.info(f"using saved TID")
-        return get_last_trade_id()  # Reuse the last trade ID if needed
+        return get_last_trade_id(symbol)  # Reuse the last trade ID if needed
 
 
-def get_last_trade_id():
-    """Retrieve the last trade ID from settings.json."""
-    try:
-        with open(SETTINGS_FILE, 'r') as file:
-            settings = json.load(file)
-            executor_logger.info(f"getting saved TID")
-        return settings.get("last_trade_id", "")
-    except (FileNotFoundError, json.JSONDecodeError):
-        return ""
+def get_last_trade_id(symbol):
+    """Retrieve the symbol's last trade ID from the trade state."""
+    executor_logger.info(f"getting saved TID")
+    return get_state().get_item("last_trade_id", symbol.upper(), "")
 
 
-def save_trade_id(trade_id):
-    """Save a new trade ID to settings.json."""
-    try:
-        with open(SETTINGS_FILE, 'r') as file:
-            settings = json.load(file)
-            executor_logger.info(f"def save_trade_id saving TID")
-    except (FileNotFoundError, json.JSONDecodeError):
-        settings = {}
-
-    settings["last_trade_id"] = trade_id  # Store the unique trade ID
+def save_trade_id(symbol, trade_id):
+    """Save a new trade ID for the symbol to the trade state."""
+    executor_logger.info(f"def save_trade_id saving TID")
+    get_state().set_item("last_trade_id", symbol.upper(), trade_id)  # Store the unique trade ID
 
-    with open(SETTINGS_FILE, 'w') as file:
-        json.dump(settings, file, indent=4)
 
-
-def log_trade_to_excel(trade_id, symbol, trade_type, price, market_type, status, market_condition, ma_200, ma_21, ma_7, ma_5):
+def log_trade(trade_id, symbol, trade_type, price, market_type, status, market_condition, ma_200, ma_21, ma_7, ma_5):
     """
-    Log trade details into an Excel spreadsheet.
+    Append trade details to the trade journal; export to Excel with `python journal.py export`.
 
     Args:
         trade_id (str): trade unique id
@@ -100,188 +65,113 @@ def log_trade_to_excel(trade_id, symbol, trade_type, price, market_type, status,
         ma_5 (float): Value of the ma_5 moving average.
     """
     trade_data = {
-        "Trade ID": [trade_id],  # Add the unique trade ID
-        "Timestamp": [time.strftime('%Y-%m-%d %H:%M:%S')],
-        "Symbol": [symbol],
-        "Trade Type": [trade_type],
-        "Price": [price],
-        "Market Type": [market_type],
-        "Status": [status],  # 'Opened' or 'Closed'
-        "Market Condition": [market_condition],  # e.g., Bullish, Bearish, Neutral
-        "ma_200": [ma_200],
-        "ma_21": [ma_21],
-        "ma_7": [ma_7],
-        "ma_5": [ma_5]
+        "trade_id": trade_id,  # Add the unique trade ID
+        "timestamp": time.strftime('%Y-%m-%d %H:%M:%S'),
+        "symbol": symbol,
+        "trade_type": trade_type,
+        "price": price,
+        "market_type": market_type,
+        "status": status,  # 'Opened' or 'Closed'
+        "market_condition": market_condition,  # e.g., Bullish, Bearish, Neutral
+        "ma_200": ma_200,
+        "ma_21": ma_21,
+        "ma_7": ma_7,
+        "ma_5": ma_5
     }
 
-    df_new = pd.DataFrame(trade_data)
-
     try:
-        if os.path.exists(EXCEL_FILE):
-            # Load existing data
-            existing_data = pd.read_excel(EXCEL_FILE, sheet_name="Trade Log")
-
-            # Append new data
-            updated_data = pd.concat([existing_data, df_new], ignore_index=True)
-
-            # Save back to file
-            with pd.ExcelWriter(EXCEL_FILE, engine="openpyxl", mode="w") as writer:
-                updated_data.to_excel(writer, index=False, sheet_name="Trade Log")
-        else:
-            # Create new file if it does not exist
-            df_new.to_excel(EXCEL_FILE, index=False, sheet_name="Trade Log")
-
-    except PermissionError:
-        executor_logger.info("Error logging trade to Excel: File is open. Close it and try again.")
+        with metrics.stage('journal_append'):
+            # Committed before the trade goes on, as durable as the old per-trade Excel write
+            get_journal().append(trade_data, wait=True)
     except Exception as e:
-        executor_logger.info(f"Error logging trade to Excel: {e}")
+        executor_logger.error(f"Error logging trade to journal: {e}")
     else:
-        executor_logger.info(f"Trade logged to Excel: {trade_type} at {price}")
+        executor_logger.info(f"Trade logged to journal: {trade_type} at {price}")
+
+    # Keep the running P&L in step with the journal
+    try:
+        if status == "Opened":
+            get_ledger().record_open(trade_id, symbol, trade_type, price)
+        elif status == "Closed":
+            get_ledger().record_close(trade_id, price)
+    except Exception as e:
+        executor_logger.error(f"Error updating P&L ledger: {e}")
 
 
 def get_current_price(symbol, market_type='spot'):
-    retries = 3
-    while retries > 0:
-        try:
-            base_url = (
-                'https://fapi.binance.com/fapi/v1/ticker/24hr'
-                if market_type == 'futures' else
-                'https://api.binance.com/api/v3/ticker/24hr'
-            )
-            symbol = symbol.upper()
-            url = f'{base_url}?symbol={symbol}'
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-            return float(data['lastPrice'])
-        except Exception as e:
-            executor_logger.error(f"Error fetching price data: {e}")
-            retries -= 1
-            time.sleep(1)  # Wait before retrying
+    base_url = (
+        'https://fapi.binance.com/fapi/v1/ticker/24hr'
+        if market_type == 'futures' else
+        'https://api.binance.com/api/v3/ticker/24hr'
+    )
+    try:
+        data = http_client.get_json(base_url, params={'symbol': symbol.upper()})
+        return float(data['lastPrice'])
+    except Exception as e:
+        executor_logger.error(f"Error fetching price data: {e}")
     return 0.0  # Return a default price if failed
 
 
 def save_trade_price(symbol, trade_type, current_price, market_type):
-    """Save only the latest executed trade price in settings.json"""
-    if os.path.exists(SETTINGS_FILE):
-        with open(SETTINGS_FILE, "r") as file:
-            try:
-                data = json.load(file)
-            except json.JSONDecodeError:
-                data = {}
-    else:
-        data = {}
-
-    # Save only the latest trade
-    data["trades"] = {
+    """Save the latest executed trade of the symbol in the trade state"""
+    # Each symbol keeps only its latest trade
+    get_state().set_item("trades", symbol.upper(), {
         "symbol": symbol,
         "trade_type": trade_type,
         "price": current_price,
         "market_type": market_type
-    }
-
-    with open(SETTINGS_FILE, "w") as file:
-        json.dump(data, file, indent=4)
+    })
 
     executor_logger.info(f"Trade saved: {symbol} | {trade_type} | {current_price}")
 
 
-def load_last_trade_price():
-    """Load the last trade price from settings.json"""
-    if os.path.exists(SETTINGS_FILE):
-        with open(SETTINGS_FILE, "r") as file:
-            try:
-                data = json.load(file)
-                if "trades" in data and data["trades"]:
-                    return data["trades"]["price"]
-            except json.JSONDecodeError:
-                executor_logger.warning("Failed to decode JSON while loading last trade price.")
-                return None
-    return None
+def load_last_trade_price(symbol):
+    """Load the symbol's last trade price from the trade state"""
+    last_trade = get_state().get_item("trades", symbol.upper())
+    return last_trade["price"] if last_trade else None
 
 
-def execute_trade(trade_type, signal_queue, active_open_queue, active_sell_queue, symbol, market_type, market_condition, ma_200, ma_21, ma_7, ma_5):
-    executor_logger.debug(f"Attempting to execute trade with trade type: {trade_type}")
+def execute_trade(trade_type, signal_queue, position, symbol, market_type, market_condition, ma_200, ma_21, ma_7, ma_5):
+    # Every trade state change made while executing is persisted in one write
+    with get_state().batch():
+        return _execute_trade(trade_type, signal_queue, position, symbol, market_type,
+                              market_condition, ma_200, ma_21, ma_7, ma_5)
+
+
+def _execute_trade(trade_type, signal_queue, position, symbol, market_type, market_condition, ma_200, ma_21, ma_7, ma_5):
+    executor_logger.debug(f"Attempting to execute trade with trade type: {trade_type} ({position})")
 
-    # Load the last saved trade price from settings.json
-    settings = common.load_settings()  # Load settings using the common module
     current_price = get_current_price(symbol, market_type)  # Get last recorded trade price
 
     if current_price is None:
-        executor_logger.warning(f"No saved trade price found in settings.json for {symbol}. Fetching live price.")
+        executor_logger.warning(f"No saved trade price found for {symbol}. Fetching live price.")
         current_price = get_current_price(symbol, market_type)  # Fallback to live price
 
-    # Only pause monitoring if active_open_queue value is "0"
-    if active_open_queue.empty() or "0" in list(active_open_queue.queue):
+    # Only pause monitoring if no trade is open
+    if position.is_flat:
         signal_queue.put("PAUSE")
         executor_logger.info("Monitoring paused while trade is being executed.")
     else:
         executor_logger.info("Monitoring not paused: active trade already exists.")
 
-    import hotkey
-
-    def can_execute_trade(activity_queue):
-        try:
-            with activity_queue.mutex:  # Safely access queue contents
-                return "1" not in list(activity_queue.queue)  # Trade can execute only if "1" is NOT in queue
-        except Exception as e:
-            executor_logger.error(f"Error checking trade queue: {e}")
-            return False
+    backend = get_execution_backend(market_type)  # hotkey clicks or REST orders, per the execution_backend setting
 
     if trade_type in ['limit_buy', 'market_buy']:
-        if can_execute_trade(active_open_queue):
-            current_price = get_current_price(symbol, market_type)  # Get current price
-
-            if trade_type == 'limit_buy':
-                hotkey.limit_buy_trade()
-            else:  # market_buy
-                hotkey.market_buy_trade()
-
-            trade_id = generate_trade_id(active_open_queue)  # Generate a unique ID
-            log_trade_to_excel(trade_id, symbol, trade_type, current_price, market_type, "Opened", market_condition,
-                               ma_200, ma_21, ma_7, ma_5)  # Log trade
-            # Completely clear the queue
-            with active_open_queue.mutex:
-                active_open_queue.queue.clear()
-
-            active_open_queue.put("1")  # Mark open trade as active
-            executor_logger.info(f"Current active_open_queue: {list(active_open_queue.queue)}")
-            save_trade_price(symbol, trade_type, current_price, market_type)  # Save trade data
-
-        else:
-            executor_logger.info(f"Trade execution blocked: {trade_type} already active.")
+        _open_trade(backend, f"{trade_type}_trade", Position.OPEN_LONG, signal_queue, position, symbol, trade_type,
+                    market_type, market_condition, ma_200, ma_21, ma_7, ma_5)
 
     elif trade_type in ['limit_sell', 'market_sell']:
-        if can_execute_trade(active_open_queue):
-            current_price = get_current_price(symbol, market_type)  # Get current price
-
-            if trade_type == 'limit_sell':
-                hotkey.limit_sell_trade()
-            else:  # market_sell
-                hotkey.market_sell_trade()
-
-            trade_id = generate_trade_id(active_open_queue)  # Generate a unique ID
-            log_trade_to_excel(trade_id, symbol, trade_type, current_price, market_type, "Opened", market_condition,
-                               ma_200, ma_21, ma_7, ma_5)  # Log trade
-            # Completely clear the queue
-            with active_open_queue.mutex:
-                active_open_queue.queue.clear()
-
-            active_open_queue.put("1")  # Mark sell trade as active
-            executor_logger.info(f"Current active_open_queue: {list(active_open_queue.queue)}")
-            save_trade_price(symbol, trade_type, current_price, market_type)  # Save trade data
-
-        else:
-            executor_logger.info(f"Trade execution blocked: {trade_type} already active.")
+        _open_trade(backend, f"{trade_type}_trade", Position.OPEN_SHORT, signal_queue, position, symbol, trade_type,
+                    market_type, market_condition, ma_200, ma_21, ma_7, ma_5)
 
-    if active_open_queue.empty():
-        executor_logger.warning("No active trade in queue. Exiting check_and_close_trade.")
+    if not position.is_open:
+        executor_logger.warning("No open trade. Exiting check_and_close_trade.")
         return  # No active open trade
 
-    settings = common.load_settings()  # Use common module to load settings
+    settings = common.get_settings()  # Cached; only re-read when settings.json changes
     executor_logger.info("Settings loaded successfully.")
 
-    last_trade_data = settings.get("trades", {})
+    last_trade_data = get_state().get_item("trades", symbol.upper(), {})
     last_trade_price = last_trade_data.get("price", None)
     trade_type = last_trade_data.get("trade_type", "")
 
@@ -291,167 +181,170 @@ def execute_trade(trade_type, signal_queue, active_open_queue, active_sell_queue
 
     executor_logger.info(f"Last trade price: {last_trade_price}, Trade type: {trade_type}")
 
-    profit_margin = float(settings.get("return_percentage", 0)) / 100
-    loss_margin = float(settings.get("loss_risk_percentage", 0)) / 100
+    profit_margin = settings.return_percentage / 100
+    loss_margin = settings.loss_risk_percentage / 100
 
-    if trade_type == 'market_buy':
-        profit_threshold = last_trade_price * (1 + profit_margin)
-        loss_threshold = last_trade_price * (1 - loss_margin)
-    else:
-        profit_threshold = last_trade_price * (1 - profit_margin)
-        loss_threshold = last_trade_price * (1 + loss_margin)
+    profit_threshold, loss_threshold = exit_levels(trade_type, last_trade_price, profit_margin, loss_margin)
 
     executor_logger.info(f"Profit target: {profit_threshold}, Loss limit: {loss_threshold}")
     executor_logger.info(f"current price: {current_price}")
 
     if trade_type == 'market_buy':
         if current_price >= profit_threshold:
-            # If a trade needs to be closed, pause monitoring
-            signal_queue.put("PAUSE")
-            executor_logger.info("Monitoring paused while closing trade.")
-            executor_logger.info(f"Closing buy trade: Profit target reached at {profit_threshold}")
-            hotkey.close_market_buy_trade()
-
-            executor_logger.info("Executed close_market_buy_trade().")
-            executor_logger.info("Clearing active trade queue before resetting status.")
-            trade_id = generate_trade_id(active_open_queue)  # Generate a unique ID
-
-            log_trade_to_excel(trade_id, symbol, trade_type, current_price, market_type, "Closed", market_condition,
-                               ma_200, ma_21, ma_7, ma_5)  # Log trade
-            clear_last_trade_id()  # Clear the last trade ID after retrieving it
-
-            projector = Projector()  # This creates the instance
-            dictator = Dictator()
-            executor_logger.info(f"dictator instance created: {dictator}")
-            executor_logger.info(f"Projector instance created: {projector}")
-            try:
-                executor_logger.info("Calling calculate_profit_loss method.")  # Ensure method is called
-                projector.calculate_profit_loss()  # This is the method being called
-            except Exception as e:
-                executor_logger.error(f"Error during trade execution: {e}")
-
-            while not active_open_queue.empty():
-                # Completely clear the queue
-                with active_open_queue.mutex:
-                    active_open_queue.queue.clear()
-            active_open_queue.put("0")  # Mark trade as inactive
-
-            executor_logger.info(f"Current active_open_queue: {list(active_open_queue.queue)}")
-            executor_logger.info("Trade marked as inactive.")
-            # Send a signal to resume monitoring
-            signal_queue.put("RESUME")
-            executor_logger.info("Monitoring resumed after trade execution.")
+            reason = f"Closing buy trade: Profit target reached at {profit_threshold}"
         elif current_price <= loss_threshold:
-            # If a trade needs to be closed, pause monitoring
-            signal_queue.put("PAUSE")
-            executor_logger.info("Monitoring paused while closing trade.")
-            executor_logger.info(f"Closing buy trade: Loss limit reached at {loss_threshold}")
-            hotkey.close_market_buy_trade()
-
-            executor_logger.info("Executed close_market_buy_trade().")
-            executor_logger.info("Clearing active trade queue before resetting status.")
-            trade_id = generate_trade_id(active_open_queue)  # Generate a unique ID
-
-            log_trade_to_excel(trade_id, symbol, trade_type, current_price, market_type, "Closed", market_condition,
-                               ma_200, ma_21, ma_7, ma_5)  # Log trade
-            clear_last_trade_id()  # Clear the last trade ID after retrieving it
-
-            projector = Projector()  # This creates the instance
-            dictator = Dictator()
-            executor_logger.info(f"dictator instance created: {dictator}")
-            executor_logger.info(f"Projector instance created: {projector}")
-            try:
-                executor_logger.info("Calling calculate_profit_loss method.")  # Ensure method is called
-                projector.calculate_profit_loss()  # This is the method being called
-            except Exception as e:
-                executor_logger.error(f"Error during trade execution: {e}")
-
-            while not active_open_queue.empty():
-                # Completely clear the queue
-                with active_open_queue.mutex:
-                    active_open_queue.queue.clear()
-            active_open_queue.put("0")  # Mark trade as inactive
-
-            executor_logger.info(f"Current active_open_queue: {list(active_open_queue.queue)}")
-            executor_logger.info("Trade marked as inactive.")
-            # Send a signal to resume monitoring
-            signal_queue.put("RESUME")
-            executor_logger.info("Monitoring resumed after trade execution.")
+            reason = f"Closing buy trade: Loss limit reached at {loss_threshold}"
         else:
             executor_logger.info("Trade closure conditions not met for buy trade. No action taken.")
             return  # No need to close trade
+        close_action = 'close_market_buy_trade'
 
     elif trade_type == 'market_sell':
         if current_price <= profit_threshold:
-            # If a trade needs to be closed, pause monitoring
-            signal_queue.put("PAUSE")
-            executor_logger.info("Monitoring paused while closing trade.")
-            executor_logger.info(f"Closing sell trade: Profit target reached at {profit_threshold}")
-            hotkey.close_market_sell_trade()
-
-            executor_logger.info("Executed close_market_sell_trade().")
-            executor_logger.info("Clearing active trade queue before resetting status.")
-            trade_id = generate_trade_id(active_open_queue)  # Generate a unique ID
-
-            log_trade_to_excel(trade_id, symbol, trade_type, current_price, market_type, "Closed", market_condition,
-                               ma_200, ma_21, ma_7, ma_5)  # Log trade
-            clear_last_trade_id()  # Clear the last trade ID after retrieving it
-
-            projector = Projector()  # This creates the instance
-            dictator = Dictator()
-            executor_logger.info(f"dictator instance created: {dictator}")
-            executor_logger.info(f"Projector instance created: {projector}")
-            try:
-                executor_logger.info("Calling calculate_profit_loss method.")  # Ensure method is called
-                projector.calculate_profit_loss()  # This is the method being called
-            except Exception as e:
-                executor_logger.error(f"Error during trade execution: {e}")
-
-            while not active_open_queue.empty():
-                # Completely clear the queue
-                with active_open_queue.mutex:
-                    active_open_queue.queue.clear()
-            active_open_queue.put("0")  # Mark trade as inactive
-
-            executor_logger.info(f"Current active_open_queue: {list(active_open_queue.queue)}")
-            executor_logger.info("Trade marked as inactive.")
-            # Send a signal to resume monitoring
-            signal_queue.put("RESUME")
-            executor_logger.info("Monitoring resumed after trade execution.")
-        elif current_price >= loss_threshold:  # FIXED: Loss happens when price goes UP in a sell trade
-            executor_logger.info(f"Closing sell trade: Loss limit reached at {loss_threshold}")
-            hotkey.close_market_sell_trade()
-
-            executor_logger.info("Executed close_market_sell_trade().")
-            executor_logger.info("Clearing active trade queue before resetting status.")
-            trade_id = generate_trade_id(active_open_queue)  # Generate a unique ID
-
-            log_trade_to_excel(trade_id, symbol, trade_type, current_price, market_type, "Closed", market_condition,
-                               ma_200, ma_21, ma_7, ma_5)  # Log trade
-            clear_last_trade_id()  # Clear the last trade ID after retrieving it
-
-            projector = Projector()  # This creates the instance
-            dictator = Dictator()
-            executor_logger.info(f"dictator instance created: {dictator}")
-            executor_logger.info(f"Projector instance created: {projector}")
-            try:
-                executor_logger.info("Calling calculate_profit_loss method.")  # Ensure method is called
-                projector.calculate_profit_loss()  # This is the method being called
-            except Exception as e:
-                executor_logger.error(f"Error during trade execution: {e}")
-
-            while not active_open_queue.empty():
-                # Completely clear the queue
-                with active_open_queue.mutex:
-                    active_open_queue.queue.clear()
-            active_open_queue.put("0")  # Mark trade as inactive
-
-            executor_logger.info(f"Current active_open_queue: {list(active_open_queue.queue)}")
-            executor_logger.info("Trade marked as inactive.")
-            # Send a signal to resume monitoring
-            signal_queue.put("RESUME")
-            executor_logger.info("Monitoring resumed after trade execution.")
+            reason = f"Closing sell trade: Profit target reached at {profit_threshold}"
+        elif current_price >= loss_threshold:  # Loss happens when price goes UP in a sell trade
+            reason = f"Closing sell trade: Loss limit reached at {loss_threshold}"
         else:
             executor_logger.info("Trade closure conditions not met for sell trade. No action taken.")
-
             return  # No need to close trade
+        close_action = 'close_market_sell_trade'
+
+    else:
+        return
+
+    _close_trade(backend, close_action, reason, signal_queue, position, symbol, trade_type, current_price,
+                 market_type, market_condition, ma_200, ma_21, ma_7, ma_5)
+
+
+# Function to open a trade; only one thread can move the position out of flat
+def _open_trade(backend, open_action, opened, signal_queue, position, symbol, trade_type, market_type,
+                market_condition, ma_200, ma_21, ma_7, ma_5):
+    if not position.compare_and_set(Position.FLAT, Position.OPENING):
+        executor_logger.info(f"Trade execution blocked: {trade_type} while position is {position.state.value}.")
+        return False
+
+    try:
+        current_price = get_current_price(symbol, market_type)  # Get current price
+        amount = common.get_settings().amount
+        placed = getattr(backend, open_action)(symbol=symbol, market_type=market_type, amount=amount) is not False
+    except Exception as e:
+        executor_logger.error(f"Error in {open_action}(): {e}")
+        placed = False
+    if not placed:
+        position.compare_and_set(Position.OPENING, Position.FLAT)
+        executor_logger.error(f"{open_action}() failed; position left flat.")
+        return False
+
+    try:
+        trade_id = generate_trade_id(position, symbol)  # Generate a unique ID
+        log_trade(trade_id, symbol, trade_type, current_price, market_type, "Opened", market_condition,
+                  ma_200, ma_21, ma_7, ma_5)  # Log trade
+        save_trade_price(symbol, trade_type, current_price, market_type)  # Save trade data
+    finally:
+        # The order is placed, so the position is open even if the bookkeeping failed
+        position.compare_and_set(Position.OPENING, opened)  # Mark open trade as active
+    executor_logger.info(f"Position is now {position.state.value}.")
+
+    if trade_type in CLOSE_ACTIONS:
+        _arm_trigger(trade_id, symbol, trade_type, current_price, signal_queue, position, market_type,
+                     market_condition, ma_200, ma_21, ma_7, ma_5)
+    return True
+
+
+# Function to hand the new position's take-profit/stop-loss levels to the trigger engine
+def _arm_trigger(trade_id, symbol, trade_type, price, signal_queue, position, market_type, market_condition,
+                 ma_200, ma_21, ma_7, ma_5):
+    settings = common.get_settings()
+    take_profit, stop_loss = exit_levels(trade_type, price, settings.return_percentage / 100,
+                                         settings.loss_risk_percentage / 100)
+    context = {'signal_queue': signal_queue, 'position': position, 'generation': position.generation,
+               'market_condition': market_condition, 'ma_200': ma_200, 'ma_21': ma_21, 'ma_7': ma_7, 'ma_5': ma_5}
+    try:
+        get_trigger_engine().add(trade_id, symbol, trade_type, take_profit, stop_loss, _submit_trigger_close,
+                                 market_type, context)
+    except Exception as e:
+        executor_logger.error(f"Error arming exit trigger: {e}; exits fall back to the signal check.")
+
+
+# Function to queue a fired trigger's close on the execution worker, behind any order in flight
+def _submit_trigger_close(trigger, reason, price):
+    from execution_worker import get_worker  # execution_worker imports this module
+
+    get_worker().submit(trade_type=f"close_{trigger['trade_type']}", symbol=trigger['symbol'],
+                        execute=close_on_trigger, trigger=trigger, reason=reason, price=price)
+
+
+def close_on_trigger(trade_type, symbol, trigger, reason, price):
+    """
+    Close the position a fired trigger belongs to, unless it was closed or replaced since the trigger was armed.
+
+    The engine drops a trigger when it fires, so one whose close fails is armed again.
+    """
+    context = trigger['context']
+    position = context['position']
+    if position.generation != context['generation']:
+        executor_logger.info(f"Trigger {trigger['id']} is stale ({position}); not closing.")
+        return False
+    level = trigger[reason]
+    side = 'buy' if trigger['trade_type'] == 'market_buy' else 'sell'
+    label = 'Profit target' if reason == 'take_profit' else 'Loss limit'
+    with get_state().batch():
+        closed = _close_trade(get_execution_backend(trigger['market_type']), f"{trade_type}_trade",
+                              f"Closing {side} trade: {label} reached at {level}", context['signal_queue'], position,
+                              symbol, trigger['trade_type'], price, trigger['market_type'],
+                              context['market_condition'], context['ma_200'], context['ma_21'], context['ma_7'],
+                              context['ma_5'], trade_id=trigger['id'])
+    if not closed and position.is_open and position.generation == context['generation']:
+        executor_logger.info(f"Re-arming trigger {trigger['id']}; its position is still open.")
+        get_trigger_engine().add(trigger['id'], trigger['symbol'], trigger['trade_type'], trigger['take_profit'],
+                                 trigger['stop_loss'], trigger['on_fire'], trigger['market_type'], context)
+    return closed
+
+
+# Function to close the open trade, log it and hand the reports to the analytics pool
+def _close_trade(backend, close_action, reason, signal_queue, position, symbol, trade_type, current_price,
+                 market_type, market_condition, ma_200, ma_21, ma_7, ma_5, trade_id=None):
+    opened = position.state
+    # Only one thread (signal or trigger) gets to close a given position
+    if opened not in OPEN_POSITIONS or not position.compare_and_set(opened, Position.CLOSING):
+        executor_logger.info(f"Close skipped: position is {position.state.value}.")
+        return False
+
+    # If a trade needs to be closed, pause monitoring
+    signal_queue.put("PAUSE")
+    executor_logger.info("Monitoring paused while closing trade.")
+    executor_logger.info(reason)
+    try:
+        placed = getattr(backend, close_action)(symbol=symbol, market_type=market_type) is not False
+    except Exception as e:
+        executor_logger.error(f"Error in {close_action}(): {e}")
+        placed = False
+    if not placed:
+        position.compare_and_set(Position.CLOSING, opened)
+        executor_logger.error(f"{close_action}() failed; position left {opened.value}.")
+        signal_queue.put("RESUME")
+        return False
+
+    executor_logger.info(f"Executed {close_action}().")
+    try:
+        trade_id = trade_id or generate_trade_id(position, symbol)  # Reuse the open trade's ID
+        get_trigger_engine().cancel(trade_id)  # No-op when the trigger is what closed it
+
+        log_trade(trade_id, symbol, trade_type, current_price, market_type, "Closed", market_condition,
+                  ma_200, ma_21, ma_7, ma_5)  # Log trade
+        clear_last_trade_id(symbol)  # Clear the last trade ID after retrieving it
+
+        # Projector/Dictator reports run in a separate process; closing the trade never waits for them
+        try:
+            job_id = submit_post_trade_report()
+            executor_logger.info(f"Post-trade report submitted as analytics job {job_id}.")
+        except Exception as e:
+            executor_logger.error(f"Error submitting post-trade report: {e}")
+    finally:
+        # The order is placed, so the position is flat even if the bookkeeping failed
+        position.compare_and_set(Position.CLOSING, Position.FLAT)  # Mark trade as inactive
+        executor_logger.info("Trade marked as inactive.")
+        # Send a signal to resume monitoring
+        signal_queue.put("RESUME")
+    executor_logger.info("Monitoring resumed after trade execution.")
+    return True
@@ -0,0 +1,173 @@
+import json
+import logging
+import queue
+import random
+import time
+from threading import Thread, Event
+
+import websocket
+
+from bot import interval_to_ms
+
+feed_logger = logging.getLogger("feed")
+
+
+def stream_url(symbol, interval, market_type='spot'):
+    """Binance combined-stream URL carrying the kline and 24hr ticker for one symbol."""
+    base_url = (
+        'wss://fstream.binance.com/stream'
+        if market_type == 'futures' else
+        'wss://stream.binance.com:9443/stream'
+    )
+    symbol = symbol.lower()
+    return f'{base_url}?streams={symbol}@kline_{interval}/{symbol}@ticker'
+
+
+def trade_stream_url(symbol, market_type='spot'):
+    """Binance aggregate-trade stream URL for one symbol: one message per trade, for price triggers."""
+    base_url = (
+        'wss://fstream.binance.com/stream'
+        if market_type == 'futures' else
+        'wss://stream.binance.com:9443/stream'
+    )
+    return f'{base_url}?streams={symbol.lower()}@aggTrade'
+
+
+def parse_kline(payload):
+    """Convert a stream kline payload to a row in the REST klines layout."""
+    k = payload['k']
+    return [k['t'], k['o'], k['h'], k['l'], k['c'], k['v'], k['T'], k['q'], k['n'], k['V'], k['Q'], '0']
+
+
+class MarketFeed:
+    """
+    Push-based kline and ticker feed over a persistent websocket connection.
+
+    Updates are delivered as events on self.events (or to on_event):
+      {'type': 'kline', 'kline': [...], 'closed': bool, 'received': float}
+      {'type': 'ticker', 'current_price', 'high_price', 'low_price', 'received': float}
+      {'type': 'trade', 'price': float, 'received': float} on an aggregate-trade stream
+      {'type': 'gap', 'expected': int, 'received_open': int} when candles were skipped
+      {'type': 'reconnected'} after the connection had to be re-established
+    A gap or reconnect means the consumer should resync history over REST.
+    """
+
+    def __init__(self, symbol, interval='1m', market_type='spot', url=None, on_event=None,
+                 record_path=None, max_backoff=30.0):
+        self.symbol = symbol.upper()
+        self.interval = interval
+        self.interval_ms = interval_to_ms(interval)
+        self.url = url or stream_url(symbol, interval, market_type)
+        self.on_event = on_event
+        self.record_path = record_path
+        self.max_backoff = max_backoff
+        self.events = queue.Queue()
+        self.stop_event = Event()
+        self.thread = None
+        self.last_kline_open = None
+        self.last_event_time = {}
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = Thread(target=self._run, name=f"feed-{self.symbol}", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=5)
+
+    def get(self, timeout=None):
+        """Return the next event, or None if nothing arrived within timeout."""
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _emit(self, event):
+        if self.on_event:
+            self.on_event(event)
+        else:
+            self.events.put(event)
+
+    def _run(self):
+        attempt = 0
+        record_file = open(self.record_path, 'a') if self.record_path else None
+        try:
+            while not self.stop_event.is_set():
+                if attempt:
+                    # Exponential backoff with jitter so reconnects don't stampede the server
+                    delay = min(self.max_backoff, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.0)
+                    feed_logger.info(f"Reconnecting feed in {delay:.1f}s")
+                    if self.stop_event.wait(delay):
+                        break
+                try:
+                    connection = websocket.create_connection(self.url, timeout=5)
+                except Exception as e:
+                    attempt += 1
+                    feed_logger.warning(f"Feed connection failed: {e}")
+                    continue
+
+                feed_logger.info(f"Feed connected: {self.url}")
+                if attempt:
+                    self._emit({'type': 'reconnected'})
+                attempt = 0
+                try:
+                    self._receive(connection, record_file)
+                except Exception as e:
+                    if not self.stop_event.is_set():
+                        feed_logger.warning(f"Feed connection lost: {e}")
+                        attempt = 1
+                finally:
+                    connection.close()
+        finally:
+            if record_file:
+                record_file.close()
+
+    def _receive(self, connection, record_file):
+        while not self.stop_event.is_set():
+            try:
+                message = connection.recv()
+            except websocket.WebSocketTimeoutException:
+                continue
+            if not message:
+                raise ConnectionError("stream closed by server")
+            received = time.time()
+            if record_file:
+                record_file.write(json.dumps({'received': received, 'message': json.loads(message)}) + '\n')
+            self.handle_message(message, received)
+
+    def handle_message(self, message, received=None):
+        received = received or time.time()
+        data = json.loads(message) if isinstance(message, str) else message
+        payload = data.get('data', data)  # Combined streams wrap the payload
+        event_type = payload.get('e')
+
+        # Events are ordered per stream; anything older than what we've seen is stale
+        event_time = payload.get('E', 0)
+        if event_time < self.last_event_time.get(event_type, 0):
+            return
+        self.last_event_time[event_type] = event_time
+
+        if event_type == 'kline':
+            kline = parse_kline(payload)
+            open_time = kline[0]
+            if self.last_kline_open is not None and open_time > self.last_kline_open + self.interval_ms:
+                feed_logger.warning(f"Kline gap detected for {self.symbol}: expected "
+                                    f"{self.last_kline_open + self.interval_ms}, got {open_time}")
+                self._emit({'type': 'gap', 'expected': self.last_kline_open + self.interval_ms,
+                            'received_open': open_time})
+            if self.last_kline_open is None or open_time >= self.last_kline_open:
+                self.last_kline_open = open_time
+                self._emit({'type': 'kline', 'kline': kline, 'closed': payload['k']['x'], 'received': received})
+        elif event_type == '24hrTicker':
+            self._emit({
+                'type': 'ticker',
+                'current_price': float(payload['c']),
+                'high_price': float(payload['h']),
+                'low_price': float(payload['l']),
+                'received': received
+            })
+        elif event_type == 'aggTrade':
+            self._emit({'type': 'trade', 'price': float(payload['p']), 'received': received})
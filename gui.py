@@ -3,20 +3,12 @@ import logging
 import tkinter as tk
 from threading import Thread, Event
 from tkinter import ttk
-from common import load_settings, save_settings
-from monitoring import monitor_crypto
+from common import configure_logging, load_settings, save_settings
 import time
-from bot import determine_market_condition
+import metrics
+import profiler
 from bridge import Bridge
-
-
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[logging.StreamHandler()]
-)
-
-logging.getLogger("urllib3").setLevel(logging.WARNING)
+from position import OPEN_POSITIONS, Position, PositionState
 
 gui_logger = logging.getLogger("gui")
 monitoring_active = False
@@ -27,8 +19,7 @@ bridge = Bridge()
 
 # Initialize a queue for communication
 signal_queue = queue.Queue()
-active_open_queue = queue.Queue()
-active_sell_queue = queue.Queue()
+position = PositionState()  # Open/closed state of the trade, shared with the executor
 
 # active open trade control flag
 active_open_trade = False
@@ -36,13 +27,18 @@ active_open_trade = False
 active_sell_trade = False
 # Monitoring control flag
 monitoring_paused = False
+position_listeners_started = False
 
 
 def monitor_thread(symbol, interval, market_type):
     global stop_signal, bridge, monitoring_active, monitoring_paused, active_open_trade, active_sell_trade
+    # The monitoring stack (pandas, the executor, the exchange client) loads here, off the UI thread
+    from bot import determine_market_condition
+    from monitoring import monitor_crypto
+
     gui_logger.debug("Monitoring thread started.")
 
-    monitor_crypto(symbol, signal_queue, active_open_queue, active_sell_queue, interval, market_type, stop_event)
+    monitor_crypto(symbol, signal_queue, position, interval, market_type, stop_event)
     previous_market_condition = None
 
     while not stop_event.is_set():
@@ -65,6 +61,19 @@ def monitor_thread(symbol, interval, market_type):
     gui_logger.info("Monitoring thread stopped.")
 
 
+def multi_monitor_thread(symbols, interval, market_type):
+    global monitoring_active
+    from multi_monitor import MultiSymbolMonitor
+
+    gui_logger.debug("Multi-symbol monitoring thread started.")
+
+    monitor = MultiSymbolMonitor(symbols, signal_queue, interval, market_type)
+    monitor.run_forever(stop_event)
+
+    monitoring_active = False
+    gui_logger.info("Multi-symbol monitoring thread stopped.")
+
+
 def listen_for_signals():
     """Listens for pause/resume signals from executor.py and adjusts monitoring."""
     global monitoring_paused
@@ -79,24 +88,35 @@ def listen_for_signals():
 
 
 def listen_for_active_open():
-    """Listens for active trade signals from executor.py and adjusts can execute."""
+    """Follows the position state set by executor.py and adjusts can execute."""
     global active_open_trade
+    state, version = position.snapshot()
     while True:
-        open_activity = active_open_queue.get()
-        gui_logger.debug(f"Received active open trade signal: {open_activity}")
-        if open_activity == "1":
-            active_open_trade = True
+        gui_logger.debug(f"Position state: {state.value}")
+        active_open_trade = state in OPEN_POSITIONS
+        if active_open_trade:
             gui_logger.info("Active open trade detected.")
+        state, version = position.wait_for_change(version)  # Sleeps until the executor changes it
 
 
 def listen_for_active_sell():
-    """Listens for active trade signals from executor.py and adjusts can execute."""
+    """Follows the position state set by executor.py and adjusts can execute."""
     global active_sell_trade
+    state, version = position.snapshot()
     while True:
-        sell_activity = active_sell_queue.get()  # Fix: Use the correct queue
-        if sell_activity == "1":
-            active_sell_trade = True
+        active_sell_trade = state is Position.OPEN_SHORT
+        if active_sell_trade:
             gui_logger.info("Active sell trade detected.")
+        state, version = position.wait_for_change(version)
+
+
+def start_position_listeners():
+    global position_listeners_started
+    if position_listeners_started:
+        return
+    position_listeners_started = True
+    for listener in (listen_for_active_open, listen_for_active_sell):
+        Thread(target=listener, daemon=True).start()
 
 
 def start_monitoring(symbol, interval, market_type):
@@ -107,7 +127,13 @@ def start_monitoring(symbol, interval, market_type):
         return
     stop_event.clear()
     monitoring_active = True
-    monitoring_thread = Thread(target=monitor_thread, args=(symbol, interval, market_type))
+    # A comma-separated symbol list is monitored from a single event loop
+    symbols = [s.strip() for s in symbol.split(',') if s.strip()]
+    if len(symbols) > 1:
+        monitoring_thread = Thread(target=multi_monitor_thread, args=(symbols, interval, market_type),
+                                   name="multi-monitor")
+    else:
+        monitoring_thread = Thread(target=monitor_thread, args=(symbol, interval, market_type), name="monitor")
     monitoring_thread.start()
     gui_logger.info(f"Started monitoring for {symbol} with {interval} interval on {market_type} market.")
     bridge = Bridge()
@@ -116,6 +142,7 @@ def start_monitoring(symbol, interval, market_type):
     signal_listener_thread = Thread(target=listen_for_signals)
     signal_listener_thread.daemon = True
     signal_listener_thread.start()
+    start_position_listeners()
 
 
 def stop_monitoring():
@@ -132,10 +159,48 @@ def stop_monitoring():
     gui_logger.info("Monitoring stopped successfully.")
 
 
+def open_metrics_panel(root):
+    """Window listing p50/p95/p99 latency per monitor stage and HTTP endpoint, refreshed every second."""
+    window = tk.Toplevel(root)
+    window.title("Metrics")
+    enabled_var = tk.BooleanVar(value=metrics.get_registry().enabled)
+
+    def toggle():
+        metrics.enable() if enabled_var.get() else metrics.disable()
+
+    tk.Checkbutton(window, text="Collect metrics", variable=enabled_var, command=toggle).pack(anchor='w')
+    tk.Button(window, text="Reset", command=metrics.get_registry().reset).pack(anchor='w')
+
+    columns = ('series', 'count', 'p50', 'p95', 'p99', 'max')
+    table = ttk.Treeview(window, columns=columns, show='headings', height=20)
+    for column in columns:
+        table.heading(column, text=column)
+        table.column(column, width=320 if column == 'series' else 80, anchor='w' if column == 'series' else 'e')
+    table.pack(fill='both', expand=True)
+
+    def refresh():
+        if not window.winfo_exists():
+            return
+        table.delete(*table.get_children())
+        for row in metrics.snapshot():
+            labels = ','.join(f"{key}={value}" for key, value in row['labels'].items())
+            series = f"{row['metric']}{{{labels}}}" if labels else row['metric']
+            if 'value' in row:
+                table.insert('', 'end', values=(series, row['value'], '', '', '', ''))
+            else:
+                table.insert('', 'end', values=(series, row['count']) + tuple(
+                    f"{row[key] * 1000:.1f} ms" for key in ('p50', 'p95', 'p99', 'max')))
+        window.after(1000, refresh)
+
+    refresh()
+
+
 def create_gui():
     root = tk.Tk()
     root.title("Crypto Monitoring Tool")
     settings = load_settings()  # Load existing settings
+    metrics.start_from_settings()  # Serves /metrics when metrics_port is set
+    profiler.start_from_env()  # BOT_PROFILE=<minutes> profiles the session from startup
 
     def create_dropdown(label_text, values, default):
         tk.Label(root, text=label_text).pack()
@@ -166,6 +231,7 @@ def create_gui():
 
     def save_settings_gui():
         """Save updated settings using common.py's save_settings function"""
+        settings.update(load_settings())  # Start from the cached file so other writers' keys survive
         settings['symbol'] = symbol_entry.get()
         settings['interval'] = interval_var.get()
         settings['market_type'] = market_type_var.get()
@@ -180,10 +246,29 @@ def create_gui():
               command=lambda: start_monitoring(symbol_entry.get(), interval_var.get(), market_type_var.get())).pack()
     tk.Button(root, text="Stop Monitoring", command=stop_monitoring).pack()
     tk.Button(root, text="Save Settings", command=save_settings_gui).pack()  # Save settings button
+    tk.Button(root, text="Metrics", command=lambda: open_metrics_panel(root)).pack()
+
+    profile_text = tk.StringVar(value="Stop Profiling" if profiler.is_running() else "Start Profiling")
+
+    def toggle_profiling():
+        """Sample the monitor and executor threads until pressed again, then write a flame-graph profile."""
+        path = profiler.toggle()
+        if path:
+            gui_logger.info(f"Profile written to {path}")
+        profile_text.set("Stop Profiling" if profiler.is_running() else "Start Profiling")
+
+    def refresh_profiling():
+        # A timed (BOT_PROFILE) session ends by itself
+        profile_text.set("Stop Profiling" if profiler.is_running() else "Start Profiling")
+        root.after(1000, refresh_profiling)
+
+    tk.Button(root, textvariable=profile_text, command=toggle_profiling).pack()
+    refresh_profiling()
 
     gui_logger.debug("GUI created and ready.")
     root.mainloop()
 
 
 if __name__ == "__main__":
+    configure_logging()
     create_gui()
@@ -1,517 +1,312 @@
-import pyautogui
+import argparse
+import json
+import os
 import time
+from threading import Lock
 import common
-from common import settings_file
 import logging
-
-# Configure logging to display logs in the terminal
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+import metrics
 
 # Get the logger for hotkey actions
 hotkey_logger = logging.getLogger("hotkey")
 
-# Global variable to store the default amount for the session
-DEFAULT_AMOUNT = None
-
+SEQUENCES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hotkey_sequences.json')
+MIN_DELAY = 0.05  # Shortest delay calibration will set for a step
+CALIBRATION_MARGIN = 1.5  # Tuned delay = slowest measured UI response * margin
+POLL_INTERVAL = 0.01  # Seconds between screenshots while waiting for the UI in calibration
+
+
+# Function to load the point and sequence layout
+def load_layout(path=SEQUENCES_FILE):
+    with open(path, 'r') as file:
+        return json.load(file)
+
+
+# Function to save the point and sequence layout
+def save_layout(layout, path=SEQUENCES_FILE):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as file:
+        json.dump(layout, file, indent=4)
+    os.replace(temp_path, path)
+
+
+class FakeBackend:
+    """
+    Stand-in for pyautogui that records calls instead of moving the mouse.
+
+    response_time is how long the fake UI takes to change after an input, so
+    calibration can be exercised without a screen.
+    """
+
+    def __init__(self, response_time=0.0, clock=time.perf_counter):
+        self.calls = []
+        self.response_time = response_time
+        self.clock = clock
+        self.changed_at = None
+        self.frame = 0
+        self.cursor = (0, 0)
+        self.PAUSE = 0
+
+    def _input(self, *call):
+        self.calls.append(call)
+        self.changed_at = self.clock() + self.response_time
+
+    def click(self, x, y):
+        self.cursor = (x, y)
+        self._input('click', x, y)
+
+    def doubleClick(self, x, y):
+        self.cursor = (x, y)
+        self._input('doubleClick', x, y)
+
+    def write(self, text):
+        self._input('write', text)
+
+    def hotkey(self, *keys):
+        self._input('hotkey', *keys)
+
+    def position(self):
+        return self.cursor
+
+    def screenshot(self, region=None):
+        if self.changed_at is not None and self.clock() >= self.changed_at:
+            self.frame += 1
+            self.changed_at = None
+        return self.frame
+
+
+def _frame_bytes(image):
+    return image.tobytes() if hasattr(image, 'tobytes') else image
+
+
+class ActionEngine:
+    """
+    Runs the order-entry click sequences described in hotkey_sequences.json.
+
+    A sequence is a list of steps (click, double_click, write, hotkey) against
+    named screen points, each followed by its own delay. Every step is timed.
+    In calibration mode the engine watches the screen after each input and
+    records how long the UI actually took to respond; calibrate() turns those
+    measurements into shorter delays and saves them to the layout.
+    """
+
+    def __init__(self, layout=None, backend=None, sleep=time.sleep, clock=time.perf_counter, path=SEQUENCES_FILE):
+        self.path = path
+        self.layout = layout if layout is not None else load_layout(path)
+        self.backend = backend
+        self.sleep = sleep
+        self.clock = clock
+        self.lock = Lock()  # One sequence on screen at a time
+        self.last_timings = []
+        self.step_timings = {}  # (sequence, step index) -> list of seconds
+
+    def _get_backend(self):
+        if self.backend is None:
+            import pyautogui
+            # The delays in the layout are the only waits; pyautogui's own 0.1 s pause after every call is not needed
+            pyautogui.PAUSE = 0
+            self.backend = pyautogui
+        return self.backend
+
+    def _point(self, step):
+        return tuple(self.layout['points'][step['target']])
+
+    def _perform(self, backend, step, params):
+        action = step['action']
+        if action == 'click':
+            backend.click(*self._point(step))
+        elif action == 'double_click':
+            backend.doubleClick(*self._point(step))
+        elif action == 'write':
+            # Double-click selects the field's current text so the write replaces it
+            backend.doubleClick(*self._point(step))
+            backend.write(str(params[step['value']]))
+        elif action == 'hotkey':
+            backend.hotkey(*step['keys'])
+        else:
+            raise ValueError(f"Unknown action: {action}")
+
+    def _skip(self, step, params):
+        if step.get('optional') and params.get(step['value']) is None:
+            return True
+        return step.get('unless') is not None and params.get(step['unless']) is not None
+
+    def _wait_for_response(self, backend, region, before, limit):
+        started = self.clock()
+        while self.clock() - started < limit:
+            if _frame_bytes(backend.screenshot(region=region)) != before:
+                return self.clock() - started
+            self.sleep(POLL_INTERVAL)
+        return None
+
+    def run(self, name, calibrate=False, **params):
+        """Run one sequence; returns the measured UI response per step when calibrating, else True/False."""
+        steps = self.layout['sequences'][name]
+        # Check every value up front so an invalid order never leaves the UI half-filled
+        for step in steps:
+            if step['action'] == 'write' and not step.get('optional') and params.get(step['value']) is None:
+                hotkey_logger.info(f"Invalid {step['value']}. {name} not executed.")
+                return False
+        timings = []
+        responses = {}
+        with self.lock:
+            started = self.clock()
+            try:
+                backend = self._get_backend()  # pyautogui is imported here, so a missing display fails the run
+                for index, step in enumerate(steps):
+                    if self._skip(step, params):
+                        continue
+                    step_started = self.clock()
+                    # An optional [left, top, width, height] watch region keeps calibration screenshots small
+                    region = tuple(step['watch']) if step.get('watch') else None
+                    before = _frame_bytes(backend.screenshot(region=region)) if calibrate else None
+                    self._perform(backend, step, params)
+                    if calibrate:
+                        responses[index] = self._wait_for_response(backend, region, before, step['delay'])
+                        self.sleep(MIN_DELAY)
+                    else:
+                        self.sleep(step['delay'])
+                    elapsed = self.clock() - step_started
+                    timings.append({'step': index, 'action': step['action'], 'target': step.get('target'),
+                                    'seconds': elapsed})
+                    self.step_timings.setdefault((name, index), []).append(elapsed)
+                    hotkey_logger.debug(f"{name} step {index} {step['action']} {step.get('target', '')}: "
+                                        f"{elapsed * 1000:.0f} ms")
+            except Exception as e:
+                hotkey_logger.error(f"An error occurred during {name}: {e}")
+                return False
+            finally:
+                self.last_timings = timings
+            hotkey_logger.info(f"{name} executed in {self.clock() - started:.2f} s ({len(timings)} steps).")
+            if not calibrate:
+                metrics.observe(metrics.STAGE_SECONDS, self.clock() - started, stage='hotkey', sequence=name)
+        return responses if calibrate else True
+
+    def calibrate(self, name, runs=3, save=True, **params):
+        """
+        Measure the UI over several runs and tune the sequence's delays down.
+
+        Each delay becomes the slowest observed response times CALIBRATION_MARGIN
+        (never below MIN_DELAY, never above the current delay). Steps where no
+        screen change was seen keep their delay. This places real orders, so run
+        it against a demo account.
+        """
+        measured = {}
+        for _ in range(runs):
+            responses = self.run(name, calibrate=True, **params)
+            if responses is False:
+                return None
+            for index, response in responses.items():
+                measured.setdefault(index, []).append(response)
+
+        tuned = {}
+        for index, responses in measured.items():
+            step = self.layout['sequences'][name][index]
+            if None in responses:
+                continue
+            delay = round(min(step['delay'], max(MIN_DELAY, max(responses) * CALIBRATION_MARGIN)), 3)
+            tuned[index] = (step['delay'], delay)
+            step['delay'] = delay
+        for index, (old, new) in sorted(tuned.items()):
+            hotkey_logger.info(f"{name} step {index}: delay {old} s -> {new} s")
+        if save:
+            save_layout(self.layout, self.path)
+        return tuned
+
+    def timing_summary(self):
+        """Mean and worst duration of every step run so far, keyed by (sequence, step index)."""
+        return {key: {'count': len(values), 'mean': sum(values) / len(values), 'max': max(values)}
+                for key, values in self.step_timings.items()}
+
+
+_engine = None
+_engine_lock = Lock()
+
+
+def get_engine():
+    """Return the shared action engine, loading the layout on first use."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = ActionEngine()
+            hotkey_logger.info("Active. Please make sure the trading application window is focused.")
+        return _engine
+
+
+def _order_params():
+    # Typed into the UI exactly as entered in settings; a blank value counts as missing
+    settings = common.get_settings()
+    return {'amount': settings.get('amount') or None, 'limit_price': settings.get('limit_price') or None}
+
+
+# The operations take the same arguments as the REST gateway's. The trading window already shows the
+# traded pair and the amount is typed as entered in settings, so symbol, market_type and amount are ignored
+# (except the amount of a partial limit close).
 
 # Function to perform a limit sell trade with the required steps
-def limit_sell_trade():
+def limit_sell_trade(symbol=None, market_type=None, amount=None):
     hotkey_logger.info("Limit Sell Trade function called.")
-    try:
-        # Step 1: Click "Open"
-        hotkey_logger.info("Clicking 'Open' button...")
-        pyautogui.moveTo(1615, 262)  # Adjust the coordinates to the "Open" button
-        pyautogui.click()
-        time.sleep(0.1)
-
-        # Step 2: Click "Limit"
-        hotkey_logger.info("Clicking 'Limit' option...")
-        pyautogui.moveTo(1544, 326)  # Adjust the coordinates to the "Limit" option
-        pyautogui.click()
-        time.sleep(0.1)
-
-        # Step 2b: Click "last price"
-        hotkey_logger.info("Clicking 'last price' option...")
-        pyautogui.moveTo(1848, 465)  # Adjust the coordinates to the "Last price" option
-        pyautogui.click()
-        time.sleep(0.1)
-
-        # Step 2c: Click "limit price"
-        hotkey_logger.info("Clicking 'limit price' option...")
-        pyautogui.moveTo(1650, 462)  # Adjust the coordinates to the "limit price" option
-        pyautogui.doubleClick()
-        time.sleep(0.1)
-
-        # Copy the value automatically
-        pyautogui.hotkey('ctrl', 'c')  # Simulates pressing Ctrl+C to copy the selected value
-        time.sleep(0.1)
-
-        # Step 3: Show combined input box for limit price and amount
-        limit_price = int(settings_file.get('limit_price', 0))  # Convert to int if necessary
-        amount = float(settings_file.get('amount', 0))
-
-        # Ensure valid inputs were entered
-        if amount is not None:
-            # Step 4: Double-Click on the limit price input field to select all text (only if limit_price is provided)
-            if limit_price is not None:  # Check if limit_price is provided
-                hotkey_logger.info(f"Entering limit price: {limit_price}")
-                pyautogui.moveTo(1650, 462)  # Adjust the coordinates to the Limit Price input field
-                pyautogui.doubleClick()  # Double-click to select all existing text
-                pyautogui.write(str(limit_price))  # Enter the limit price
-                time.sleep(0.5)
-            else:
-                hotkey_logger.info("Limit price is left blank. Skipping entry for limit price.")
-
-            # Step 5: Double-Click on the amount input field to select all text
-            hotkey_logger.info(f"Entering amount: {amount}")
-            pyautogui.moveTo(1634, 569)  # Adjust the coordinates to the Amount input field
-            pyautogui.doubleClick()      # Double-click to select all existing text
-            pyautogui.write(str(amount))  # Enter the amount
-            time.sleep(0.5)
-
-            # Step 6: Click "Open" button again
-            hotkey_logger.info("Clicking 'Open' button again...")
-            pyautogui.moveTo(1800, 879)  # Adjust the coordinates to the "Open" button
-            pyautogui.click()
-            time.sleep(1)
-
-            # Step 7: Click "Confirm" button
-            hotkey_logger.info("Clicking 'Confirm' button...")
-            # Uncomment and set accurate coordinates for the "Confirm" button
-            pyautogui.moveTo(1046, 797)
-            pyautogui.click()
-            time.sleep(1)
-
-            hotkey_logger.info("Limit sell executed.")
-        else:
-            hotkey_logger.info("Invalid limit price or amount. Trade not executed.")
-    except Exception as e:
-        hotkey_logger.info(f"An error occurred during limit sell: {e}")
+    return get_engine().run('limit_sell', **_order_params())
 
 
 # Function to perform a limit buy trade with the required steps
-def limit_buy_trade():
+def limit_buy_trade(symbol=None, market_type=None, amount=None):
     hotkey_logger.info("Limit Buy Trade function called.")
-    try:
-        # Step 1: Click "Open"
-        hotkey_logger.info("Clicking 'Open' button...")
-        pyautogui.moveTo(1615, 262)  # Adjust the coordinates to the "Open" button
-        pyautogui.click()
-        time.sleep(0.1)
-
-        # Step 2: Click "Limit"
-        hotkey_logger.info("Clicking 'Limit' option...")
-        pyautogui.moveTo(1544, 326)  # Adjust the coordinates to the "Limit" option
-        pyautogui.click()
-        time.sleep(0.1)
-
-        # Step 2b: Click "last price"
-        hotkey_logger.info("Clicking 'last price' option...")
-        pyautogui.moveTo(1848, 465)  # Adjust the coordinates to the "Last price" option
-        pyautogui.click()
-        time.sleep(0.1)
-
-        # Step 2c: Click "limit price"
-        hotkey_logger.info("Clicking 'limit price' option...")
-        pyautogui.moveTo(1650, 462)  # Adjust the coordinates to the "limit price" option
-        pyautogui.doubleClick()
-        time.sleep(0.1)
-
-        # Copy the value automatically
-        pyautogui.hotkey('ctrl', 'c')  # Simulates pressing Ctrl+C to copy the selected value
-        time.sleep(0.1)
-
-        # Step 3: Show combined input box for limit price and amount
-        limit_price, amount = settings_file
-
-        # Ensure valid inputs were entered
-        if amount is not None:
-            # Step 4: Double-Click on the limit price input field to select all text (only if limit_price is provided)
-            if limit_price is not None:  # Check if limit_price is provided
-                hotkey_logger.info(f"Entering limit price: {limit_price}")
-                pyautogui.moveTo(1650, 462)  # Adjust the coordinates to the Limit Price input field
-                pyautogui.doubleClick()      # Double-click to select all existing text
-                pyautogui.write(str(limit_price))  # Enter the limit price
-                time.sleep(0.5)
-            else:
-                hotkey_logger.info("Limit price is left blank. Skipping entry for limit price.")
-
-            # Step 5: Double-Click on the amount input field to select all text
-            hotkey_logger.info(f"Entering amount: {amount}")
-            pyautogui.moveTo(1634, 569)  # Adjust the coordinates to the Amount input field
-            pyautogui.doubleClick()      # Double-click to select all existing text
-            pyautogui.write(str(amount))  # Enter the amount
-            time.sleep(0.5)
-
-            # Step 6: Click "Open" button again
-            hotkey_logger.info("Clicking 'Open' button again...")
-            pyautogui.moveTo(1635, 877)  # Adjust the coordinates to the "Open" button
-            pyautogui.click()
-            time.sleep(1)
-
-            # Step 7: Click "Confirm" button
-            hotkey_logger.info("Clicking 'Confirm' button...")
-            # Uncomment and set accurate coordinates for the "Confirm" button
-            pyautogui.moveTo(1046, 797)
-            pyautogui.click()
-            time.sleep(1)
-
-            hotkey_logger.info("Limit buy executed.")
-        else:
-            hotkey_logger.info("Invalid amount. Trade not executed.")
-    except Exception as e:
-        hotkey_logger.info(f"An error occurred during limit buy: {e}")
+    return get_engine().run('limit_buy', **_order_params())
 
 
 # Function to perform a market buy trade
-def market_buy_trade():
+def market_buy_trade(symbol=None, market_type=None, amount=None):
     hotkey_logger.info("Market Buy Trade function called.")
-    # Load settings from settings.json
-    settings = common.load_settings()
-    try:
-        # Step 1: Click "Open"
-        hotkey_logger.info("Clicking 'Open' button...")
-        pyautogui.moveTo(1615, 262)  # Adjust the coordinates to the "Open" button
-        pyautogui.click()
-        time.sleep(0.1)
-
-        # Step 2: Click "Market"
-        hotkey_logger.info("Clicking 'Market' option...")
-        pyautogui.moveTo(1602, 321)  # Adjust the coordinates to the "Market" option
-        pyautogui.click()
-        time.sleep(0.1)
-
-        # Step 3: Show input box for amount
-        amount = settings.get("amount", None)
-
-        # Ensure valid inputs were entered
-        if amount is not None:
-            # Step 4: Enter the amount without confirmation
-            hotkey_logger.info(f"Entering amount: {amount}")
-            pyautogui.moveTo(1634, 569)  # Adjust the coordinates to the Amount input field
-            pyautogui.doubleClick()      # Double-click to select all existing text
-            pyautogui.write(str(amount))  # Enter the amount
-            time.sleep(0.5)
-
-            # Step 5: Click "Open" button again
-            hotkey_logger.info("Clicking 'Open' button again...")
-            pyautogui.moveTo(1635, 877)  # Adjust the coordinates to the "Open" button
-            pyautogui.click()
-            time.sleep(1)
-
-            # Step 6: Click "Confirm" button
-            hotkey_logger.info("Clicking 'Confirm' button...")
-            # Uncomment and set accurate coordinates for the "Confirm" button
-            pyautogui.moveTo(1046, 797)
-            pyautogui.click()
-            time.sleep(1)
-
-            hotkey_logger.info("Market buy executed.")
-        else:
-            hotkey_logger.info("Invalid amount. Trade not executed.")
-    except Exception as e:
-        hotkey_logger.info(f"An error occurred during market buy: {e}")
+    return get_engine().run('market_buy', amount=_order_params()['amount'])
 
 
 # Function to perform a market sell trade
-def market_sell_trade():
+def market_sell_trade(symbol=None, market_type=None, amount=None):
     hotkey_logger.info("Market Sell Trade function called.")
-    # Load settings from settings.json
-    settings = common.load_settings()
-
-    try:
-        # Step 1: Click "Open"
-        hotkey_logger.info("Clicking 'Open' button...")
-        pyautogui.moveTo(1615, 262)  # Adjust the coordinates to the "Open" button
-        pyautogui.click()
-        time.sleep(0.1)
-
-        # Step 2: Click "Market"
-        hotkey_logger.info("Clicking 'Market' option...")
-        pyautogui.moveTo(1602, 321)  # Adjust the coordinates to the "Market" option
-        pyautogui.click()
-        time.sleep(0.1)
-
-        # Step 3: Show input box for amount
-        amount = settings.get("amount", None)
-
-        # Ensure valid inputs were entered
-        if amount is not None:
-            # Step 4: Enter the amount without confirmation
-            hotkey_logger.info(f"Entering amount: {amount}")
-            pyautogui.moveTo(1634, 569)  # Adjust the coordinates to the Amount input field
-            pyautogui.doubleClick()      # Double-click to select all existing text
-            pyautogui.write(str(amount))  # Enter the amount
-            time.sleep(0.5)
-
-            # Step 5: Click "Open" button again
-            hotkey_logger.info("Clicking 'Open' button again...")
-            pyautogui.moveTo(1800, 879)  # Adjust the coordinates to the "Open" button
-            pyautogui.click()
-            time.sleep(1)
-
-            # Step 6: Click "Confirm" button
-            hotkey_logger.info("Clicking 'Confirm' button...")
-            # Uncomment and set accurate coordinates for the "Confirm" button
-            pyautogui.moveTo(1046, 797)
-            pyautogui.click()
-            time.sleep(1)
-
-            hotkey_logger.info("Market sell executed.")
-        else:
-            hotkey_logger.info("Invalid amount. Trade not executed.")
-    except Exception as e:
-        hotkey_logger.info(f"An error occurred during market sell: {e}")
+    return get_engine().run('market_sell', amount=_order_params()['amount'])
 
 
 # Function to close market order long
-def close_market_buy_trade():
+def close_market_buy_trade(symbol=None, market_type=None):
     hotkey_logger.info("Close Market Buy Trade function called.")
-    try:
-        # Step 1: Click "Close"
-        hotkey_logger.info("Clicking 'Close' button...")
-        pyautogui.moveTo(1785, 262)  # Adjust the coordinates to the "Close" button
-        pyautogui.click()
-        time.sleep(0.1)
-
-        # Step 2: Click "Market"
-        hotkey_logger.info("Clicking 'Market' option...")
-        pyautogui.moveTo(1602, 321)  # Adjust the coordinates to the "Market" option
-        pyautogui.click()
-        time.sleep(0.1)
-
-        # Step 6: Click "100%" button again
-        hotkey_logger.info("Clicking '100%' button...")
-        pyautogui.moveTo(1875, 624)  # Adjust the coordinates to the "100%" button
-        pyautogui.click()
-        time.sleep(1)
-
-        # Step 6b: Click "Close" button again
-        hotkey_logger.info("Clicking 'Close' button again...")
-        pyautogui.moveTo(1797, 744)  # Adjust the coordinates to the "Close" button
-        pyautogui.click()
-        time.sleep(1)
-
-        # Step 7: Click "Confirm" button
-        hotkey_logger.info("Clicking 'Confirm' button...")
-        # Uncomment and set accurate coordinates for the "Confirm" button
-        pyautogui.moveTo(1097, 773)
-        pyautogui.click()
-        time.sleep(1)
-
-        hotkey_logger.info("Close limit sell executed.")
-
-    except Exception as e:
-        hotkey_logger.info(f"An error occurred during close limit sell: {e}")
+    return get_engine().run('close_market_buy')
 
 
 # Function to close market order short
-def close_market_sell_trade():
+def close_market_sell_trade(symbol=None, market_type=None):
     hotkey_logger.info("Close Market sell Trade function called.")
-    try:
-        # Step 1: Click "Close"
-        hotkey_logger.info("Clicking 'Close' button...")
-        pyautogui.moveTo(1785, 262)  # Adjust the coordinates to the "Close" button
-        pyautogui.click()
-        time.sleep(0.1)
-
-        # Step 2: Click "Market"
-        hotkey_logger.info("Clicking 'Market' option...")
-        pyautogui.moveTo(1602, 321)  # Adjust the coordinates to the "Market" option
-        pyautogui.click()
-        time.sleep(0.1)
-
-        # Step 6: Click "100%" button again
-        hotkey_logger.info("Clicking '100%' button...")
-        pyautogui.moveTo(1875, 624)  # Adjust the coordinates to the "100%" button
-        pyautogui.click()
-        time.sleep(1)
-
-        # Step 6b: Click "Close" button again
-        hotkey_logger.info("Clicking 'Close' button again...")
-        pyautogui.moveTo(1615, 744)  # Adjust the coordinates to the "Close" button
-        pyautogui.click()
-        time.sleep(1)
-
-        # Step 7: Click "Confirm" button
-        hotkey_logger.info("Clicking 'Confirm' button...")
-        # Uncomment and set accurate coordinates for the "Confirm" button
-        pyautogui.moveTo(1097, 773)
-        pyautogui.click()
-        time.sleep(1)
-
-        hotkey_logger.info("Close limit sell executed.")
-
-    except Exception as e:
-        hotkey_logger.info(f"An error occurred during close limit sell: {e}")
-
-
-# Function to close limit order long
-def close_limit_buy_trade():
-    hotkey_logger.info("Close Limit Buy Trade function called.")
-    try:
-        # Step 1: Click "Close"
-        hotkey_logger.info("Clicking 'Close' button...")
-        pyautogui.moveTo(1790, 265)  # Adjust the coordinates to the "Close" button
-        pyautogui.click()
-        time.sleep(0.1)  # Wait for UI to respond
-
-        # Step 2: Click "Limit"
-        hotkey_logger.info("Clicking 'Limit' option...")
-        pyautogui.moveTo(1544, 326)  # Adjust the coordinates to the "Limit" option
-        pyautogui.click()
-        time.sleep(0.1)
-
-        # Step 2b: Click "last price"
-        hotkey_logger.info("Clicking 'last price' option...")
-        pyautogui.moveTo(1848, 465)  # Adjust the coordinates to the "Last price" option
-        pyautogui.click()
-        time.sleep(0.1)
-
-        # Step 2c: Click "limit price"
-        hotkey_logger.info("Clicking 'limit price' option...")
-        pyautogui.moveTo(1650, 462)  # Adjust the coordinates to the "limit price" option
-        pyautogui.doubleClick()
-        time.sleep(0.1)
-
-        # Copy the value automatically
-        pyautogui.hotkey('ctrl', 'c')  # Simulates pressing Ctrl+C to copy the selected value
-        time.sleep(0.1)
-
-        # Step 3: Show combined input box for limit price and amount
-        limit_price, amount = settings_file
-
-        # Step 4: Double-Click on the limit price input field to select all text (only if limit_price is provided)
-        if limit_price is not None:  # Check if limit_price is provided
-            hotkey_logger.info(f"Entering limit price: {limit_price}")
-            pyautogui.moveTo(1650, 462)  # Adjust the coordinates to the Limit Price input field
-            pyautogui.doubleClick()  # Double-click to select all existing text
-            pyautogui.write(str(limit_price))  # Enter the limit price
-            time.sleep(0.5)
-        else:
-            hotkey_logger.info("Limit price is left blank. Skipping entry for limit price.")
-
-        # Step 5: Double-Click on the amount input field to select all text (only if amount is provided)
-        if amount is not None:  # Only proceed if amount is provided
-            hotkey_logger.info(f"Entering amount: {amount}")
-            pyautogui.moveTo(1634, 569)  # Adjust the coordinates to the Amount input field
-            pyautogui.doubleClick()  # Double-click to select all existing text
-            pyautogui.write(str(amount))  # Enter the amount
-            time.sleep(0.5)
-        else:
-            hotkey_logger.info("Amount is left blank. Skipping entry for amount.")
-
-        # Step 6: Click "100%" button again
-        if amount is None:  # Check if amount is not provided
-            hotkey_logger.info("Clicking 'Close' button again...")
-            pyautogui.moveTo(1880, 625)  # Adjust the coordinates to the "100%" button
-            pyautogui.click()
-            time.sleep(1)
-
-        # Step 6b: Click "Close" button again
-        hotkey_logger.info("Clicking 'Close' button again...")
-        pyautogui.moveTo(1797, 744)  # Adjust the coordinates to the "Close" button
-        pyautogui.click()
-        time.sleep(1)
-
-        # Step 7: Click "Confirm" button
-        hotkey_logger.info("Clicking 'Confirm' button...")
-        # Uncomment and set accurate coordinates for the "Confirm" button
-        pyautogui.moveTo(1046, 797)
-        pyautogui.click()
-        time.sleep(1)
+    return get_engine().run('close_market_sell')
 
-        hotkey_logger.info("Close limit sell executed.")
 
-    except Exception as e:
-        hotkey_logger.info(f"An error occurred during close limit sell: {e}")
+# Function to close limit order long; without an amount the whole position is closed
+def close_limit_buy_trade(amount=None, symbol=None, market_type=None):
+    hotkey_logger.info("Close Limit Buy Trade function called.")
+    return get_engine().run('close_limit_buy', limit_price=_order_params()['limit_price'], amount=amount)
 
 
-# Function to close limit order short
-def close_limit_sell_trade():
+# Function to close limit order short; without an amount the whole position is closed
+def close_limit_sell_trade(amount=None, symbol=None, market_type=None):
     hotkey_logger.info("Close Limit Sell Trade function called.")
-    try:
-        # Step 1: Click "Close"
-        hotkey_logger.info("Clicking 'Close' button...")
-        pyautogui.moveTo(1790, 265)  # Adjust the coordinates to the "Close" button
-        pyautogui.click()
-        time.sleep(0.1)  # Wait for UI to respond
-
-        # Step 2: Click "Limit"
-        hotkey_logger.info("Clicking 'Limit' option...")
-        pyautogui.moveTo(1544, 326)  # Adjust the coordinates to the "Limit" option
-        pyautogui.click()
-        time.sleep(0.1)
-
-        # Step 2b: Click "last price"
-        hotkey_logger.info("Clicking 'last price' option...")
-        pyautogui.moveTo(1848, 465)  # Adjust the coordinates to the "Last price" option
-        pyautogui.click()
-        time.sleep(0.1)
-
-        # Step 2c: Click "limit price"
-        hotkey_logger.info("Clicking 'limit price' option...")
-        pyautogui.moveTo(1650, 462)  # Adjust the coordinates to the "limit price" option
-        pyautogui.doubleClick()
-        time.sleep(0.1)
-
-        # Copy the value automatically
-        pyautogui.hotkey('ctrl', 'c')  # Simulates pressing Ctrl+C to copy the selected value
-        time.sleep(0.1)
-
-        # Step 3: Show combined input box for limit price and amount
-        limit_price, amount = settings_file
-
-        # Step 4: Double-Click on the limit price input field to select all text (only if limit_price is provided)
-        if limit_price is not None:  # Check if limit_price is provided
-            hotkey_logger.info(f"Entering limit price: {limit_price}")
-            pyautogui.moveTo(1650, 462)  # Adjust the coordinates to the Limit Price input field
-            pyautogui.doubleClick()  # Double-click to select all existing text
-            pyautogui.write(str(limit_price))  # Enter the limit price
-            time.sleep(0.5)
-        else:
-            hotkey_logger.info("Limit price is left blank. Skipping entry for limit price.")
-
-        # Step 5: Double-Click on the amount input field to select all text (only if amount is provided)
-        if amount is not None:  # Only proceed if amount is provided
-            hotkey_logger.info(f"Entering amount: {amount}")
-            pyautogui.moveTo(1634, 569)  # Adjust the coordinates to the Amount input field
-            pyautogui.doubleClick()  # Double-click to select all existing text
-            pyautogui.write(str(amount))  # Enter the amount
-            time.sleep(0.5)
-        else:
-            hotkey_logger.info("Amount is left blank. Skipping entry for amount.")
-
-        # Step 6: Click "100%" button again
-        if amount is None:  # Check if amount is not provided
-            hotkey_logger.info("Clicking 'Close' button again...")
-            pyautogui.moveTo(1880, 625)  # Adjust the coordinates to the "100%" button
-            pyautogui.click()
-            time.sleep(1)
-
-        # Step 6b: Click "Close" button again
-        hotkey_logger.info("Clicking 'Close' button again...")
-        pyautogui.moveTo(1615, 744)  # Adjust the coordinates to the "Close" button
-        pyautogui.click()
-        time.sleep(1)
-
-        # Step 7: Click "Confirm" button
-        hotkey_logger.info("Clicking 'Confirm' button...")
-        # Uncomment and set accurate coordinates for the "Confirm" button
-        pyautogui.moveTo(1046, 797)
-        pyautogui.click()
-        time.sleep(1)
-
-        hotkey_logger.info("Close limit sell executed.")
-
-    except Exception as e:
-        hotkey_logger.info(f"An error occurred during close limit sell: {e}")
-
-
-hotkey_logger.info("Active. Please make sure the trading application window is focused.")
-
-
-
+    return get_engine().run('close_limit_sell', limit_price=_order_params()['limit_price'], amount=amount)
+
+
+if __name__ == "__main__":
+    common.configure_logging()
+    parser = argparse.ArgumentParser(description="Run or calibrate a hotkey sequence.")
+    parser.add_argument("command", choices=["run", "calibrate", "list"])
+    parser.add_argument("sequence", nargs="?")
+    parser.add_argument("--runs", type=int, default=3, help="Calibration runs")
+    parser.add_argument("--fake", action="store_true", help="Use the fake backend instead of pyautogui")
+    args = parser.parse_args()
+
+    engine = ActionEngine(backend=FakeBackend() if args.fake else None)
+    if args.command == "list":
+        for name, steps in engine.layout['sequences'].items():
+            print(f"{name}: {len(steps)} steps, {sum(step['delay'] for step in steps):.2f} s of delays")
+    elif args.command == "calibrate":
+        engine.calibrate(args.sequence, args.runs, **_order_params())
+    else:
+        engine.run(args.sequence, **_order_params())
+        for timing in engine.last_timings:
+            print(timing)
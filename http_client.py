@@ -0,0 +1,117 @@
+import logging
+import random
+import time
+from threading import Lock
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+http_logger = logging.getLogger("http_client")
+
+# Defaults for every Binance REST call; override with configure()
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.25  # Seconds before the first retry
+BACKOFF_MAX = 4.0
+POOL_SIZE = 10
+
+_session = None
+_session_lock = Lock()
+endpoint_timings = {}  # endpoint -> {'count', 'errors', 'total', 'max', 'last'} in seconds
+_timings_lock = Lock()
+
+
+def configure(connect_timeout=None, read_timeout=None, max_retries=None, backoff_base=None, backoff_max=None,
+              pool_size=None):
+    """Change the shared client settings; a new pool size takes effect on the next session."""
+    global CONNECT_TIMEOUT, READ_TIMEOUT, MAX_RETRIES, BACKOFF_BASE, BACKOFF_MAX, POOL_SIZE, _session
+    CONNECT_TIMEOUT = connect_timeout if connect_timeout is not None else CONNECT_TIMEOUT
+    READ_TIMEOUT = read_timeout if read_timeout is not None else READ_TIMEOUT
+    MAX_RETRIES = max_retries if max_retries is not None else MAX_RETRIES
+    BACKOFF_BASE = backoff_base if backoff_base is not None else BACKOFF_BASE
+    BACKOFF_MAX = backoff_max if backoff_max is not None else BACKOFF_MAX
+    if pool_size is not None and pool_size != POOL_SIZE:
+        POOL_SIZE = pool_size
+        with _session_lock:
+            _session = None
+
+
+def get_session():
+    """Return the process-wide keep-alive session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+
+def backoff_delay(attempt):
+    """Full-jitter exponential backoff for the given retry attempt (1-based)."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1)))
+
+
+def _record(endpoint, elapsed, failed):
+    with _timings_lock:
+        stats = endpoint_timings.setdefault(endpoint, {'count': 0, 'errors': 0, 'total': 0.0, 'max': 0.0, 'last': 0.0})
+        stats['count'] += 1
+        stats['errors'] += failed
+        stats['total'] += elapsed
+        stats['max'] = max(stats['max'], elapsed)
+        stats['last'] = elapsed
+    metrics.observe(metrics.HTTP_SECONDS, elapsed, endpoint=endpoint)
+    metrics.inc(metrics.HTTP_REQUESTS, endpoint=endpoint, outcome='error' if failed else 'ok')
+
+
+def get_endpoint_timings():
+    """Return a snapshot of per-endpoint timing with the mean added."""
+    with _timings_lock:
+        return {
+            endpoint: dict(stats, mean=stats['total'] / stats['count'] if stats['count'] else 0.0)
+            for endpoint, stats in endpoint_timings.items()
+        }
+
+
+def request_json(method, url, params=None, endpoint=None, retries=None, **kwargs):
+    """
+    Send a request over the shared session and return the decoded JSON body.
+
+    Connection errors, timeouts, 429 and 5xx responses are retried with jittered
+    exponential backoff; other HTTP errors raise immediately. The last error is
+    re-raised once retries are exhausted.
+    """
+    endpoint = endpoint or url.split('?')[0]
+    retries = MAX_RETRIES if retries is None else retries
+    kwargs.setdefault('timeout', (CONNECT_TIMEOUT, READ_TIMEOUT))
+    session = get_session()
+
+    attempt = 0
+    while True:
+        attempt += 1
+        started = time.perf_counter()
+        try:
+            response = session.request(method, url, params=params, **kwargs)
+            response.raise_for_status()
+            data = response.json()
+        except requests.RequestException as e:
+            _record(endpoint, time.perf_counter() - started, True)
+            status = e.response.status_code if e.response is not None else None
+            retryable = status is None or status == 429 or status >= 500
+            if not retryable or attempt > retries:
+                raise
+            delay = backoff_delay(attempt)
+            http_logger.warning(f"{method} {endpoint} failed ({e}); retry {attempt}/{retries} in {delay:.2f}s")
+            time.sleep(delay)
+        else:
+            _record(endpoint, time.perf_counter() - started, False)
+            return data
+
+
+def get_json(url, params=None, endpoint=None, retries=None, **kwargs):
+    return request_json('GET', url, params=params, endpoint=endpoint, retries=retries, **kwargs)
@@ -0,0 +1,169 @@
+import atexit
+import logging
+import queue
+import sqlite3
+import sys
+from threading import Thread, Lock
+
+logger = logging.getLogger("journal")
+
+JOURNAL_FILE = "trade_journal.db"
+EXCEL_FILE = "trade_log.xlsx"
+
+# Journal column -> column name used in the Excel trade log and by Projector/Dictator
+TRADE_COLUMNS = {
+    "trade_id": "Trade ID",
+    "timestamp": "Timestamp",
+    "symbol": "Symbol",
+    "trade_type": "Trade Type",
+    "price": "Price",
+    "market_type": "Market Type",
+    "status": "Status",
+    "market_condition": "Market Condition",
+    "ma_200": "ma_200",
+    "ma_21": "ma_21",
+    "ma_7": "ma_7",
+    "ma_5": "ma_5",
+}
+
+_CREATE_TABLE = (
+    "CREATE TABLE IF NOT EXISTS trades ("
+    "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+    "trade_id TEXT, timestamp TEXT, symbol TEXT, trade_type TEXT, price REAL, market_type TEXT, "
+    "status TEXT, market_condition TEXT, ma_200 REAL, ma_21 REAL, ma_7 REAL, ma_5 REAL)"
+)
+_INSERT_TRADE = (
+    f"INSERT INTO trades ({', '.join(TRADE_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in TRADE_COLUMNS)})"
+)
+
+
+def _connect(path):
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")  # WAL keeps commits durable across crashes of the process
+    connection.execute(_CREATE_TABLE)
+    connection.execute("CREATE INDEX IF NOT EXISTS trades_trade_id ON trades (trade_id)")
+    connection.commit()
+    return connection
+
+
+class TradeJournal:
+    """
+    Append-only trade journal in SQLite (WAL mode).
+
+    append() only enqueues the row, so logging a trade costs the same no matter
+    how long the history is. A writer thread drains whatever has accumulated and
+    commits it in one transaction (group commit). append(..., wait=True) returns
+    once the row is committed and raises the error if the commit failed.
+    """
+
+    def __init__(self, path=JOURNAL_FILE, max_batch=500):
+        self.path = path
+        self.max_batch = max_batch
+        self.pending = queue.Queue()
+        _connect(path).close()  # Create the schema up front so readers never see a missing table
+        self.writer = Thread(target=self._write_loop, name="journal-writer", daemon=True)
+        self.writer.start()
+
+    def append(self, trade, wait=False):
+        """Queue one trade row (keys from TRADE_COLUMNS); wait=True blocks until it is committed."""
+        errors = [] if wait else None  # The writer reports a failed commit here
+        self.pending.put((tuple(trade.get(column) for column in TRADE_COLUMNS), errors))
+        if wait:
+            self.flush()
+            if errors:
+                raise errors[0]
+
+    def flush(self):
+        """Block until every queued row has been committed."""
+        self.pending.join()
+
+    def _write_loop(self):
+        connection = _connect(self.path)
+        while True:
+            batch = [self.pending.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with connection:
+                    connection.executemany(_INSERT_TRADE, [row for row, _ in batch])
+            except Exception as e:
+                logger.error(f"Error writing {len(batch)} trade(s) to journal: {e}")
+                for _, errors in batch:
+                    if errors is not None:
+                        errors.append(e)
+            finally:
+                for _ in batch:
+                    self.pending.task_done()
+
+    def read_trades(self, trade_ids=None):
+        """Return the journal (or only the rows of trade_ids) as a DataFrame with the trade log column names."""
+        import pandas as pd
+
+        columns = ', '.join(TRADE_COLUMNS)
+        connection = _connect(self.path)
+        try:
+            if trade_ids is None:
+                df = pd.read_sql_query(f"SELECT {columns} FROM trades ORDER BY id", connection)
+            else:
+                # Looked up through the trade_id index, a batch at a time to stay under SQLite's variable limit
+                trade_ids = list(dict.fromkeys(trade_ids))
+                chunks = [trade_ids[start:start + 500] for start in range(0, len(trade_ids), 500)] or [[]]
+                df = pd.concat([pd.read_sql_query(f"SELECT id, {columns} FROM trades "
+                                                  f"WHERE trade_id IN ({', '.join('?' * len(chunk))})",
+                                                  connection, params=chunk) for chunk in chunks])
+                df = df.sort_values("id", ignore_index=True).drop(columns="id")
+        finally:
+            connection.close()
+        return df.rename(columns=TRADE_COLUMNS)
+
+    def export_excel(self, path=EXCEL_FILE):
+        """Write the journal to an Excel workbook in the original trade log layout."""
+        self.flush()
+        df = self.read_trades()
+        df.to_excel(path, index=False, sheet_name="Trade Log")
+        logger.info(f"Exported {len(df)} trade rows to {path}")
+        return path
+
+    def import_excel(self, path=EXCEL_FILE):
+        """Append the rows of an existing Excel trade log to the journal."""
+        import pandas as pd
+
+        df = pd.read_excel(path, sheet_name="Trade Log")
+        reverse_columns = {name: column for column, name in TRADE_COLUMNS.items()}
+        df = df.rename(columns=reverse_columns)
+        for trade in df.astype(object).where(df.notna(), None).to_dict("records"):
+            self.append(trade)
+        self.flush()
+        logger.info(f"Imported {len(df)} trade rows from {path}")
+        return len(df)
+
+
+_journal = None
+_journal_lock = Lock()
+
+
+def get_journal(path=JOURNAL_FILE):
+    """Return the shared journal, opening it on first use."""
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = TradeJournal(path)
+            atexit.register(_journal.flush)
+        return _journal
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    command = sys.argv[1] if len(sys.argv) > 1 else "export"
+    target = sys.argv[2] if len(sys.argv) > 2 else EXCEL_FILE
+    if command == "export":
+        get_journal().export_excel(target)
+    elif command == "import":
+        get_journal().import_excel(target)
+    else:
+        print("Usage: python journal.py [export|import] [trade_log.xlsx]")
@@ -0,0 +1,242 @@
+import logging
+import sqlite3
+import sys
+from threading import RLock
+
+from journal import JOURNAL_FILE, get_journal
+
+logger = logging.getLogger("ledger")
+
+LOSS_FILE = "loss_trades.xlsx"
+LOSS_COLUMNS = ["Trade ID", "Trade Type", "Open Price", "Close Price", "Profit/Loss", "Status"]
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS ledger_open ("
+    "trade_id TEXT PRIMARY KEY, symbol TEXT, trade_type TEXT, price REAL)",
+    "CREATE TABLE IF NOT EXISTS ledger_closed ("
+    "trade_id TEXT PRIMARY KEY, symbol TEXT, trade_type TEXT, open_price REAL, close_price REAL, "
+    "profit_loss REAL, status TEXT)",
+    "CREATE TABLE IF NOT EXISTS ledger_totals ("
+    "symbol TEXT PRIMARY KEY, profit_loss REAL, closed INTEGER, wins INTEGER, losses INTEGER)",
+)
+# Adds one close to its symbol's running totals
+_ADD_TOTALS = (
+    "INSERT INTO ledger_totals VALUES (?, ?, 1, ?, ?) ON CONFLICT(symbol) DO UPDATE SET "
+    "profit_loss = profit_loss + excluded.profit_loss, closed = closed + 1, wins = wins + excluded.wins, "
+    "losses = losses + excluded.losses"
+)
+# Recomputes every symbol's totals from the closed trades
+_SUM_TOTALS = (
+    "INSERT INTO ledger_totals SELECT symbol, SUM(profit_loss), COUNT(*), SUM(profit_loss > 0), "
+    "SUM(profit_loss < 0) FROM ledger_closed GROUP BY symbol"
+)
+
+
+def trade_profit_loss(trade_type, open_price, close_price):
+    """Profit/loss of one round trip, or None for trade types the ledger doesn't price."""
+    if trade_type == "market_buy":
+        return close_price - open_price
+    if trade_type == "market_sell":
+        return open_price - close_price
+    return None
+
+
+class PnLLedger:
+    """
+    Running profit/loss ledger, updated in O(1) as trades open and close.
+
+    Cumulative and per-symbol totals and win rate are kept in memory and in a
+    totals table that each close updates along with its own row, so opening the
+    ledger reads one row per symbol rather than the full history. The loss
+    trades are read from the closed trades when asked for.
+    """
+
+    def __init__(self, path=JOURNAL_FILE):
+        self.lock = RLock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        with self.connection:
+            for statement in _SCHEMA:
+                self.connection.execute(statement)
+            # Ledgers written before the totals table existed get their totals summed once
+            if not self.connection.execute("SELECT 1 FROM ledger_totals LIMIT 1").fetchone():
+                self.connection.execute(_SUM_TOTALS)
+        self.loss_trades_version = 0
+        self._load()
+
+    def _load(self):
+        self.open_trades = {}
+        for trade_id, symbol, trade_type, price in self.connection.execute(
+                "SELECT trade_id, symbol, trade_type, price FROM ledger_open"):
+            self.open_trades[trade_id] = {"symbol": symbol, "trade_type": trade_type, "price": price}
+        self.by_symbol = {}
+        for symbol, profit_loss, closed, wins, losses in self.connection.execute(
+                "SELECT symbol, profit_loss, closed, wins, losses FROM ledger_totals ORDER BY rowid"):
+            self.by_symbol[symbol] = {"profit_loss": profit_loss, "closed": closed, "wins": wins, "losses": losses}
+        self.total_profit_loss = sum(totals["profit_loss"] for totals in self.by_symbol.values())
+        self.closed_count = sum(totals["closed"] for totals in self.by_symbol.values())
+        self.wins = sum(totals["wins"] for totals in self.by_symbol.values())
+        self.loss_count = sum(totals["losses"] for totals in self.by_symbol.values())
+
+    def refresh(self):
+        """Re-read the open trades and totals, e.g. in another process than the one recording trades."""
+        with self.lock:
+            losses = self.loss_count
+            self._load()
+            if self.loss_count != losses:
+                self.loss_trades_version += 1
+
+    def _apply_close(self, symbol, profit_loss):
+        self.total_profit_loss += profit_loss
+        self.closed_count += 1
+        self.wins += profit_loss > 0
+        self.loss_count += profit_loss < 0
+        totals = self.by_symbol.setdefault(symbol, {"profit_loss": 0.0, "closed": 0, "wins": 0, "losses": 0})
+        totals["profit_loss"] += profit_loss
+        totals["closed"] += 1
+        totals["wins"] += profit_loss > 0
+        totals["losses"] += profit_loss < 0
+        if profit_loss < 0:
+            self.loss_trades_version += 1
+
+    def record_open(self, trade_id, symbol, trade_type, price):
+        with self.lock:
+            self.open_trades[trade_id] = {"symbol": symbol, "trade_type": trade_type, "price": price}
+            with self.connection:
+                self.connection.execute("INSERT OR REPLACE INTO ledger_open VALUES (?, ?, ?, ?)",
+                                        (trade_id, symbol, trade_type, price))
+
+    def record_close(self, trade_id, close_price):
+        """Settle an open trade; returns its profit/loss, or None if it can't be priced."""
+        with self.lock:
+            open_trade = self.open_trades.pop(trade_id, None)
+            if open_trade is None:
+                logger.warning(f"Trade ID {trade_id} does not have a matching open entry.")
+                return None
+
+            trade_type = open_trade["trade_type"]
+            profit_loss = trade_profit_loss(trade_type, open_trade["price"], close_price)
+            with self.connection:
+                self.connection.execute("DELETE FROM ledger_open WHERE trade_id = ?", (trade_id,))
+                if profit_loss is None:
+                    logger.warning(f"Unrecognized trade type {trade_type} for Trade ID {trade_id}.")
+                    return None
+                status = "Profit" if profit_loss > 0 else "Loss"
+                row = (trade_id, open_trade["symbol"], trade_type, open_trade["price"], close_price, profit_loss,
+                       status)
+                inserted = self.connection.execute("INSERT OR IGNORE INTO ledger_closed VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                                   row).rowcount
+                if inserted:
+                    self.connection.execute(_ADD_TOTALS, (open_trade["symbol"], profit_loss, profit_loss > 0,
+                                                          profit_loss < 0))
+            if not inserted:
+                logger.warning(f"Trade ID {trade_id} was already settled; totals left unchanged.")
+                return None
+            self._apply_close(open_trade["symbol"], profit_loss)
+            logger.info(f"Trade ID {trade_id}: {status} ({profit_loss:.2f})")
+            return profit_loss
+
+    def summary(self):
+        with self.lock:
+            return {
+                "closed_trades": self.closed_count,
+                "open_trades": len(self.open_trades),
+                "total_profit_loss": self.total_profit_loss,
+                "win_rate": self.wins / self.closed_count if self.closed_count else 0.0,
+                "loss_trades": self.loss_count,
+                "by_symbol": {symbol: {"profit_loss": totals["profit_loss"], "closed": totals["closed"],
+                                       "wins": totals["wins"]} for symbol, totals in self.by_symbol.items()},
+            }
+
+    def loss_trades_frame(self, after=0):
+        """The loss trades in closing order, or only those recorded after the given closed-row ID."""
+        import pandas as pd
+
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT rowid, trade_id, trade_type, open_price, close_price, profit_loss, status FROM ledger_closed "
+                "WHERE profit_loss < 0 AND rowid > ? ORDER BY rowid", (after,)).fetchall()
+        frame = pd.DataFrame([row[1:] for row in rows], columns=LOSS_COLUMNS)
+        frame.attrs["last_rowid"] = rows[-1][0] if rows else after
+        return frame
+
+    def export_loss_trades(self, path=LOSS_FILE):
+        loss_df = self.loss_trades_frame()
+        loss_df.to_excel(path, index=False, sheet_name="Loss Trades")
+        logger.info(f"Loss trades saved to {path}")
+        return path
+
+    def rebuild(self, trades=None):
+        """Recompute the ledger from the full trade log (the journal by default)."""
+        import numpy as np
+
+        if trades is None:
+            journal = get_journal()
+            journal.flush()
+            trades = journal.read_trades()
+
+        opened = trades[trades["Status"] == "Opened"].drop_duplicates("Trade ID")
+        closed = trades[trades["Status"] == "Closed"].drop_duplicates("Trade ID")
+        # Like the original report, only IDs with exactly one open and one close row are settled
+        counts = trades["Trade ID"].value_counts()
+        pairs = opened.merge(closed[["Trade ID", "Price"]], on="Trade ID", suffixes=("", " Close"))
+        pairs = pairs[pairs["Trade ID"].map(counts).values == 2]
+        trade_type = pairs["Trade Type"].values
+        profit_loss = np.where(trade_type == "market_buy", pairs["Price Close"] - pairs["Price"],
+                               np.where(trade_type == "market_sell", pairs["Price"] - pairs["Price Close"], np.nan))
+        priced = ~np.isnan(profit_loss)
+        still_open = opened[~opened["Trade ID"].isin(closed["Trade ID"])]
+
+        closed_rows = list(zip(
+            pairs["Trade ID"][priced], pairs["Symbol"][priced], trade_type[priced], pairs["Price"][priced],
+            pairs["Price Close"][priced], profit_loss[priced], np.where(profit_loss[priced] > 0, "Profit", "Loss")
+        ))
+        open_rows = list(zip(still_open["Trade ID"], still_open["Symbol"], still_open["Trade Type"],
+                             still_open["Price"]))
+        with self.lock:
+            with self.connection:
+                self.connection.execute("DELETE FROM ledger_open")
+                self.connection.execute("DELETE FROM ledger_closed")
+                self.connection.execute("DELETE FROM ledger_totals")
+                self.connection.executemany("INSERT INTO ledger_open VALUES (?, ?, ?, ?)", open_rows)
+                self.connection.executemany("INSERT INTO ledger_closed VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                            [tuple(v.item() if hasattr(v, "item") else v for v in row)
+                                             for row in closed_rows])
+                self.connection.execute(_SUM_TOTALS)
+            self.loss_trades_version += 1
+            self._load()
+        logger.info(f"Ledger rebuilt: {self.closed_count} closed, {len(self.open_trades)} open trades")
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_ledger = None
+_ledger_lock = RLock()
+
+
+def get_ledger(path=JOURNAL_FILE):
+    """Return the shared ledger, opening it on first use."""
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = PnLLedger(path)
+        return _ledger
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    command = sys.argv[1] if len(sys.argv) > 1 else "summary"
+    if command == "rebuild":
+        get_ledger().rebuild()
+    elif command == "export":
+        get_ledger().export_loss_trades(sys.argv[2] if len(sys.argv) > 2 else LOSS_FILE)
+    else:
+        print(get_ledger().summary())
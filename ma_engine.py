@@ -0,0 +1,114 @@
+import math
+
+DEFAULT_MA_PERIODS = (5, 7, 21, 200)  # The periods determine_market_condition compares
+
+
+class _RunningSum:
+    """Running sum over a ring buffer of closed candles, with Neumaier compensation."""
+
+    def __init__(self, size):
+        self.size = size
+        self.buffer = [0.0] * size
+        self.position = 0
+        self.count = 0
+        self.total = 0.0
+        self.compensation = 0.0
+
+    def _add(self, value):
+        total = self.total + value
+        if abs(self.total) >= abs(value):
+            self.compensation += (self.total - total) + value
+        else:
+            self.compensation += (value - total) + self.total
+        self.total = total
+
+    def push(self, value):
+        if self.size == 0:
+            return
+        if self.count == self.size:
+            self._add(-self.buffer[self.position])
+        else:
+            self.count += 1
+        self.buffer[self.position] = value
+        self.position = (self.position + 1) % self.size
+        self._add(value)
+
+    def value(self):
+        return self.total + self.compensation
+
+
+class MovingAverageEngine:
+    """
+    Incremental simple moving averages for a fixed set of periods.
+
+    Each period keeps the sum of its last (period - 1) closed candles; the value
+    of the still-forming candle is added on read, so both a candle close and a
+    live price change cost O(1) per period, and the result matches
+    prices['close'].rolling(window=period).mean() on the last row.
+    """
+
+    def __init__(self, periods=DEFAULT_MA_PERIODS):
+        self.periods = tuple(sorted(set(periods)))
+        self.sums = {period: _RunningSum(period - 1) for period in self.periods}
+        self.closed_count = 0
+        self.live_timestamp = None
+        self.live_close = None
+
+    @property
+    def ready(self):
+        return self.live_timestamp is not None
+
+    def reset(self):
+        self.__init__(self.periods)
+
+    def seed(self, timestamps, closes):
+        """Rebuild state from a full history whose last entry is the forming candle."""
+        self.reset()
+        if len(closes) == 0:
+            return
+        for close in closes[:-1]:
+            self.close_candle(float(close))
+        self.live_timestamp = timestamps[-1]
+        self.live_close = float(closes[-1])
+
+    def close_candle(self, close):
+        for running_sum in self.sums.values():
+            running_sum.push(close)
+        self.closed_count += 1
+
+    def update(self, timestamp, close):
+        """Apply a tick for the forming candle; a newer timestamp closes the previous one."""
+        if self.live_timestamp is not None and timestamp != self.live_timestamp:
+            self.close_candle(self.live_close)
+        self.live_timestamp = timestamp
+        self.live_close = float(close)
+
+    def sync(self, timestamps, closes):
+        """
+        Bring the engine up to date with the tail of a kline history.
+
+        Only the candles from the current forming one onwards are applied; if the
+        forming candle is no longer in the history the engine is reseeded.
+        """
+        if not self.ready:
+            self.seed(timestamps, closes)
+            return
+        for back in range(1, len(timestamps) + 1):
+            if timestamps[-back] == self.live_timestamp:
+                break
+        else:
+            self.seed(timestamps, closes)
+            return
+        # The forming candle may have moved on since the last tick, so take its final close
+        self.live_close = float(closes[-back])
+        for index in range(len(timestamps) - back + 1, len(timestamps)):
+            self.update(timestamps[index], closes[index])
+
+    def sync_frame(self, prices):
+        self.sync(prices['timestamp'].values, prices['close'].values)
+
+    def value(self, period):
+        """Return the moving average for period, or NaN while history is too short."""
+        if not self.ready or self.closed_count + 1 < period:
+            return math.nan
+        return (self.sums[period].value() + self.live_close) / period
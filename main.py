@@ -0,0 +1,69 @@
+import argparse
+import logging
+import queue
+from threading import Event, Thread
+
+from common import configure_logging, get_settings
+
+main_logger = logging.getLogger("main")
+
+
+# Function to log the pause/resume signals the executor sends while no GUI is listening
+def log_signals(signal_queue):
+    while True:
+        main_logger.info(f"Executor signal: {signal_queue.get()}")
+
+
+# Function to monitor one or more symbols without the GUI until interrupted
+def run_headless(symbols, interval, market_type):
+    import metrics
+    import profiler
+
+    metrics.start_from_settings()  # Serves /metrics when metrics_port is set
+    profiler.start_from_env()  # BOT_PROFILE=<minutes> profiles the session from startup
+
+    signal_queue = queue.Queue()
+    stop_event = Event()
+    if len(symbols) > 1:
+        from multi_monitor import MultiSymbolMonitor
+
+        monitor = MultiSymbolMonitor(symbols, signal_queue, interval, market_type)
+        thread = Thread(target=monitor.run_forever, args=(stop_event,), name="multi-monitor")
+    else:
+        from monitoring import monitor_crypto
+        from position import PositionState
+
+        thread = Thread(target=monitor_crypto, name="monitor",
+                        args=(symbols[0], signal_queue, PositionState(), interval, market_type, stop_event))
+    Thread(target=log_signals, args=(signal_queue,), name="signals", daemon=True).start()
+    thread.start()
+    main_logger.info(f"Monitoring {', '.join(symbols)} with {interval} interval on {market_type} market. "
+                     "Press Ctrl+C to stop.")
+    try:
+        while thread.is_alive():
+            thread.join(0.5)
+    except KeyboardInterrupt:
+        main_logger.info("Stopping monitoring...")
+        stop_event.set()
+        thread.join()
+    if profiler.is_running():
+        profiler.stop()
+
+
+if __name__ == "__main__":
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Start the trading bot with its GUI, or headless.")
+    parser.add_argument("--headless", action="store_true", help="Monitor from the console without the GUI")
+    parser.add_argument("--symbol", default=settings.symbol, help="Symbol, or a comma-separated list")
+    parser.add_argument("--interval", default=settings.interval)
+    parser.add_argument("--market-type", default=settings.market_type, choices=["spot", "futures"])
+    args = parser.parse_args()
+
+    configure_logging()
+    if args.headless:
+        symbols = [symbol.strip() for symbol in args.symbol.split(',') if symbol.strip()]
+        run_headless(symbols, args.interval, args.market_type)
+    else:
+        from gui import create_gui
+
+        create_gui()
@@ -0,0 +1,310 @@
+import argparse
+import bisect
+import logging
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+
+metrics_logger = logging.getLogger("metrics")
+
+# Latency buckets grow by 2^(1/4) (about 19%) from 50 us to a few minutes, so
+# percentiles read from them are within a few percent of the true value
+BUCKET_GROWTH = 2 ** 0.25
+BOUNDS = [50e-6 * BUCKET_GROWTH ** index for index in range(96)]
+QUANTILES = (0.5, 0.95, 0.99)
+DEFAULT_PORT = 9108
+
+STAGE_SECONDS = 'bot_stage_seconds'
+HTTP_SECONDS = 'bot_http_request_seconds'
+HTTP_REQUESTS = 'bot_http_requests_total'
+
+DESCRIPTIONS = {
+    STAGE_SECONDS: 'Time spent in each stage of the monitor loop and trade execution.',
+    HTTP_SECONDS: 'Time per REST request, by endpoint.',
+    HTTP_REQUESTS: 'REST requests sent, by endpoint and outcome.',
+}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Histogram:
+    """Fixed log-spaced buckets with count, sum and max; constant memory however many values are recorded."""
+    __slots__ = ('counts', 'count', 'sum', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BOUNDS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BOUNDS, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """Estimate the q-quantile by interpolating inside the bucket that holds it."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = BOUNDS[index - 1] if index else 0.0
+                upper = BOUNDS[index] if index < len(BOUNDS) else self.max
+                return min(self.max, lower + (upper - lower) * (rank - seen) / bucket_count)
+            seen += bucket_count
+        return self.max
+
+
+def _series_key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+class _Timer:
+    __slots__ = ('registry', 'key', 'started')
+
+    def __init__(self, registry, key):
+        self.registry = registry
+        self.key = key
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry._observe(self.key, time.perf_counter() - self.started)
+        return False
+
+
+class _NullTimer:
+    # Handed out while metrics are disabled: timing a block then costs one attribute check
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    """
+    Latency histograms and counters, keyed by metric name and labels.
+
+    Disabled by default: until enable() is called observe() and inc() return
+    straight away and timer() hands out a shared no-op context manager.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.lock = Lock()
+        self.histograms = {}  # (name, ((label, value), ...)) -> Histogram
+        self.counters = {}  # (name, ((label, value), ...)) -> number
+        self.started = time.time()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.counters.clear()
+            self.started = time.time()
+
+    def observe(self, name, seconds, **labels):
+        if self.enabled:
+            self._observe(_series_key(name, labels), seconds)
+
+    def _observe(self, key, seconds):
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = _series_key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def timer(self, name, **labels):
+        """Context manager recording how long its block took."""
+        if not self.enabled:
+            return NULL_TIMER
+        return _Timer(self, _series_key(name, labels))
+
+    def stage(self, stage):
+        return self.timer(STAGE_SECONDS, stage=stage)
+
+    def snapshot(self):
+        """One row per series: histograms with count, mean, p50/p95/p99 and max in seconds, counters with value."""
+        with self.lock:
+            rows = []
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                row = {'metric': name, 'labels': dict(labels), 'count': histogram.count,
+                       'mean': histogram.sum / histogram.count if histogram.count else 0.0, 'max': histogram.max}
+                for q in QUANTILES:
+                    row[f"p{int(q * 100)}"] = histogram.quantile(q)
+                rows.append(row)
+            for (name, labels), value in sorted(self.counters.items()):
+                rows.append({'metric': name, 'labels': dict(labels), 'value': value})
+        return rows
+
+    def render_prometheus(self):
+        """All series in the Prometheus text exposition format; histograms are exported as summaries."""
+        def series(name, labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return name
+            text = ','.join(f'{key}="{_escape(value)}"' for key, value in pairs)
+            return f"{name}{{{text}}}"
+
+        lines = []
+        with self.lock:
+            for kind, metrics in (('summary', self.histograms), ('counter', self.counters)):
+                names = sorted({name for name, _ in metrics})
+                for name in names:
+                    if name in DESCRIPTIONS:
+                        lines.append(f"# HELP {name} {DESCRIPTIONS[name]}")
+                    lines.append(f"# TYPE {name} {kind}")
+                    for (metric, labels), value in sorted(metrics.items()):
+                        if metric != name:
+                            continue
+                        if kind == 'counter':
+                            lines.append(f"{series(name, labels)} {value}")
+                            continue
+                        for q in QUANTILES:
+                            lines.append(f"{series(name, labels, [('quantile', q)])} {value.quantile(q):.9g}")
+                        lines.append(f"{series(name + '_sum', labels)} {value.sum:.9g}")
+                        lines.append(f"{series(name + '_count', labels)} {value.count}")
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        metrics_logger.debug(format % args)
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/metrics', '/'):
+            self.send_response(404)
+            self.end_headers()
+            return
+        payload = self.server.registry.render_prometheus().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class MetricsServer(ThreadingHTTPServer):
+    """Serves the registry at /metrics for Prometheus (or curl) to scrape."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, registry, host='127.0.0.1', port=DEFAULT_PORT):
+        super().__init__((host, port), MetricsHandler)
+        self.registry = registry
+
+    @property
+    def url(self):
+        host, port = self.server_address
+        return f'http://{host}:{port}/metrics'
+
+    def start_in_background(self):
+        Thread(target=self.serve_forever, name="metrics-server", daemon=True).start()
+        return self
+
+
+_registry = MetricsRegistry()
+_server = None
+_server_lock = Lock()
+
+
+def get_registry():
+    return _registry
+
+
+# Module-level shortcuts onto the shared registry
+def enable():
+    _registry.enable()
+
+
+def disable():
+    _registry.disable()
+
+
+def observe(name, seconds, **labels):
+    _registry.observe(name, seconds, **labels)
+
+
+def inc(name, value=1, **labels):
+    _registry.inc(name, value, **labels)
+
+
+def timer(name, **labels):
+    return _registry.timer(name, **labels)
+
+
+def stage(stage):
+    """Time one stage of the monitor loop or trade execution: with metrics.stage('kline_fetch'): ..."""
+    return _registry.stage(stage)
+
+
+def snapshot():
+    return _registry.snapshot()
+
+
+def start_server(port=DEFAULT_PORT, host='127.0.0.1'):
+    """Enable collection and serve /metrics on host:port; returns the running server."""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = MetricsServer(_registry, host, port).start_in_background()
+            metrics_logger.info(f"Metrics served at {_server.url}")
+    _registry.enable()
+    return _server
+
+
+def start_from_settings():
+    """Start the metrics endpoint when the metrics_port setting is non-zero; returns the server or None."""
+    from common import get_settings
+
+    port = get_settings().metrics_port
+    if not port:
+        return None
+    try:
+        return start_server(port)
+    except OSError as e:
+        metrics_logger.error(f"Could not serve metrics on port {port}: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Measure the overhead of metrics collection.")
+    parser.add_argument("--calls", type=int, default=200000)
+    args = parser.parse_args()
+
+    registry = MetricsRegistry()
+    for enabled in (False, True):
+        registry.enabled = enabled
+        started = time.perf_counter()
+        for _ in range(args.calls):
+            with registry.stage('overhead'):
+                pass
+        per_call = (time.perf_counter() - started) / args.calls
+        print(f"timer {'enabled' if enabled else 'disabled'}: {per_call * 1e9:.0f} ns per block")
@@ -0,0 +1,149 @@
+import argparse
+import hashlib
+import hmac
+import json
+import logging
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from urllib.parse import parse_qsl, urlsplit
+
+logger = logging.getLogger("mock_exchange")
+
+
+class MockExchangeHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _reply(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query))
+        exchange = self.server
+        if url.path.endswith('/ticker/price'):
+            symbol = params.get('symbol')
+            if symbol not in exchange.prices:
+                return self._reply(400, {'code': -1121, 'msg': 'Invalid symbol.'})
+            return self._reply(200, {'symbol': symbol, 'price': f"{exchange.prices[symbol]:.8f}"})
+        if url.path.endswith('/exchangeInfo'):
+            symbols = [params['symbol']] if 'symbol' in params else list(exchange.prices)
+            return self._reply(200, {'symbols': [{
+                'symbol': symbol,
+                'filters': [
+                    {'filterType': 'PRICE_FILTER', 'tickSize': exchange.tick_size},
+                    {'filterType': 'LOT_SIZE', 'stepSize': exchange.step_size},
+                ],
+            } for symbol in symbols]})
+        if url.path.endswith('/time'):
+            return self._reply(200, {'serverTime': int(time.time() * 1000)})
+        self._reply(404, {'code': -1, 'msg': 'Unknown path.'})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        exchange = self.server
+        if not url.path.endswith('/order'):
+            return self._reply(404, {'code': -1, 'msg': 'Unknown path.'})
+
+        # Binance signs the query string followed by the form body
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length).decode() if length else ''
+        total = '&'.join(part for part in (url.query, body) if part)
+        unsigned, _, signature = total.rpartition('&signature=')
+        expected = hmac.new(exchange.api_secret.encode(), unsigned.encode(), hashlib.sha256).hexdigest()
+        if self.headers.get('X-MBX-APIKEY') != exchange.api_key:
+            return self._reply(401, {'code': -2015, 'msg': 'Invalid API-key, IP, or permissions for action.'})
+        if not hmac.compare_digest(signature, expected):
+            return self._reply(400, {'code': -1022, 'msg': 'Signature for this request is not valid.'})
+
+        params = dict(parse_qsl(unsigned))
+        if abs(int(params.get('timestamp', 0)) - time.time() * 1000) > int(params.get('recvWindow', 5000)):
+            return self._reply(400, {'code': -1021, 'msg': 'Timestamp for this request is outside of the recvWindow.'})
+        symbol = params.get('symbol')
+        if symbol not in exchange.prices:
+            return self._reply(400, {'code': -1121, 'msg': 'Invalid symbol.'})
+        if exchange.latency:
+            time.sleep(exchange.latency)
+        return self._reply(200, exchange.fill(params))
+
+
+class MockExchange(ThreadingHTTPServer):
+    """
+    Local stand-in for the exchange REST API, for testing the order gateway offline.
+
+    Serves ticker prices and exchange filters, checks the API key, HMAC signature
+    and timestamp of every order like the real API, fills MARKET orders at the
+    current price, rests LIMIT orders as NEW, and keeps every accepted order in
+    orders.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=8080, api_key='test-key', api_secret='test-secret', prices=None,
+                 step_size='0.00001', tick_size='0.01', latency=0.0):
+        super().__init__((host, port), MockExchangeHandler)
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.prices = dict(prices or {'BTCUSDT': 50000.0})
+        self.step_size = step_size
+        self.tick_size = tick_size
+        self.latency = latency  # Extra seconds before answering an order
+        self.orders = []
+        self.lock = Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address
+        return f'http://{host}:{port}'
+
+    def set_price(self, symbol, price):
+        self.prices[symbol] = price
+
+    def fill(self, params):
+        with self.lock:
+            order_id = len(self.orders) + 1
+            market = params.get('type') == 'MARKET'
+            price = self.prices[params['symbol']] if market else float(params['price'])
+            order = {
+                'symbol': params['symbol'],
+                'orderId': order_id,
+                'clientOrderId': params.get('newClientOrderId', f'mock-{order_id}'),
+                'transactTime': int(time.time() * 1000),
+                'price': params.get('price', '0'),
+                'origQty': params['quantity'],
+                'executedQty': params['quantity'] if market else '0',
+                'status': 'FILLED' if market else 'NEW',
+                'type': params.get('type'),
+                'side': params.get('side'),
+                'reduceOnly': params.get('reduceOnly') == 'true',
+                'fills': [{'price': f"{price:.8f}", 'qty': params['quantity']}] if market else [],
+            }
+            self.orders.append(order)
+        logger.info(f"{order['side']} {order['type']} {order['origQty']} {order['symbol']} -> {order['status']}")
+        return order
+
+    def start_in_background(self):
+        Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Run a local mock of the exchange REST order API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--api-key", default="test-key")
+    parser.add_argument("--api-secret", default="test-secret")
+    parser.add_argument("--price", action="append", default=[], help="SYMBOL=PRICE, may be repeated")
+    args = parser.parse_args()
+
+    prices = {symbol.upper(): float(price) for symbol, price in (item.split('=') for item in args.price)}
+    server = MockExchange(args.host, args.port, args.api_key, args.api_secret, prices or None)
+    logger.info(f"Mock exchange listening on {server.url}; set exchange_url to this and execution_backend to rest")
+    server.serve_forever()
@@ -1,53 +1,65 @@
-import executor
-from bot import determine_market_condition, calculate_moving_averages, get_historical_prices, get_price_data, \
-    calculate_market_pressure, get_current_ma
+from execution_worker import get_worker
+from bot import determine_market_condition, update_moving_averages, get_historical_prices, get_price_data, \
+    calculate_market_pressure, get_current_ma, apply_kline, get_cached_prices, load_archived_prices
+from ma_engine import MovingAverageEngine
 from bridge import Bridge
+from common import get_settings
+from position import PositionState
 import time
 import logging
-
-# Configure logging to display logs in the terminal
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+import metrics
 
 # Get the logger for monitor
 monitor_logger = logging.getLogger("monitor")
 
+# Only the periods the market condition is built from are tracked
+MONITOR_MA_PERIODS = (5, 7, 21, 200)
 
-def monitor_crypto(symbol, signal_queue, active_open_queue=None, active_sell_queue=None, interval='1m', market_type='spot', stop_event=None):
-    monitor_logger.info("Starting crypto monitoring...")
-    bridge = Bridge()  # Initialize Bridge instance once outside the loop
+# Condition changes worth logging, keyed by (previous, current)
+CONDITION_CHANGES = {
+    ('Shortbull', 'Bearish'): "shortbull to bearish",
+    ('Shortbull', 'Bullish'): "shortbull to bullish",
+    ('Longbear', 'Bearish'): "longbear to bearish",
+    ('Longbear', 'Bullish'): "longbear to bullish",
+    ('Bullish', 'Longbear'): "bullish to longbear",
+    ('Bearish', 'Shortbull'): "bearish to shortbull",
+}
 
-    while not stop_event.is_set():
-        monitor_logger.debug("Monitor loop is active.")
+# Trade opened when the market condition moves from previous to current
+TRADE_TRANSITIONS = {
+    ('Bullish', 'Bullish'): 'market_buy',
+    ('Bearish', 'Bearish'): 'market_sell',
+    ('Longbear', 'Longbear'): 'market_sell',
+    ('Shortbull', 'Shortbull'): 'market_buy',
+    ('Shortbull', 'Bullish'): 'market_buy',
+    ('Longbear', 'Bearish'): 'market_sell',
+    ('Bearish', 'Shortbull'): 'market_buy',
+    ('Longbear', 'Bullish'): 'market_buy',
+    ('Bullish', 'Longbear'): 'market_sell',
+    ('Shortbull', 'Bearish'): 'market_sell',
+}
 
-        prices = get_historical_prices(symbol, interval, market_type=market_type)
-        if prices.empty:
-            monitor_logger.warning("No historical prices available, continuing...")
-            time.sleep(5)  # Wait before retrying
-            continue
-        # monitor_logger.debug(f"Prices for {symbol}: {prices.head()}")
-
-        prices = calculate_moving_averages(prices)
-        current_price_data = get_price_data(symbol, market_type)
-        current_price = current_price_data['current_price']
-
-        # Retrieve moving averages
-        ma_values = {
-            5: get_current_ma(5),
-            7: get_current_ma(7),
-            21: get_current_ma(21),
-            150: get_current_ma(150),
-            200: get_current_ma(200),
-        }
-
-        # Calculate market pressure
+
+def evaluate_market(symbol, prices, current_price, bridge, ma_engine, signal_queue, position=None,
+                    market_type='spot', worker=None):
+    """
+    Classify the market for one tick and hand a trade to the execution worker when the
+    condition transition calls for it; the trade runs on the worker's thread.
+    """
+    with metrics.stage('moving_averages'):
+        update_moving_averages(prices, ma_engine)
+
+    # Retrieve moving averages
+    ma_values = {period: get_current_ma(period, ma_engine) for period in MONITOR_MA_PERIODS}
+
+    # Calculate market pressure
+    with metrics.stage('market_pressure'):
         pressure = calculate_market_pressure(prices)
-        monitor_logger.debug(
-            f"Market Pressure - Bullish Avg: {pressure['bullish_avg']}, Bearish Avg: {pressure['bearish_avg']}")
+    monitor_logger.debug(
+        f"Market Pressure - Bullish Avg: {pressure['bullish_avg']}, Bearish Avg: {pressure['bearish_avg']}")
 
-        # Determine the new market condition
+    # Determine the new market condition
+    with metrics.stage('market_condition'):
         market_condition = determine_market_condition(
             current_price,
             ma_values[5],
@@ -56,210 +68,130 @@ def monitor_crypto(symbol, signal_queue, active_open_queue=None, active_sell_que
             ma_values[200]
         )
 
-        # Log current and previous market conditions using the Bridge instance
-        previous_market_condition = bridge.previous_market_condition
-        monitor_logger.debug(f"Previous Market Condition: {previous_market_condition}")
-        monitor_logger.debug(f"Current Market Condition: {market_condition}")
-
-        # Check for market condition change and potential trades
-        if previous_market_condition == 'Shortbull' and market_condition == 'Bearish':
-            monitor_logger.debug("Condition change detected: shortbull to bearish")
-        if market_condition == 'Bullish' and previous_market_condition == 'Shortbull':
-            monitor_logger.debug("Condition change detected: shortbull to bullish")
-        if market_condition == 'Bearish' and previous_market_condition == 'Longbear':
-            monitor_logger.debug("Condition change detected: longbear to bearish")
-        if market_condition == 'Bullish' and previous_market_condition == 'Longbear':
-            monitor_logger.debug("Condition change detected: longbear to bullish")
-        if market_condition == 'Longbear' and previous_market_condition == 'Bullish':
-            monitor_logger.debug("Condition change detected: bullish to longbear")
-        if market_condition == 'Shortbull' and previous_market_condition == 'Bearish':
-            monitor_logger.debug("Condition change detected: bearish to shortbull")
-
-        # Execute trades based on market conditions (open)
-        if market_condition == 'Bullish' and previous_market_condition == 'Bullish':
-            amount = bridge.get_traded_amount()
-            monitor_logger.debug(f"Attempting to execute buy trade with amount: {amount}")
-            if bridge.can_execute_trade('market_buy', amount=amount):
-                monitor_logger.debug("Executing market buy trade...")
-                executor.execute_trade(
-                    trade_type='market_buy',
-                    symbol=symbol,
-                    market_type=market_type,
-                    signal_queue=signal_queue,
-                    active_open_queue=active_open_queue,
-                    active_sell_queue=active_sell_queue,
-                    market_condition=market_condition,
-                    ma_200=ma_values[200],
-                    ma_21=ma_values[21],
-                    ma_7=ma_values[7],
-                    ma_5=ma_values[5]
-                )
-        if market_condition == 'Bearish' and previous_market_condition == 'Bearish':
-            amount = bridge.get_traded_amount()
-            monitor_logger.debug(f"Attempting to execute sell trade with amount: {amount}")
-            if bridge.can_execute_trade('market_sell', amount=amount):
-                monitor_logger.debug("Executing market sell trade...")
-                executor.execute_trade(
-                    trade_type='market_sell',
-                    symbol=symbol,
-                    market_type=market_type,
-                    signal_queue=signal_queue,
-                    active_open_queue=active_open_queue,
-                    active_sell_queue=active_sell_queue,
-                    market_condition=market_condition,
-                    ma_200=ma_values[200],
-                    ma_21=ma_values[21],
-                    ma_7=ma_values[7],
-                    ma_5=ma_values[5]
-                )
-        if market_condition == 'Longbear' and previous_market_condition == 'Longbear':
-            amount = bridge.get_traded_amount()
-            monitor_logger.debug(f"Attempting to execute sell trade with amount: {amount}")
-            if bridge.can_execute_trade('market_sell', amount=amount):
-                monitor_logger.debug("Executing market sell trade...")
-                executor.execute_trade(
-                    trade_type='market_sell',
-                    symbol=symbol,
-                    market_type=market_type,
-                    signal_queue=signal_queue,
-                    active_open_queue=active_open_queue,
-                    active_sell_queue=active_sell_queue,
-                    market_condition=market_condition,
-                    ma_200=ma_values[200],
-                    ma_21=ma_values[21],
-                    ma_7=ma_values[7],
-                    ma_5=ma_values[5]
-                )
-        if market_condition == 'Shortbull' and previous_market_condition == 'Shortbull':
-            amount = bridge.get_traded_amount()
-            monitor_logger.debug(f"Attempting to execute buy trade with amount: {amount}")
-            if bridge.can_execute_trade('market_buy', amount=amount):
-                monitor_logger.debug("Executing market buy trade...")
-                executor.execute_trade(
-                    trade_type='market_buy',
-                    symbol=symbol,
-                    market_type=market_type,
-                    signal_queue=signal_queue,
-                    active_open_queue=active_open_queue,
-                    active_sell_queue=active_sell_queue,
-                    market_condition=market_condition,
-                    ma_200=ma_values[200],
-                    ma_21=ma_values[21],
-                    ma_7=ma_values[7],
-                    ma_5=ma_values[5]
-                )
-        if market_condition == 'Bullish' and previous_market_condition == 'Shortbull':
-            amount = bridge.get_traded_amount()
-            monitor_logger.debug(f"Attempting to execute buy trade with amount: {amount}")
-            if bridge.can_execute_trade('market_buy', amount=amount):
-                monitor_logger.debug("Executing market buy trade...")
-                executor.execute_trade(
-                    trade_type='market_buy',
-                    symbol=symbol,
-                    market_type=market_type,
-                    signal_queue=signal_queue,
-                    active_open_queue=active_open_queue,
-                    active_sell_queue=active_sell_queue,
-                    market_condition=market_condition,
-                    ma_200=ma_values[200],
-                    ma_21=ma_values[21],
-                    ma_7=ma_values[7],
-                    ma_5=ma_values[5]
-                )
-        if market_condition == 'Bearish' and previous_market_condition == 'Longbear':
-            amount = bridge.get_traded_amount()
-            monitor_logger.debug(f"Attempting to execute sell trade with amount: {amount}")
-            if bridge.can_execute_trade('market_sell', amount=amount):
-                monitor_logger.debug("Executing market sell trade...")
-                executor.execute_trade(
-                    trade_type='market_sell',
-                    symbol=symbol,
-                    market_type=market_type,
-                    signal_queue=signal_queue,
-                    active_open_queue=active_open_queue,
-                    active_sell_queue=active_sell_queue,
-                    market_condition=market_condition,
-                    ma_200=ma_values[200],
-                    ma_21=ma_values[21],
-                    ma_7=ma_values[7],
-                    ma_5=ma_values[5]
-                )
-        if market_condition == 'Shortbull' and previous_market_condition == 'Bearish':
-            amount = bridge.get_traded_amount()
-            monitor_logger.debug(f"Attempting to execute buy trade with amount: {amount}")
-            if bridge.can_execute_trade('market_buy', amount=amount):
-                monitor_logger.debug("Executing market buy trade...")
-                executor.execute_trade(
-                    trade_type='market_buy',
-                    symbol=symbol,
-                    market_type=market_type,
-                    signal_queue=signal_queue,
-                    active_open_queue=active_open_queue,
-                    active_sell_queue=active_sell_queue,
-                    market_condition=market_condition,
-                    ma_200=ma_values[200],
-                    ma_21=ma_values[21],
-                    ma_7=ma_values[7],
-                    ma_5=ma_values[5]
-                )
-        if market_condition == 'Bullish' and previous_market_condition == 'Longbear':
-            amount = bridge.get_traded_amount()
-            monitor_logger.debug(f"Attempting to execute buy trade with amount: {amount}")
-            if bridge.can_execute_trade('market_buy', amount=amount):
-                monitor_logger.debug("Executing market buy trade...")
-                executor.execute_trade(
-                    trade_type='market_buy',
-                    symbol=symbol,
-                    market_type=market_type,
-                    signal_queue=signal_queue,
-                    active_open_queue=active_open_queue,
-                    active_sell_queue=active_sell_queue,
-                    market_condition=market_condition,
-                    ma_200=ma_values[200],
-                    ma_21=ma_values[21],
-                    ma_7=ma_values[7],
-                    ma_5=ma_values[5]
-                )
-        if market_condition == 'Longbear' and previous_market_condition == 'Bullish':
-            amount = bridge.get_traded_amount()
-            monitor_logger.debug(f"Attempting to execute sell trade with amount: {amount}")
-            if bridge.can_execute_trade('market_sell', amount=amount):
-                monitor_logger.debug("Executing market sell trade...")
-                executor.execute_trade(
-                    trade_type='market_sell',
-                    symbol=symbol,
-                    market_type=market_type,
-                    signal_queue=signal_queue,
-                    active_open_queue=active_open_queue,
-                    active_sell_queue=active_sell_queue,
-                    market_condition=market_condition,
-                    ma_200=ma_values[200],
-                    ma_21=ma_values[21],
-                    ma_7=ma_values[7],
-                    ma_5=ma_values[5]
-                )
-        if market_condition == 'Bearish' and previous_market_condition == 'Shortbull':
-            amount = bridge.get_traded_amount()
-            monitor_logger.debug(f"Attempting to execute sell trade with amount: {amount}")
-            if bridge.can_execute_trade('market_sell', amount=amount):
-                monitor_logger.debug("Executing market sell trade...")
-                executor.execute_trade(
-                    trade_type='market_sell',
-                    symbol=symbol,
-                    market_type=market_type,
-                    signal_queue=signal_queue,
-                    active_open_queue=active_open_queue,
-                    active_sell_queue=active_sell_queue,
-                    market_condition=market_condition,
-                    ma_200=ma_values[200],
-                    ma_21=ma_values[21],
-                    ma_7=ma_values[7],
-                    ma_5=ma_values[5]
-                )
-        # Update the market condition in Bridge
-        bridge.set_market_condition(market_condition)  # Update market condition in Bridge
-
-        monitor_logger.debug(f"Updated Bridge Market Condition: {market_condition}")
-        time.sleep(1)  # Wait before the next iteration
+    # Log current and previous market conditions using the Bridge instance
+    previous_market_condition = bridge.previous_market_condition
+    monitor_logger.debug(f"Previous Market Condition: {previous_market_condition}")
+    monitor_logger.debug(f"Current Market Condition: {market_condition}")
+
+    # Check for market condition change and potential trades
+    change = CONDITION_CHANGES.get((previous_market_condition, market_condition))
+    if change:
+        monitor_logger.debug(f"Condition change detected: {change}")
+
+    # Execute trades based on market conditions (open)
+    trade_type = TRADE_TRANSITIONS.get((previous_market_condition, market_condition))
+    if trade_type:
+        side = 'buy' if trade_type == 'market_buy' else 'sell'
+        amount = bridge.get_traded_amount()
+        monitor_logger.debug(f"Attempting to execute {side} trade with amount: {amount}")
+        if bridge.can_execute_trade(trade_type, amount=amount):
+            monitor_logger.debug(f"Submitting market {side} trade...")
+            (worker or get_worker()).submit(
+                trade_type=trade_type,
+                symbol=symbol,
+                market_type=market_type,
+                signal_queue=signal_queue,
+                position=position if position is not None else bridge.position,
+                market_condition=market_condition,
+                ma_200=ma_values[200],
+                ma_21=ma_values[21],
+                ma_7=ma_values[7],
+                ma_5=ma_values[5]
+            )
+
+    # Update the market condition in Bridge
+    bridge.set_market_condition(market_condition)  # Update market condition in Bridge
+
+    monitor_logger.debug(f"Updated Bridge Market Condition: {market_condition}")
+    return market_condition
+
+
+def warm_start(symbol, interval, market_type, ma_engine):
+    """Seed the kline cache and moving averages from the local archive; no network call."""
+    prices = load_archived_prices(symbol, interval, market_type=market_type)
+    if prices.empty:
+        monitor_logger.info(f"No usable archive for {symbol} {interval}, starting cold.")
+        return False
+    update_moving_averages(prices, ma_engine)
+    monitor_logger.info(f"Warm-started {symbol} from {len(prices)} archived candles.")
+    return True
+
+
+POLL_INTERVAL = 1.0  # Seconds between ticks of the polling loop
+
+
+def _poll_market(symbol, interval, market_type, stop_event, evaluate):
+    while not stop_event.is_set():
+        monitor_logger.debug("Monitor loop is active.")
+        started = time.monotonic()
+
+        with metrics.stage('kline_fetch'):
+            prices = get_historical_prices(symbol, interval, market_type=market_type)
+        if prices.empty:
+            monitor_logger.warning("No historical prices available, continuing...")
+            time.sleep(5)  # Wait before retrying
+            continue
+
+        with metrics.stage('price_fetch'):
+            current_price_data = get_price_data(symbol, market_type)
+        with metrics.stage('evaluate'):
+            evaluate(prices, current_price_data['current_price'])
+        metrics.observe(metrics.STAGE_SECONDS, time.monotonic() - started, stage='tick')
+        # Tick on a steady cadence: only sleep for what is left of the interval
+        time.sleep(max(0.0, POLL_INTERVAL - (time.monotonic() - started)))
+
+
+def _stream_market(symbol, interval, market_type, stop_event, evaluate, feed_url=None):
+    from feed import MarketFeed
+
+    feed = MarketFeed(symbol, interval, market_type, url=feed_url).start()
+    get_historical_prices(symbol, interval, market_type=market_type)  # Catch the kline cache up over REST
+    current_price = None
+    try:
+        while not stop_event.is_set():
+            event = feed.get(timeout=1)
+            if event is None:
+                continue
+
+            if event['type'] == 'ticker':
+                current_price = event['current_price']
+            elif event['type'] == 'kline':
+                if not apply_kline(symbol, interval, market_type, event['kline']):
+                    get_historical_prices(symbol, interval, market_type=market_type)
+            else:
+                # A gap or reconnect means pushed updates were missed; backfill over REST
+                monitor_logger.warning(f"Feed {event['type']}, resyncing history.")
+                get_historical_prices(symbol, interval, market_type=market_type)
+                continue
+
+            prices = get_cached_prices(symbol, interval, market_type)
+            # A history seeded from the feed alone needs enough candles for the longest moving average
+            if len(prices) < max(MONITOR_MA_PERIODS) or current_price is None:
+                continue
+            with metrics.stage('evaluate'):
+                evaluate(prices, current_price)
+            metrics.observe(metrics.STAGE_SECONDS, time.time() - event['received'], stage='tick')
+            monitor_logger.debug(f"Tick-to-decision latency: {(time.time() - event['received']) * 1000:.1f} ms")
+    finally:
+        feed.stop()
+
+
+def monitor_crypto(symbol, signal_queue, position=None, interval='1m', market_type='spot', stop_event=None, feed_url=None):
+    monitor_logger.info("Starting crypto monitoring...")
+    position = position if position is not None else PositionState()
+    bridge = Bridge(position=position)  # Initialize Bridge instance once outside the loop
+    ma_engine = MovingAverageEngine(MONITOR_MA_PERIODS)  # Streaming moving averages for this symbol
+    warm_start(symbol, interval, market_type, ma_engine)
+
+    def evaluate(prices, current_price):
+        return evaluate_market(symbol, prices, current_price, bridge, ma_engine, signal_queue,
+                               position, market_type)
+
+    settings = get_settings()
+    feed_url = feed_url or settings.feed_url
+    if feed_url or settings.data_feed == 'stream':
+        _stream_market(symbol, interval, market_type, stop_event, evaluate, feed_url)
+    else:
+        _poll_market(symbol, interval, market_type, stop_event, evaluate)
 
     monitor_logger.debug("Monitor loop has stopped.")
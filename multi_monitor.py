@@ -0,0 +1,112 @@
+import asyncio
+import functools
+import logging
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import http_client
+from bot import get_historical_prices, get_price_data
+from bridge import Bridge
+from ma_engine import MovingAverageEngine
+from monitoring import evaluate_market, warm_start, MONITOR_MA_PERIODS
+from position import PositionState
+
+multi_logger = logging.getLogger("multi_monitor")
+
+
+class SymbolState:
+    """Per-symbol state so classification and trade gating stay independent across pairs."""
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.position = PositionState()
+        self.bridge = Bridge(position=self.position)
+        self.ma_engine = MovingAverageEngine(MONITOR_MA_PERIODS)
+        self.market_condition = None
+        self.ticks = 0
+        self.errors = 0
+
+
+class MultiSymbolMonitor:
+    """
+    Monitor many symbols from one asyncio event loop.
+
+    Each symbol ticks on its own cadence; kline and ticker fetches for all symbols
+    share a semaphore so at most max_concurrency requests are in flight. The
+    blocking fetch and trade calls run in worker threads so one slow symbol
+    never stalls the others.
+
+    The threads come from a dedicated pool rather than the loop's default
+    executor, whose min(32, cpu_count + 4) workers would otherwise cap how many
+    symbols make progress at once. It is sized for two fetches per semaphore
+    slot plus one evaluation per symbol.
+    """
+
+    def __init__(self, symbols, signal_queue=None, interval='1m', market_type='spot', max_concurrency=8,
+                 tick_interval=1.0):
+        self.symbols = [symbol.upper() for symbol in symbols]
+        self.signal_queue = signal_queue if signal_queue is not None else queue.Queue()
+        self.interval = interval
+        self.market_type = market_type
+        self.max_concurrency = max_concurrency
+        self.tick_interval = tick_interval
+        self.states = {symbol: SymbolState(symbol) for symbol in self.symbols}
+        self.semaphore = None
+        self.executor = None
+        self.thread_count = 2 * max_concurrency + len(self.symbols)
+        # Each symbol holds up to two connections (klines and ticker) while fetching
+        http_client.configure(pool_size=max(http_client.POOL_SIZE, 2 * max_concurrency))
+
+    def _in_thread(self, func, *args, **kwargs):
+        return asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def _fetch(self, symbol):
+        async with self.semaphore:
+            prices, price_data = await asyncio.gather(
+                self._in_thread(get_historical_prices, symbol, self.interval, market_type=self.market_type),
+                self._in_thread(get_price_data, symbol, self.market_type),
+            )
+        return prices, price_data['current_price']
+
+    async def _watch(self, state, stop_event):
+        while not stop_event.is_set():
+            started = time.monotonic()
+            try:
+                prices, current_price = await self._fetch(state.symbol)
+                if prices.empty:
+                    multi_logger.warning(f"No historical prices available for {state.symbol}, continuing...")
+                else:
+                    state.market_condition = await self._in_thread(
+                        evaluate_market, state.symbol, prices, current_price, state.bridge, state.ma_engine,
+                        self.signal_queue, state.position, self.market_type
+                    )
+                    state.ticks += 1
+            except Exception as e:
+                state.errors += 1
+                multi_logger.error(f"Error monitoring {state.symbol}: {e}")
+            await asyncio.sleep(max(0.0, self.tick_interval - (time.monotonic() - started)))
+
+    async def run(self, stop_event):
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.executor = ThreadPoolExecutor(max_workers=self.thread_count, thread_name_prefix='multi-monitor')
+        multi_logger.info(f"Starting monitoring for {len(self.symbols)} symbols: {', '.join(self.symbols)}")
+        try:
+            await asyncio.gather(*(
+                self._in_thread(warm_start, state.symbol, self.interval, self.market_type, state.ma_engine)
+                for state in self.states.values()
+            ))
+            await asyncio.gather(*(self._watch(state, stop_event) for state in self.states.values()))
+        finally:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        multi_logger.info("Multi-symbol monitoring stopped.")
+
+    def run_forever(self, stop_event):
+        """Run the event loop in the calling thread until stop_event (a threading.Event) is set."""
+        asyncio.run(self.run(stop_event))
+
+    def snapshot(self):
+        return {
+            symbol: {'market_condition': state.market_condition, 'ticks': state.ticks, 'errors': state.errors}
+            for symbol, state in self.states.items()
+        }
@@ -0,0 +1,241 @@
+import hashlib
+import hmac
+import logging
+import math
+import os
+import time
+import uuid
+from threading import Lock
+from urllib.parse import urlencode
+
+import requests
+
+import http_client
+from common import get_settings
+from state import get_state
+
+gateway_logger = logging.getLogger("order_gateway")
+
+BASE_URLS = {
+    'spot': 'https://api.binance.com',
+    'futures': 'https://fapi.binance.com',
+}
+PATHS = {
+    'spot': {'order': '/api/v3/order', 'price': '/api/v3/ticker/price', 'exchange_info': '/api/v3/exchangeInfo'},
+    'futures': {'order': '/fapi/v1/order', 'price': '/fapi/v1/ticker/price', 'exchange_info': '/fapi/v1/exchangeInfo'},
+}
+RECV_WINDOW = 5000  # Milliseconds the exchange accepts a signed request for
+AMOUNT_UNITS = ('quote', 'base')
+POSITION_KEY = "gateway_position"  # Open position the gateway placed per symbol, kept in the state store
+
+
+def _round_down(value, step):
+    if not step:
+        return value
+    return math.floor(value / step + 1e-9) * step
+
+
+def _format(value, step):
+    # Send exactly as many decimals as the filter step allows
+    decimals = max(0, -int(math.floor(math.log10(step)))) if step else 8
+    return f"{value:.{decimals}f}"
+
+
+class OrderGateway:
+    """
+    Places orders through the exchange REST API instead of the trading window.
+
+    Offers the same operations as hotkey.py (market/limit open and close), signs
+    each request with HMAC-SHA256 and sends it over the shared keep-alive session
+    in http_client. Order requests are sent once and never retried automatically;
+    each carries a client order ID so a retry by hand can't double up. The size
+    of the position opened is kept in the state store so it can be closed after
+    a restart. The operations take the symbol and amount of the trade being
+    executed; without them the settings are used. The amount_unit setting says
+    whether an amount is in the quote or the base asset; a quote amount is
+    converted at the order (or last) price and rounded down to the lot size.
+    """
+
+    def __init__(self, api_key, api_secret, market_type='spot', base_url=None):
+        self.api_key = api_key
+        self.api_secret = api_secret.encode() if api_secret else b''
+        self.market_type = market_type
+        self.base_url = (base_url or BASE_URLS[market_type]).rstrip('/')
+        self.paths = PATHS[market_type]
+        self.filters = {}  # symbol -> (step_size, tick_size)
+        self.lock = Lock()
+
+    def _url(self, name):
+        return self.base_url + self.paths[name]
+
+    def _signed_url(self, name, params):
+        params = dict(params, recvWindow=RECV_WINDOW, timestamp=int(time.time() * 1000))
+        query = urlencode(params)
+        signature = hmac.new(self.api_secret, query.encode(), hashlib.sha256).hexdigest()
+        return f"{self._url(name)}?{query}&signature={signature}"
+
+    def _symbol_filters(self, symbol):
+        if symbol not in self.filters:
+            info = http_client.get_json(self._url('exchange_info'), params={'symbol': symbol},
+                                        endpoint=self.paths['exchange_info'])
+            step_size = tick_size = None
+            for entry in info.get('symbols', []):
+                if entry.get('symbol') != symbol:
+                    continue
+                for symbol_filter in entry.get('filters', []):
+                    if symbol_filter.get('filterType') == 'LOT_SIZE':
+                        step_size = float(symbol_filter['stepSize'])
+                    elif symbol_filter.get('filterType') == 'PRICE_FILTER':
+                        tick_size = float(symbol_filter['tickSize'])
+            self.filters[symbol] = (step_size, tick_size)
+        return self.filters[symbol]
+
+    def last_price(self, symbol):
+        data = http_client.get_json(self._url('price'), params={'symbol': symbol}, endpoint=self.paths['price'])
+        return float(data['price'])
+
+    def _quantity(self, symbol, amount, price):
+        """Base-asset quantity for amount in the amount_unit setting, or None when the unit is not set."""
+        unit = get_settings().amount_unit
+        if unit == 'base':
+            return amount
+        if unit == 'quote':
+            return amount / (price or self.last_price(symbol))
+        gateway_logger.error(f"amount_unit must be one of {', '.join(AMOUNT_UNITS)}, not {unit!r}; "
+                             f"order for {symbol} not sent.")
+        return None
+
+    def place_order(self, symbol, side, quantity, price=None, reduce_only=False):
+        """Send one MARKET (or LIMIT when price is given) order; returns the exchange response or None."""
+        order_type = 'MARKET' if price is None else 'LIMIT'
+        started = time.perf_counter()
+        try:
+            # exchangeInfo is fetched on first use of a symbol, so its failures are order failures too
+            step_size, tick_size = self._symbol_filters(symbol)
+            quantity = _round_down(quantity, step_size)
+            if quantity <= 0:
+                gateway_logger.error(f"Order quantity for {symbol} rounds to zero; order not sent.")
+                return None
+            params = {
+                'symbol': symbol,
+                'side': side,
+                'type': order_type,
+                'quantity': _format(quantity, step_size),
+                'newClientOrderId': f"bot-{uuid.uuid4().hex[:20]}",
+            }
+            if price is not None:
+                params['price'] = _format(_round_down(price, tick_size), tick_size)
+                params['timeInForce'] = 'GTC'
+            if reduce_only and self.market_type == 'futures':
+                params['reduceOnly'] = 'true'
+
+            order = http_client.request_json('POST', self._signed_url('order', params), endpoint=self.paths['order'],
+                                             retries=0, headers={'X-MBX-APIKEY': self.api_key})
+        except requests.RequestException as e:
+            detail = e.response.text if getattr(e, 'response', None) is not None else e
+            gateway_logger.error(f"{side} {order_type} order for {symbol} failed: {detail}")
+            return None
+        except (KeyError, ValueError) as e:
+            gateway_logger.error(f"{side} {order_type} order for {symbol} not sent: {e}")
+            return None
+        gateway_logger.info(f"{side} {params['type']} {params['quantity']} {symbol} -> {order.get('status')} "
+                            f"(order {order.get('orderId')}) in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return order
+
+    def _open(self, side, limit, symbol=None, market_type=None, amount=None):
+        if market_type and market_type != self.market_type:
+            return get_gateway(market_type)._open(side, limit, symbol, market_type, amount)
+        settings = get_settings()
+        symbol = (symbol or settings.symbol).upper()
+        amount = float(amount) if amount is not None else settings.amount
+        price = None
+        if limit:
+            price = settings.limit_price or self.last_price(symbol)
+        quantity = self._quantity(symbol, amount, price)
+        if quantity is None:
+            return False
+        with self.lock:
+            order = self.place_order(symbol, side, quantity, price)
+            if order is None:
+                return False
+            quantity = float(order.get('executedQty') or 0) or float(order.get('origQty') or quantity)
+            get_state().set_item(POSITION_KEY, symbol, {'symbol': symbol, 'side': side, 'quantity': quantity})
+            return True
+
+    def _close(self, side, limit, symbol=None, market_type=None, amount=None):
+        if market_type and market_type != self.market_type:
+            return get_gateway(market_type)._close(side, limit, symbol, market_type, amount)
+        settings = get_settings()
+        symbol = (symbol or settings.symbol).upper()
+        position = get_state().get_item(POSITION_KEY, symbol) or {}
+        price = None
+        if limit:
+            price = settings.limit_price or self.last_price(symbol)
+        if amount is None and 'quantity' in position:
+            quantity = position['quantity']  # Already in the base asset
+        else:
+            quantity = self._quantity(symbol, float(amount) if amount is not None else settings.amount, price)
+            if quantity is None:
+                return False
+        with self.lock:
+            order = self.place_order(symbol, side, quantity, price, reduce_only=True)
+            if order is None:
+                return False
+            get_state().pop_item(POSITION_KEY, symbol)
+            return True
+
+    # Same operations as hotkey.py
+    def market_buy_trade(self, symbol=None, market_type=None, amount=None):
+        return self._open('BUY', False, symbol, market_type, amount)
+
+    def market_sell_trade(self, symbol=None, market_type=None, amount=None):
+        return self._open('SELL', False, symbol, market_type, amount)
+
+    def limit_buy_trade(self, symbol=None, market_type=None, amount=None):
+        return self._open('BUY', True, symbol, market_type, amount)
+
+    def limit_sell_trade(self, symbol=None, market_type=None, amount=None):
+        return self._open('SELL', True, symbol, market_type, amount)
+
+    def close_market_buy_trade(self, symbol=None, market_type=None):
+        return self._close('SELL', False, symbol, market_type)
+
+    def close_market_sell_trade(self, symbol=None, market_type=None):
+        return self._close('BUY', False, symbol, market_type)
+
+    def close_limit_buy_trade(self, amount=None, symbol=None, market_type=None):
+        return self._close('SELL', True, symbol, market_type, amount)
+
+    def close_limit_sell_trade(self, amount=None, symbol=None, market_type=None):
+        return self._close('BUY', True, symbol, market_type, amount)
+
+
+_gateways = {}  # market type -> (key, gateway)
+_gateway_lock = Lock()
+
+
+def get_gateway(market_type=None):
+    """
+    Return the shared gateway for market_type (the market_type setting by default).
+
+    Credentials come from the environment or settings; a gateway is replaced when they change.
+    """
+    settings = get_settings()
+    market_type = market_type or settings.market_type
+    api_key = os.environ.get('BINANCE_API_KEY') or settings.get('api_key')
+    api_secret = os.environ.get('BINANCE_API_SECRET') or settings.get('api_secret')
+    key = (api_key, api_secret, settings.exchange_url)
+    with _gateway_lock:
+        cached = _gateways.get(market_type)
+        if cached is None or cached[0] != key:
+            cached = _gateways[market_type] = (key, OrderGateway(api_key, api_secret, market_type,
+                                                                 settings.exchange_url))
+        return cached[1]
+
+
+def get_execution_backend(market_type=None):
+    """The object that places orders: the REST gateway or the hotkey module, per the execution_backend setting."""
+    if get_settings().execution_backend == 'rest':
+        return get_gateway(market_type)
+    import hotkey
+    return hotkey
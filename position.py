@@ -0,0 +1,117 @@
+import logging
+import time
+from enum import Enum
+from threading import Condition
+
+position_logger = logging.getLogger("position")
+
+
+class Position(Enum):
+    FLAT = "flat"
+    OPENING = "opening"
+    OPEN_LONG = "open_long"
+    OPEN_SHORT = "open_short"
+    CLOSING = "closing"
+
+
+OPEN_POSITIONS = (Position.OPEN_LONG, Position.OPEN_SHORT)
+
+
+class PositionState:
+    """
+    Thread-safe position state shared by the monitor, executor, closer and GUI.
+
+    Transitions are made with compare_and_set so two threads can never both
+    open (or both close) the same position. Every change bumps a version
+    counter; wait_for_change blocks on a condition variable until the version
+    moves past the one the caller last saw. The generation only changes when
+    the position leaves flat, so it identifies one open position across a
+    failed close that rolls CLOSING back to the open state.
+    """
+
+    def __init__(self, state=Position.FLAT):
+        self.condition = Condition()
+        self._state = state
+        self._version = 0
+        self._generation = 0
+
+    @property
+    def state(self):
+        with self.condition:
+            return self._state
+
+    @property
+    def version(self):
+        with self.condition:
+            return self._version
+
+    @property
+    def generation(self):
+        with self.condition:
+            return self._generation
+
+    def snapshot(self):
+        """Return (state, version) read together."""
+        with self.condition:
+            return self._state, self._version
+
+    @property
+    def is_open(self):
+        return self.state in OPEN_POSITIONS
+
+    @property
+    def is_flat(self):
+        return self.state is Position.FLAT
+
+    def _change(self, new):
+        position_logger.debug(f"Position {self._state.value} -> {new.value}")
+        if self._state is Position.FLAT:
+            self._generation += 1  # A new position is being opened
+        self._state = new
+        self._version += 1
+        self.condition.notify_all()
+
+    def compare_and_set(self, expected, new):
+        """
+        Move to new only if the current state is expected (a Position or a tuple of them).
+
+        Returns True when the transition was made.
+        """
+        allowed = expected if isinstance(expected, tuple) else (expected,)
+        with self.condition:
+            if self._state not in allowed:
+                return False
+            self._change(new)
+            return True
+
+    def set(self, new):
+        """Unconditionally move to new; returns the previous state."""
+        with self.condition:
+            previous = self._state
+            if previous is not new:
+                self._change(new)
+            return previous
+
+    def wait_for_change(self, version, timeout=None):
+        """
+        Block until the version differs from version (or timeout); returns (state, version).
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self._version != version, timeout)
+            return self._state, self._version
+
+    def wait_for(self, states, timeout=None):
+        """Block until the state is one of states; returns False on timeout."""
+        allowed = states if isinstance(states, tuple) else (states,)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            while self._state not in allowed:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.condition.wait(remaining)
+            return True
+
+    def __repr__(self):
+        state, version = self.snapshot()
+        return f"PositionState({state.value}, version={version}, generation={self.generation})"
@@ -0,0 +1,187 @@
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+profiler_logger = logging.getLogger("profiler")
+
+PROFILE_DIR = "profiles"
+INTERVAL = 0.01  # Seconds between samples (100 Hz)
+# Threads sampled by default: the monitor loops (asyncio_ runs the multi-symbol evaluations),
+# the trade executor and the trigger watchers
+THREADS = ("monitor", "execution-worker", "triggers-", "asyncio_")
+ENV_VAR = "BOT_PROFILE"  # Minutes to profile from startup; 0 or unset leaves the profiler off
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for selected threads of the running process.
+
+    A daemon thread reads every thread's current stack with sys._current_frames()
+    each interval and counts the stacks of the threads whose name contains one
+    of threads. Nothing is hooked into the profiled code, so it runs at full
+    speed and the profiler costs nothing until started. stop() writes the
+    counts as collapsed stacks ("thread;outer;...;inner count"), the input
+    format of flamegraph.pl, speedscope and inferno.
+    """
+
+    def __init__(self, interval=INTERVAL, threads=THREADS, directory=PROFILE_DIR):
+        self.interval = interval
+        self.threads = tuple(threads) if threads else ()
+        self.directory = directory
+        self.stacks = Counter()
+        self.samples = 0
+        self.started = None
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.timer = None
+        self.path = None
+
+    def _wanted(self, name):
+        return not self.threads or any(part in name for part in self.threads)
+
+    def sample(self):
+        """Record the current stack of every selected thread once."""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        own = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            name = names.get(ident)
+            if ident == own or name is None or not self._wanted(name):
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(name)
+            self.stacks[';'.join(reversed(stack))] += 1
+        self.samples += 1
+
+    def _run(self):
+        next_sample = time.monotonic()
+        while not self.stop_event.is_set():
+            self.sample()
+            next_sample += self.interval
+            self.stop_event.wait(max(0.0, next_sample - time.monotonic()))
+
+    def start(self, duration=None):
+        """Start sampling; with duration (seconds) the profile stops and is written by itself."""
+        if self.is_running():
+            return self
+        self.stop_event.clear()
+        self.started = time.time()
+        self.thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self.thread.start()
+        if duration:
+            self.timer = threading.Timer(duration, self.stop)
+            self.timer.daemon = True
+            self.timer.start()
+        profiler_logger.info(f"Profiling threads matching {self.threads or 'all'} every "
+                             f"{self.interval * 1000:.0f} ms" + (f" for {duration:.0f} s" if duration else ""))
+        return self
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def stop(self):
+        """Stop sampling and write the collapsed stacks; returns the file path (None if nothing was sampled)."""
+        if self.timer is not None:
+            self.timer.cancel()
+        self.stop_event.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+        if self.path is None and self.samples:
+            self.path = self.write()
+        return self.path
+
+    def write(self, path=None):
+        if path is None:
+            os.makedirs(self.directory, exist_ok=True)
+            stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started or time.time()))
+            path = os.path.join(self.directory, f"profile-{stamp}.folded")
+        with open(path, 'w') as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+        profiler_logger.info(f"Profile of {self.samples} samples ({len(self.stacks)} stacks) written to {path}")
+        return path
+
+
+def top_frames(path, limit=20):
+    """(frame, self samples, total samples) for the busiest frames of a collapsed-stack file."""
+    own, total = Counter(), Counter()
+    with open(path, 'r') as file:
+        for line in file:
+            stack, _, count = line.rstrip('\n').rpartition(' ')
+            frames = stack.split(';')[1:]  # The first entry is the thread name
+            if not frames:
+                continue
+            own[frames[-1]] += int(count)
+            for frame in set(frames):
+                total[frame] += int(count)
+    return [(frame, samples, total[frame]) for frame, samples in own.most_common(limit)]
+
+
+_profiler = None
+_profiler_lock = threading.Lock()
+
+
+def start(duration=None, interval=INTERVAL, threads=THREADS):
+    """Start the shared profiler session unless one is running; returns it."""
+    global _profiler
+    with _profiler_lock:
+        if _profiler is None or not _profiler.is_running():
+            _profiler = SamplingProfiler(interval, threads).start(duration)
+        return _profiler
+
+
+def stop():
+    """Stop the shared session; returns the path of the written profile."""
+    global _profiler
+    with _profiler_lock:
+        profiler, _profiler = _profiler, None
+    return profiler.stop() if profiler is not None else None
+
+
+def is_running():
+    profiler = _profiler
+    return profiler is not None and profiler.is_running()
+
+
+def toggle():
+    """Start a session, or stop the running one; returns the written path when stopping."""
+    if is_running():
+        return stop()
+    start()
+    return None
+
+
+def start_from_env():
+    """Profile for BOT_PROFILE minutes when that environment variable is set (e.g. BOT_PROFILE=5)."""
+    value = os.environ.get(ENV_VAR, '').strip()
+    try:
+        minutes = float(value) if value else 0.0
+    except ValueError:
+        profiler_logger.error(f"{ENV_VAR}={value!r} is not a number of minutes; profiler left off.")
+        return None
+    if minutes <= 0:
+        return None
+    return start(duration=minutes * 60)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Inspect collapsed-stack profiles written by the profiler.")
+    parser.add_argument("profile", help="A .folded file from the profiles directory")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'self':>8} {'total':>8}  frame")
+    for frame, samples, total in top_frames(args.profile, args.top):
+        print(f"{samples:>8} {total:>8}  {frame}")
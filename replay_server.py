@@ -0,0 +1,107 @@
+import argparse
+import base64
+import hashlib
+import json
+import logging
+import socketserver
+import struct
+import time
+from threading import Thread
+
+logger = logging.getLogger("replay_server")
+
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+
+def load_recording(path):
+    """Load a feed recording: one {'received': seconds, 'message': {...}} object per line."""
+    with open(path, 'r') as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def encode_frame(text):
+    """Encode an unmasked, final websocket text frame."""
+    payload = text.encode('utf-8')
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('!BB', 0x81, length)
+    elif length < 65536:
+        header = struct.pack('!BBH', 0x81, 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x81, 127, length)
+    return header + payload
+
+
+class ReplayHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        headers = {}
+        self.rfile.readline()  # Request line; every path gets the same replay
+        while True:
+            line = self.rfile.readline().decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        key = headers.get('sec-websocket-key')
+        if not key:
+            self.wfile.write(b'HTTP/1.1 400 Bad Request\r\n\r\n')
+            return
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+        self.wfile.write(
+            'HTTP/1.1 101 Switching Protocols\r\n'
+            'Upgrade: websocket\r\n'
+            'Connection: Upgrade\r\n'
+            f'Sec-WebSocket-Accept: {accept}\r\n\r\n'.encode()
+        )
+
+        records = self.server.records
+        speed = self.server.speed
+        started = time.time()
+        first = records[0]['received'] if records else 0
+        try:
+            for record in records:
+                if speed > 0:
+                    delay = (record['received'] - first) / speed - (time.time() - started)
+                    if delay > 0:
+                        time.sleep(delay)
+                self.wfile.write(encode_frame(json.dumps(record['message'])))
+                self.wfile.flush()
+            # Close frame with status 1000 once the recording is exhausted
+            self.wfile.write(struct.pack('!BBH', 0x88, 2, 1000))
+        except (BrokenPipeError, ConnectionResetError):
+            logger.info("Client disconnected during replay.")
+
+
+class ReplayServer(socketserver.ThreadingTCPServer):
+    """Local stand-in for the exchange stream that replays a recorded feed to every client."""
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, records, host='127.0.0.1', port=8765, speed=1.0):
+        super().__init__((host, port), ReplayHandler)
+        self.records = records
+        self.speed = speed  # 0 replays as fast as possible
+
+    @property
+    def url(self):
+        host, port = self.server_address
+        return f'ws://{host}:{port}/stream'
+
+    def start_in_background(self):
+        Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Replay a recorded market feed over a local websocket.")
+    parser.add_argument("recording", help="Recording written by MarketFeed(record_path=...)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed factor, 0 for no delays")
+    args = parser.parse_args()
+
+    server = ReplayServer(load_recording(args.recording), args.host, args.port, args.speed)
+    logger.info(f"Replaying {len(server.records)} messages on {server.url}")
+    server.serve_forever()
@@ -0,0 +1,166 @@
+import json
+import logging
+import os
+from contextlib import contextmanager
+from threading import RLock
+
+import common
+
+state_logger = logging.getLogger("state")
+
+STATE_FILE = "trade_state.json"
+MIGRATED_KEYS = ("trades", "last_trade_id")  # Position state that used to live in settings.json
+
+
+class StateStore:
+    """
+    In-memory position state (last trade, trade ID per symbol) persisted to its own file.
+
+    Every write is atomic: the file is written to a temp file, fsynced and renamed
+    over the old one, so a crash never leaves a torn file. Changes made inside
+    batch() are coalesced into a single write when the outermost batch exits.
+    """
+
+    def __init__(self, path=STATE_FILE):
+        self.path = path
+        self.lock = RLock()
+        self.batch_depth = 0
+        self.dirty = False
+        self.data = self._key_by_symbol(self._load())
+
+    def _load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as file:
+                    return json.load(file)
+            except (OSError, json.JSONDecodeError) as e:
+                state_logger.error(f"Could not read {self.path}: {e}")
+                return {}
+        return self._migrate_from_settings()
+
+    @staticmethod
+    def _key_by_symbol(data):
+        # Older files hold a single trade and trade ID for the whole bot; file them under the trade's symbol
+        trade = data.get("trades")
+        if isinstance(trade, dict) and "price" in trade:
+            symbol = str(trade.get("symbol") or "").upper()
+            data["trades"] = {symbol: trade}
+            trade_id = data.get("last_trade_id")
+            data["last_trade_id"] = {symbol: trade_id} if trade_id else {}
+        elif not isinstance(data.get("last_trade_id", {}), dict):
+            data.pop("last_trade_id")  # A trade ID without its trade can't be matched to a symbol
+        position = data.get("gateway_position")  # order_gateway.POSITION_KEY
+        if isinstance(position, dict) and "quantity" in position:
+            data["gateway_position"] = {str(position.get("symbol") or "").upper(): position}
+        return data
+
+    def _migrate_from_settings(self):
+        settings = common.load_settings()
+        data = {key: settings[key] for key in MIGRATED_KEYS if key in settings}
+        if data:
+            self.data = data
+            self._write()
+            for key in data:
+                settings.pop(key)
+            common.save_settings(settings)
+            state_logger.info(f"Moved {', '.join(data)} from settings.json to {self.path}")
+        return data
+
+    def _write(self):
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as file:
+            json.dump(self.data, file, indent=4)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.path)
+        # Persist the rename itself; not every platform lets us open a directory
+        try:
+            directory = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(directory)
+        except OSError:
+            pass
+        finally:
+            os.close(directory)
+
+    def _changed(self):
+        self.dirty = True
+        if self.batch_depth == 0:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            try:
+                self._write()
+                self.dirty = False
+            except OSError as e:
+                state_logger.error(f"Error saving trade state: {e}")
+
+    @contextmanager
+    def batch(self):
+        """Group several changes into one durable write."""
+        with self.lock:
+            self.batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self.lock:
+                self.batch_depth -= 1
+                if self.batch_depth == 0:
+                    self.flush()
+
+    def get(self, key, default=None):
+        with self.lock:
+            return self.data.get(key, default)
+
+    def set(self, key, value):
+        with self.lock:
+            if self.data.get(key) != value:
+                self.data[key] = value
+                self._changed()
+
+    def get_item(self, key, name, default=None):
+        """Read one entry (e.g. a symbol) of a mapping stored under key."""
+        with self.lock:
+            return self.data.get(key, {}).get(name, default)
+
+    def set_item(self, key, name, value):
+        with self.lock:
+            items = self.data.setdefault(key, {})
+            if items.get(name) != value:
+                items[name] = value
+                self._changed()
+
+    def pop_item(self, key, name):
+        with self.lock:
+            items = self.data.get(key, {})
+            if name in items:
+                value = items.pop(name)
+                self._changed()
+                return value
+            return None
+
+    def pop(self, key):
+        with self.lock:
+            if key in self.data:
+                value = self.data.pop(key)
+                self._changed()
+                return value
+            return None
+
+
+_store = None
+_store_lock = RLock()
+
+
+def get_state():
+    """Return the shared state store, loading it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = StateStore()
+        return _store
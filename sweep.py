@@ -0,0 +1,126 @@
+import argparse
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+import backtest
+
+logger = logging.getLogger("sweep")
+
+RESULTS_FILE = "sweep_results.csv"
+RANK_COLUMNS = ['profit_loss', 'win_rate']
+
+# Set in each worker by _attach_prices
+_shared = None
+_closes = None
+_highs = None
+_lows = None
+
+
+def _attach_prices(name, length):
+    """Worker initializer: map the shared close, high and low prices without copying them."""
+    global _shared, _closes, _highs, _lows
+    _shared = shared_memory.SharedMemory(name=name)
+    _closes, _highs, _lows = np.ndarray((3, length), dtype=np.float64, buffer=_shared.buf)
+
+
+def _evaluate(periods, points, amount, exit_on):
+    """Backtest every (return, loss, fee) point for one set of MA periods."""
+    averages = backtest.moving_averages(_closes, periods)
+    # The conditions only depend on the MA periods, so they are shared by every point
+    conditions = backtest.market_conditions(_closes, *(averages[period] for period in periods))
+    bars = np.arange(len(_closes))
+    rows = []
+    for return_percentage, loss_risk_percentage, fee_margin in points:
+        trades = backtest.simulate(conditions, _closes, bars, return_percentage, loss_risk_percentage, fee_margin,
+                                   amount, exit_on, _highs, _lows)
+        _, summary = backtest.summarize(trades, len(_closes))
+        rows.append(dict(periods='/'.join(map(str, periods)), return_percentage=return_percentage,
+                         loss_risk_percentage=loss_risk_percentage, fee_margin=fee_margin, **summary))
+    return rows
+
+
+def run_sweep(closes, return_percentages, loss_risk_percentages, fee_margins=(0.0,),
+              period_sets=(backtest.DEFAULT_PERIODS,), amount=1.0, exit_on='trigger', workers=None,
+              highs=None, lows=None):
+    """
+    Backtest every combination of the given parameters in a process pool.
+
+    The close, high and low prices are placed in shared memory once and mapped by
+    every worker; as in run_backtest, the closes stand in for highs/lows that are
+    not given. Each task covers a batch of points for one MA period set so the
+    market conditions are computed once per batch rather than once per point.
+    Returns the results ranked by profit/loss, then win rate.
+    """
+    for periods in period_sets:
+        if len(periods) != len(backtest.DEFAULT_PERIODS):
+            raise ValueError(f"MA period sets need {len(backtest.DEFAULT_PERIODS)} periods, got {periods}")
+    closes = np.asarray(closes, dtype=np.float64)
+    prices = np.vstack([closes, closes if highs is None else highs, closes if lows is None else lows])
+    points = list(itertools.product(return_percentages, loss_risk_percentages, fee_margins))
+    workers = workers or os.cpu_count()
+    # Split the points too so a single MA period set still keeps every worker busy
+    chunks = max(1, min(len(points), -(-workers // len(period_sets))))
+    tasks = [(tuple(periods), points[start::chunks]) for periods in period_sets for start in range(chunks)]
+    shared = shared_memory.SharedMemory(create=True, size=max(prices.nbytes, 1))
+    try:
+        np.ndarray(prices.shape, dtype=np.float64, buffer=shared.buf)[:] = prices
+        rows = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach_prices,
+                                 initargs=(shared.name, len(closes))) as pool:
+            futures = {pool.submit(_evaluate, periods, chunk, amount, exit_on): periods for periods, chunk in tasks}
+            for future in as_completed(futures):
+                try:
+                    rows.extend(future.result())
+                    logger.info(f"Finished a batch for MA periods {futures[future]}")
+                except Exception as e:
+                    logger.error(f"Sweep failed for MA periods {futures[future]}: {e}")
+    finally:
+        shared.close()
+        shared.unlink()
+
+    results = pd.DataFrame(rows)
+    if results.empty:
+        return results
+    return results.sort_values(RANK_COLUMNS, ascending=False, ignore_index=True)
+
+
+def _floats(text):
+    return [float(value) for value in text.split(',')]
+
+
+def _period_sets(text):
+    return [tuple(int(period) for period in group.split(',')) for group in text.split(';')]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Sweep strategy parameters over a kline CSV.")
+    parser.add_argument("klines", help="CSV with timestamp, open, high, low, close columns")
+    parser.add_argument("--returns", type=_floats, default=[0.1, 0.25, 0.5, 1.0],
+                        help="Comma-separated return_percentage values")
+    parser.add_argument("--losses", type=_floats, default=[0.1, 0.25, 0.5, 1.0],
+                        help="Comma-separated loss_risk_percentage values")
+    parser.add_argument("--fees", type=_floats, default=[0.0], help="Comma-separated fee_margin values")
+    parser.add_argument("--periods", type=_period_sets, default=[backtest.DEFAULT_PERIODS],
+                        help="Semicolon-separated MA period sets, e.g. '5,7,21,200;9,12,26,100'")
+    parser.add_argument("--amount", type=float, default=1.0)
+    parser.add_argument("--exit-on", choices=["trigger", "signal", "bar"], default="trigger")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--output", default=RESULTS_FILE)
+    args = parser.parse_args()
+
+    prices = backtest.load_klines(args.klines)
+    highs = prices['high'].to_numpy(dtype=float) if 'high' in prices else None
+    lows = prices['low'].to_numpy(dtype=float) if 'low' in prices else None
+    results = run_sweep(prices['close'].to_numpy(dtype=float), args.returns, args.losses, args.fees, args.periods,
+                        args.amount, args.exit_on, args.workers, highs, lows)
+    results.to_csv(args.output, index=False)
+    logger.info(f"{len(results)} results written to {args.output}")
+    if not results.empty:
+        logger.info(f"Best: {results.iloc[0].to_dict()}")
@@ -0,0 +1,52 @@
+import pandas as pd
+import pytest
+
+import analytics
+import journal
+from dictator import DICTATOR_OUTPUT_FILE, Dictator
+from ledger import PnLLedger
+
+
+@pytest.fixture
+def trades(tmp_path, monkeypatch):
+    """Log round trips to a fresh journal and ledger; returns a function that closes one at a loss or profit."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(journal, '_journal', None)
+    monkeypatch.setattr(analytics, '_report_state', {'ledger': None, 'loss_rowid': 0, 'dictator_rows': None})
+    trade_journal = journal.get_journal()
+    ledger = PnLLedger()
+
+    def round_trip(trade_id, close_price):
+        # The Dictator selects 'Open' rows
+        for status, price in (('Open', 100.0), ('Closed', close_price)):
+            trade_journal.append({'trade_id': trade_id, 'symbol': 'BTCUSDT', 'trade_type': 'market_buy',
+                                  'price': price, 'status': status, 'ma_200': 99.0, 'ma_21': 99.5, 'ma_7': 99.8,
+                                  'ma_5': 99.9}, wait=True)
+        ledger.record_open(trade_id, 'BTCUSDT', 'market_buy', 100.0)
+        ledger.record_close(trade_id, close_price)
+    yield round_trip
+    ledger.close()
+
+
+def test_reports_pass_only_new_losses_to_the_dictator(trades, monkeypatch):
+    filtered = []
+    original = Dictator.filter_open_trades
+
+    def recording_filter(**kwargs):
+        filtered.append(list(kwargs['loss_trades']['Trade ID']))
+        return original(**kwargs)
+    monkeypatch.setattr(Dictator, 'filter_open_trades', staticmethod(recording_filter))
+
+    trades('a', 99.0)
+    trades('b', 101.0)
+    assert analytics.post_trade_report()['closed_trades'] == 2
+    trades('c', 98.0)
+    assert analytics.post_trade_report()['closed_trades'] == 3
+    trades('d', 102.0)
+    assert analytics.post_trade_report()['loss_trades'] == 2
+
+    assert filtered == [['a'], ['c']]
+    output = pd.read_excel(DICTATOR_OUTPUT_FILE)
+    assert list(output['Trade ID']) == ['a', 'c']
+    assert list(output['Status']) == ['Open', 'Open']
+    assert output['ma_200_percentage'].tolist() == [-1.0, -1.0]
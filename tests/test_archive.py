@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+import archive
+import bot
+
+MINUTE = 60_000
+START = 1_700_000_000_000 - 1_700_000_000_000 % MINUTE
+
+
+def kline(open_time, close=100.0):
+    return [open_time, '100', str(close + 1), str(close - 1), str(close), '10', open_time + MINUTE - 1,
+            '0', 1, '0', '0', '0']
+
+
+def candles(opens, close=100.0):
+    opens = np.asarray(opens, dtype=np.int64)
+    return {'timestamp': opens, 'open': np.full(len(opens), 100.0), 'high': np.full(len(opens), close + 1),
+            'low': np.full(len(opens), close - 1), 'close': np.full(len(opens), close),
+            'volume': np.full(len(opens), 10.0)}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return archive.OHLCVArchive('btcusdt', '1m', root=str(tmp_path))
+
+
+def opens(frame):
+    return list(bot._open_time_ms(frame['timestamp']))
+
+
+def test_overlapping_append_replaces_the_tail(store):
+    store.append(candles([START + i * MINUTE for i in range(5)]))
+    store.append(candles([START + i * MINUTE for i in range(3, 7)], close=200.0))
+    frame = store.range()
+    assert opens(frame) == [START + i * MINUTE for i in range(7)]
+    assert list(frame['close']) == [100.0] * 3 + [200.0] * 4
+
+
+def test_older_candles_are_merged_in_order(store):
+    store.append(candles([START + i * MINUTE for i in range(5, 8)]))
+    store.append(candles([START + i * MINUTE for i in (1, 2, 6)], close=200.0))
+    frame = store.range()
+    assert opens(frame) == [START + i * MINUTE for i in (1, 2, 5, 6, 7)]
+    assert list(frame['close']) == [200.0, 200.0, 100.0, 200.0, 100.0]
+
+
+def test_length_survives_reopening(store, tmp_path):
+    store.append(candles([START + i * MINUTE for i in range(archive.INITIAL_CAPACITY + 10)]))
+    reopened = archive.OHLCVArchive('btcusdt', '1m', root=str(tmp_path))
+    assert len(reopened) == archive.INITIAL_CAPACITY + 10
+    assert reopened.last_open == START + (archive.INITIAL_CAPACITY + 9) * MINUTE
+    assert opens(reopened.tail(2)) == [START + (archive.INITIAL_CAPACITY + i) * MINUTE for i in (8, 9)]
+
+
+def test_append_klines_skips_the_forming_candle(store):
+    now = START + 3 * MINUTE + 5_000
+    assert store.append_klines([kline(START + i * MINUTE) for i in range(4)], now_ms=now) == 3
+    assert store.last_open == START + 2 * MINUTE
+
+
+def test_polling_without_new_closed_candles_writes_nothing(store, monkeypatch):
+    now = START + 3 * MINUTE + 5_000
+    store.append_klines([kline(START + i * MINUTE) for i in range(4)], now_ms=now)
+    writes = []
+    monkeypatch.setattr(store, 'append', writes.append)
+    for now in (now + 10_000, now + 20_000):
+        assert store.append_klines([kline(START + 2 * MINUTE), kline(START + 3 * MINUTE)], now_ms=now) == 0
+    assert writes == []
+
+    monkeypatch.undo()
+    assert store.append_klines([kline(START + 2 * MINUTE), kline(START + 3 * MINUTE, close=150.0),
+                                kline(START + 4 * MINUTE)], now_ms=START + 4 * MINUTE + 1_000) == 1
+    assert list(store.tail(2)['close']) == [100.0, 150.0]
+
+
+def test_archived_history_serves_the_forming_candle_from_the_fetch(store, monkeypatch):
+    now = START + 300 * MINUTE + 5_000
+    store.append_klines([kline(START + i * MINUTE) for i in range(298)], now_ms=now)
+    monkeypatch.setattr(bot, 'get_archive', lambda *key: store)
+    monkeypatch.setattr(bot.time, 'time', lambda: now / 1000)
+    monkeypatch.setattr(bot, '_fetch_klines', lambda symbol, interval, limit, market_type, start_time:
+                        [kline(open_time, close=150.0) for open_time in range(start_time, now, MINUTE)])
+
+    prices = bot._archived_history(('BTCUSDT', '1m', 'spot'), 200)
+    assert opens(prices) == [START + i * MINUTE for i in range(101, 301)]
+    assert list(prices['close'].iloc[-4:]) == [100.0, 150.0, 150.0, 150.0]  # 297 was already archived
+    assert store.last_open == START + 299 * MINUTE  # The forming candle at 300 was not archived
@@ -0,0 +1,115 @@
+import json
+import queue
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import backtest
+import execution_worker
+import executor
+import monitoring
+import triggers
+from bridge import Bridge
+from ma_engine import MovingAverageEngine
+from position import PositionState
+
+RETURN_PERCENTAGE = 0.3
+LOSS_RISK_PERCENTAGE = 0.2
+
+
+def random_walk(count=3000, seed=3):
+    rng = np.random.default_rng(seed)
+    close = np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.002, count))), 2)
+    return pd.DataFrame({'timestamp': pd.date_range('2024-01-01', periods=count, freq='1min'),
+                         'open': close, 'high': close, 'low': close, 'close': close})
+
+
+class RecordingBackend:
+    """Execution backend whose every order succeeds."""
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: True
+
+
+@pytest.fixture
+def live(tmp_path, monkeypatch):
+    """Run the live monitor and executor over a kline frame, one tick per bar; returns the logged trades."""
+    monkeypatch.chdir(tmp_path)
+
+    def run(frame, feed_triggers, amount='1'):
+        with open('settings.json', 'w') as file:
+            json.dump({'amount': amount, 'return_percentage': str(RETURN_PERCENTAGE),
+                       'loss_risk_percentage': str(LOSS_RISK_PERCENTAGE)}, file)
+        price = {'current': None}
+        log = []
+        engine = triggers.TriggerEngine(watch=False)
+        worker = SimpleNamespace(submit=lambda execute=None, callback=None, **trade:
+                                 (execute or executor.execute_trade)(**trade))
+        monkeypatch.setattr(executor, 'get_current_price', lambda symbol, market_type='spot': price['current'])
+        monkeypatch.setattr(executor, 'log_trade', lambda trade_id, symbol, trade_type, traded, market_type, status,
+                            *mas: log.append((status, trade_type, float(traded))))
+        monkeypatch.setattr(executor, 'get_execution_backend', lambda market_type=None: RecordingBackend())
+        monkeypatch.setattr(executor, 'get_trigger_engine', lambda: engine)
+        monkeypatch.setattr(executor, 'submit_post_trade_report', lambda: 0)
+        monkeypatch.setattr(execution_worker, '_worker', worker)
+
+        closes = frame['close'].to_numpy()
+        bridge = Bridge()
+        ma_engine = MovingAverageEngine(monitoring.MONITOR_MA_PERIODS)
+        position = PositionState()
+        for index in range(199, len(frame)):
+            price['current'] = closes[index]
+            if feed_triggers:
+                engine.check('TEST', closes[index])
+            monitoring.evaluate_market('TEST', frame.iloc[index - 199:index + 1], closes[index], bridge, ma_engine,
+                                       queue.Queue(), position, worker=worker)
+        return log
+    return run
+
+
+def backtested(frame, exit_on, amount=1.0):
+    """(status, trade type, price) rows in journal order, and the exit reason of each closed trade."""
+    trades = backtest.run_backtest(frame, RETURN_PERCENTAGE, LOSS_RISK_PERCENTAGE, amount=amount, exit_on=exit_on,
+                                   exact=True)['trades']
+    rows, reasons = [], []
+    for trade in trades.itertuples():
+        rows.append(('Opened', trade.trade_type, trade.open_price))
+        if trade.exit_reason != 'open':
+            rows.append(('Closed', trade.trade_type, trade.close_price))
+            reasons.append(trade.exit_reason)
+    return rows, reasons
+
+
+def test_signal_exits_match_live_executor(live):
+    frame = random_walk()
+    expected, _ = backtested(frame, 'signal')
+    assert len(expected) > 100
+    assert live(frame, feed_triggers=False) == expected
+
+
+def test_zero_amount_gate_matches_live_bridge(live):
+    # can_execute_trade skips the amount check when the last two ticks agreed, so some signals still trade
+    frame = random_walk()
+    expected, _ = backtested(frame, 'signal', amount=0.0)
+    assert 0 < len(expected) < len(backtested(frame, 'signal')[0])
+    assert live(frame, feed_triggers=False, amount='0.0') == expected
+
+
+def test_trigger_exits_match_live_trigger_engine(live):
+    # Highs and lows equal the closes, so each bar's close is the tick that crosses a level
+    frame = random_walk()
+    expected, reasons = backtested(frame, 'trigger')
+    logged = live(frame, feed_triggers=True)
+    assert len(expected) > 100
+    assert [row[:2] for row in logged] == [row[:2] for row in expected]
+
+    reasons = iter(reasons)
+    for (status, trade_type, price), (_, _, level) in zip(logged, expected):
+        if status == 'Opened':
+            assert price == level
+            continue
+        # The backtest exits at the crossed level, live at the tick that crossed it
+        rising = (trade_type == 'market_buy') == (next(reasons) == 'take_profit')
+        assert price >= level if rising else price <= level
@@ -0,0 +1,77 @@
+import pytest
+import requests
+
+import http_client
+
+
+class FakeSession:
+    """Answers each request with the next queued status code or exception."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def request(self, method, url, params=None, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        response = requests.Response()
+        response.status_code = outcome
+        response.url = url
+        response._content = b'{"ok": true}'
+        return response
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Returns a function that installs a FakeSession; sleeps are recorded, jitter is at its maximum."""
+    delays = []
+    monkeypatch.setattr(http_client.time, 'sleep', delays.append)
+    monkeypatch.setattr(http_client.random, 'uniform', lambda low, high: high)
+    monkeypatch.setattr(http_client, 'endpoint_timings', {})
+
+    def install(*outcomes):
+        session = FakeSession(*outcomes)
+        monkeypatch.setattr(http_client, '_session', session)
+        session.delays = delays
+        return session
+    return install
+
+
+def test_429_and_5xx_are_retried_with_backoff(client):
+    session = client(429, 503, 200)
+    assert http_client.get_json('https://example.test/klines', endpoint='klines') == {'ok': True}
+    assert session.calls == 3
+    assert session.delays == [0.25, 0.5]
+    timings = http_client.get_endpoint_timings()['klines']
+    assert (timings['count'], timings['errors']) == (3, 2)
+
+
+def test_client_errors_are_not_retried(client):
+    session = client(400, 200)
+    with pytest.raises(requests.HTTPError):
+        http_client.get_json('https://example.test/klines')
+    assert (session.calls, session.delays) == (1, [])
+
+
+def test_backoff_is_capped_and_the_last_error_raised(client, monkeypatch):
+    monkeypatch.setattr(http_client, 'MAX_RETRIES', 6)
+    session = client(*[requests.ConnectionError(f'attempt {attempt}') for attempt in range(1, 8)])
+    with pytest.raises(requests.ConnectionError, match='attempt 7'):
+        http_client.get_json('https://example.test/klines')
+    assert session.calls == 7
+    assert session.delays == [0.25, 0.5, 1.0, 2.0, 4.0, 4.0]
+
+
+def test_requests_without_retries_fail_at_once(client):
+    session = client(503, 200)
+    with pytest.raises(requests.HTTPError):
+        http_client.request_json('POST', 'https://example.test/order', retries=0)
+    assert session.calls == 1
+
+
+def test_backoff_delay_has_full_jitter():
+    delays = [http_client.backoff_delay(3) for _ in range(200)]
+    assert all(0 <= delay <= 1.0 for delay in delays)
+    assert max(delays) - min(delays) > 0.5
@@ -0,0 +1,110 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import journal
+
+
+class RecordingConnection:
+    """sqlite3 connection that records each group commit and can hold or fail them."""
+
+    def __init__(self, connection, batches):
+        self.connection = connection
+        self.batches = batches
+        self.hold = None
+        self.fail = False
+
+    def executemany(self, statement, rows):
+        rows = list(rows)
+        if self.hold is not None:
+            self.hold.wait()
+        if self.fail:
+            raise sqlite3.OperationalError('database is locked')
+        self.batches.append(len(rows))
+        return self.connection.executemany(statement, rows)
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+    def __enter__(self):
+        return self.connection.__enter__()
+
+    def __exit__(self, *exc):
+        return self.connection.__exit__(*exc)
+
+
+@pytest.fixture
+def trade_journal(tmp_path, monkeypatch):
+    batches = []
+    writer_connected = threading.Event()
+    connect = journal._connect
+
+    def recording_connect(path):
+        if threading.current_thread().name != 'journal-writer':
+            return connect(path)
+        trade_journal.writer_connection = RecordingConnection(connect(path), batches)
+        writer_connected.set()
+        return trade_journal.writer_connection
+    monkeypatch.setattr(journal, '_connect', recording_connect)
+    trade_journal = journal.TradeJournal(str(tmp_path / 'journal.db'), max_batch=20)
+    trade_journal.batches = batches
+    assert writer_connected.wait(5)
+    return trade_journal
+
+
+def row(trade_id, status='Opened'):
+    return {'trade_id': trade_id, 'symbol': 'BTCUSDT', 'trade_type': 'market_buy', 'price': 100.0,
+            'status': status}
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_waited_append_is_committed(trade_journal):
+    trade_journal.append(row('a'), wait=True)
+    assert list(trade_journal.read_trades()['Trade ID']) == ['a']
+
+
+def test_rows_queued_during_a_commit_share_the_next_one(trade_journal):
+    hold = trade_journal.writer_connection.hold = threading.Event()
+    trade_journal.append(row('first'))
+    wait_until(lambda: trade_journal.pending.qsize() == 0)  # The writer took it and is held committing it
+    threads = [threading.Thread(target=trade_journal.append, args=(row(f'trade-{index}'),), kwargs={'wait': True})
+               for index in range(50)]
+    for thread in threads:
+        thread.start()
+    wait_until(lambda: trade_journal.pending.qsize() == 50)
+    hold.set()
+    for thread in threads:
+        thread.join()
+
+    assert trade_journal.batches == [1, 20, 20, 10]  # Capped at max_batch
+    trades = trade_journal.read_trades()
+    assert len(trades) == 51 and trades['Trade ID'].iloc[0] == 'first'
+
+
+def test_failed_commit_is_raised_to_waiters_only(trade_journal):
+    trade_journal.writer_connection.fail = True
+    trade_journal.append(row('unwaited'))
+    with pytest.raises(sqlite3.OperationalError):
+        trade_journal.append(row('waited'), wait=True)
+
+    trade_journal.writer_connection.fail = False
+    trade_journal.append(row('later'), wait=True)
+    assert list(trade_journal.read_trades()['Trade ID']) == ['later']
+
+
+def test_read_trades_by_id_keeps_journal_order(trade_journal):
+    for trade_id, status in [('a', 'Opened'), ('b', 'Opened'), ('a', 'Closed'), ('c', 'Opened')]:
+        trade_journal.append(row(trade_id, status))
+    trade_journal.flush()
+    trades = trade_journal.read_trades(['c', 'a', 'missing'])
+    assert list(zip(trades['Trade ID'], trades['Status'])) == [('a', 'Opened'), ('a', 'Closed'), ('c', 'Opened')]
+    assert trade_journal.read_trades([]).empty
+    assert list(trade_journal.read_trades([]).columns) == list(journal.TRADE_COLUMNS.values())
@@ -0,0 +1,88 @@
+import pandas as pd
+import pytest
+
+import bot
+
+MINUTE = 60_000
+START = 1_700_000_000_000 - 1_700_000_000_000 % MINUTE
+
+
+class FakeKlines:
+    """Klines endpoint over a synthetic 1m series; the candle open at now is still forming."""
+
+    def __init__(self):
+        self.now = START + 300 * MINUTE + 5_000
+        self.missing = set()  # Open times the exchange leaves out
+        self.calls = []
+
+    def row(self, open_time):
+        index = (open_time - START) // MINUTE
+        close = 100 + index % 17 * 0.5 + (self.now - open_time) / 1e6 * (open_time + MINUTE > self.now)
+        return [open_time, '100', str(close + 1), str(close - 1), str(close), '10', open_time + MINUTE - 1,
+                '0', 1, '0', '0', '0']
+
+    def fetch(self, symbol, interval, limit, market_type, start_time=None):
+        self.calls.append(start_time)
+        forming = self.now - (self.now - START) % MINUTE
+        if start_time is None:
+            start_time = forming - (limit - 1) * MINUTE
+        end = min(forming, start_time + (limit - 1) * MINUTE)
+        return [self.row(open_time) for open_time in range(start_time, end + 1, MINUTE)
+                if open_time not in self.missing]
+
+    def expected(self, limit=200):
+        return bot._parse_klines(self.fetch('X', '1m', limit, 'spot'))
+
+
+@pytest.fixture
+def exchange(monkeypatch):
+    klines = FakeKlines()
+    monkeypatch.setattr(bot, 'kline_cache', {})
+    monkeypatch.setattr(bot, '_fetch_klines', klines.fetch)
+    monkeypatch.setattr(bot, '_archived_history', lambda key, limit: None)
+    monkeypatch.setattr(bot, '_archive_klines', lambda key, data: None)
+    monkeypatch.setattr(bot.time, 'time', lambda: klines.now / 1000)
+    return klines
+
+
+def test_delta_sync_merges_the_overlapping_candle(exchange):
+    bot.get_historical_prices('X')
+    for step in (10_000, 20_000, 3 * MINUTE, MINUTE - 1_000):
+        exchange.now += step
+        prices = bot.get_historical_prices('X')
+        assert exchange.calls[-1] is not None  # Fetched from the cached forming candle on
+        pd.testing.assert_frame_equal(prices, exchange.expected())
+    assert len(prices) == 200
+
+
+def test_gap_in_the_delta_resyncs(exchange):
+    bot.get_historical_prices('X')
+    exchange.now += 3 * MINUTE
+    exchange.missing.add(exchange.now - exchange.now % MINUTE - MINUTE)
+    prices = bot.get_historical_prices('X')
+    assert exchange.calls[-2] is not None and exchange.calls[-1] is None
+    pd.testing.assert_frame_equal(prices, exchange.expected())
+
+
+def test_lost_forming_candle_resyncs(exchange):
+    bot.get_historical_prices('X')
+    exchange.missing.add(exchange.now - exchange.now % MINUTE)  # The cached forming candle is no longer served
+    exchange.now += MINUTE
+    prices = bot.get_historical_prices('X')
+    assert exchange.calls[-1] is None
+    pd.testing.assert_frame_equal(prices, exchange.expected())
+
+
+def test_stale_cache_resyncs(exchange):
+    bot.get_historical_prices('X')
+    calls = len(exchange.calls)
+    exchange.now += 250 * MINUTE  # More candles missed than the history holds
+    prices = bot.get_historical_prices('X')
+    assert exchange.calls[calls:] == [None]
+    pd.testing.assert_frame_equal(prices, exchange.expected())
+
+
+def test_caller_changes_do_not_leak_into_the_cache(exchange):
+    prices = bot.get_historical_prices('X')
+    prices['MA_5'] = 0.0
+    assert 'MA_5' not in bot.get_historical_prices('X').columns
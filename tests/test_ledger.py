@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ledger import LOSS_COLUMNS, PnLLedger
+
+
+def original_profit_loss(df):
+    # Projector.calculate_profit_loss before the ledger, minus the Excel reads and writes; also returns the
+    # profit/loss of every priced trade so the totals can be compared
+    profit_losses = []
+    loss_trades = []
+    for trade_id, group in df.groupby("Trade ID"):
+        if len(group) != 2:
+            continue
+        open_trade = group[group["Status"] == "Opened"].iloc[0]
+        close_trade = group[group["Status"] == "Closed"].iloc[0]
+        open_price = open_trade["Price"]
+        close_price = close_trade["Price"]
+        trade_type = open_trade["Trade Type"]
+        if trade_type == "market_buy":
+            profit_loss = close_price - open_price
+        elif trade_type == "market_sell":
+            profit_loss = open_price - close_price
+        else:
+            continue
+        status = "Profit" if profit_loss > 0 else "Loss"
+        profit_losses.append(profit_loss)
+        if profit_loss < 0:
+            loss_trades.append({"Trade ID": trade_id, "Trade Type": trade_type, "Open Price": open_price,
+                                "Close Price": close_price, "Profit/Loss": profit_loss, "Status": status})
+    return profit_losses, pd.DataFrame(loss_trades, columns=LOSS_COLUMNS)
+
+
+def generated_trades(count=300, seed=7):
+    # Journal rows in time order: every trade opens, most close, a few have a type the ledger doesn't price
+    rng = np.random.default_rng(seed)
+    trades = [(f"trade-{index:04d}", rng.choice(["BTCUSDT", "ETHUSDT"]),
+               rng.choice(["market_buy", "market_sell", "limit_buy"], p=[0.45, 0.45, 0.1]))
+              for index in range(count)]
+    rows = [(trade_id, symbol, trade_type, float(rng.uniform(90, 110)), "Opened")
+            for trade_id, symbol, trade_type in trades]
+    closing = rng.permutation(count)[:count * 4 // 5]
+    rows += [(trades[index][0], trades[index][1], trades[index][2], float(rng.uniform(90, 110)), "Closed")
+             for index in closing]
+    return pd.DataFrame(rows, columns=["Trade ID", "Symbol", "Trade Type", "Price", "Status"])
+
+
+def record(ledger, trades):
+    for row in trades.itertuples():
+        if row.Status == "Opened":
+            ledger.record_open(row._1, row.Symbol, row._3, row.Price)
+        else:
+            ledger.record_close(row._1, row.Price)
+
+
+def assert_summaries_equal(summary, expected):
+    by_symbol, expected_by_symbol = summary.pop("by_symbol"), expected.pop("by_symbol")
+    assert summary == pytest.approx(expected)
+    assert by_symbol.keys() == expected_by_symbol.keys()
+    for symbol, totals in by_symbol.items():
+        assert totals == pytest.approx(expected_by_symbol[symbol])
+
+
+def by_trade_id(frame):
+    return frame.sort_values("Trade ID", ignore_index=True)
+
+
+def test_incremental_ledger_matches_original_projector(tmp_path):
+    trades = generated_trades()
+    profit_losses, expected_losses = original_profit_loss(trades)
+    ledger = PnLLedger(str(tmp_path / "journal.db"))
+    record(ledger, trades)
+
+    summary = ledger.summary()
+    assert summary["closed_trades"] == len(profit_losses)
+    assert summary["total_profit_loss"] == pytest.approx(sum(profit_losses))
+    assert summary["win_rate"] == pytest.approx(np.mean(np.array(profit_losses) > 0))
+    assert summary["loss_trades"] == len(expected_losses)
+    assert summary["open_trades"] == (trades.groupby("Trade ID").size() == 1).sum()
+    pd.testing.assert_frame_equal(by_trade_id(ledger.loss_trades_frame()), by_trade_id(expected_losses))
+
+
+def test_rebuild_and_reopen_match_incremental(tmp_path):
+    trades = generated_trades()
+    ledger = PnLLedger(str(tmp_path / "journal.db"))
+    record(ledger, trades)
+    expected = ledger.summary()
+
+    assert_summaries_equal(PnLLedger(str(tmp_path / "journal.db")).summary(), dict(expected))
+    rebuilt = PnLLedger(str(tmp_path / "rebuilt.db"))
+    rebuilt.rebuild(trades)
+    assert_summaries_equal(rebuilt.summary(), dict(expected))
+    pd.testing.assert_frame_equal(by_trade_id(rebuilt.loss_trades_frame()), by_trade_id(ledger.loss_trades_frame()))
+
+
+def test_refresh_sees_closes_from_another_ledger(tmp_path):
+    writer = PnLLedger(str(tmp_path / "journal.db"))
+    reader = PnLLedger(str(tmp_path / "journal.db"))
+    losses = reader.loss_trades_frame()
+    writer.record_open("a", "BTCUSDT", "market_buy", 100.0)
+    writer.record_close("a", 98.0)
+    assert reader.summary()["closed_trades"] == 0
+
+    reader.refresh()
+    assert reader.summary() == writer.summary()
+    assert list(reader.loss_trades_frame(after=losses.attrs["last_rowid"])["Trade ID"]) == ["a"]
+    assert reader.loss_trades_frame(after=reader.loss_trades_frame().attrs["last_rowid"]).empty
+
+
+def test_trade_is_settled_once(tmp_path):
+    ledger = PnLLedger(str(tmp_path / "journal.db"))
+    ledger.record_open("a", "BTCUSDT", "market_sell", 100.0)
+    assert ledger.record_close("a", 101.0) == pytest.approx(-1.0)
+    ledger.record_open("a", "BTCUSDT", "market_sell", 100.0)
+    assert ledger.record_close("a", 101.0) is None
+    assert PnLLedger(str(tmp_path / "journal.db")).summary() == ledger.summary()
@@ -0,0 +1,83 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import bot
+from ma_engine import DEFAULT_MA_PERIODS, MovingAverageEngine, _RunningSum
+
+
+def klines(count=600, seed=1):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, count)))
+    return pd.DataFrame({'timestamp': np.arange(count) * 60_000, 'close': close})
+
+
+def expected_averages(closes):
+    return {period: pd.Series(closes).rolling(window=period).mean().iloc[-1] for period in DEFAULT_MA_PERIODS}
+
+
+def assert_matches(engine, closes):
+    for period, expected in expected_averages(closes).items():
+        if math.isnan(expected):
+            assert math.isnan(engine.value(period))
+        else:
+            assert engine.value(period) == pytest.approx(expected, rel=1e-12)
+
+
+@pytest.mark.parametrize('size', [0, 1, 4, 199])
+def test_running_sum_matches_rolling_sum(size):
+    values = klines(300)['close'].to_numpy()
+    running_sum = _RunningSum(size)
+    for index, value in enumerate(values):
+        running_sum.push(value)
+        expected = values[max(0, index + 1 - size):index + 1].sum() if size else 0.0
+        assert running_sum.value() == pytest.approx(expected, rel=1e-12, abs=1e-9)
+
+
+def test_seed_matches_rolling_mean():
+    prices = klines()
+    for length in (3, 21, 199, 200, 600):
+        engine = MovingAverageEngine()
+        engine.seed(prices['timestamp'].values[:length], prices['close'].values[:length])
+        assert_matches(engine, prices['close'].values[:length])
+
+
+def test_live_ticks_match_rolling_mean():
+    prices = klines()
+    engine = MovingAverageEngine()
+    engine.seed(prices['timestamp'].values[:250], prices['close'].values[:250])
+    closes = list(prices['close'].values[:250])
+    rng = np.random.default_rng(2)
+    for timestamp, close in zip(prices['timestamp'].values[250:], prices['close'].values[250:]):
+        closes[-1] *= 1 + rng.normal(0, 0.001)  # The forming candle moves before it closes
+        engine.update(engine.live_timestamp, closes[-1])
+        assert_matches(engine, closes)
+        engine.update(timestamp, close)
+        closes.append(close)
+        assert_matches(engine, closes)
+
+
+@pytest.mark.parametrize('step', [1, 3, 200, 250])
+def test_sync_of_polled_windows_matches_rolling_mean(step):
+    # Each poll returns the last 200 candles, the last one still forming; step > 200 leaves a gap that reseeds
+    prices = klines()
+    closes = prices['close'].to_numpy().copy()
+    engine = MovingAverageEngine()
+    for end in range(200, len(prices) + 1, step):
+        closes[end - 1] *= 1.001  # The forming candle's close when it was polled
+        window = prices.iloc[end - 200:end].assign(close=closes[end - 200:end])
+        engine.sync_frame(window)
+        assert_matches(engine, window['close'].values)
+        closes[end - 1] /= 1.001  # Its final close, seen by the next poll
+
+
+def test_get_current_ma_reads_the_engine():
+    engine = MovingAverageEngine()
+    assert bot.get_current_ma(5, engine) is None
+    prices = klines(250)
+    bot.update_moving_averages(prices, engine)
+    assert bot.get_current_ma(200, engine) == pytest.approx(prices['close'].rolling(200).mean().iloc[-1])
+    with pytest.raises(ValueError):
+        bot.get_current_ma(150, engine)
@@ -0,0 +1,150 @@
+import itertools
+
+import bot
+
+
+# determine_market_condition before the rules moved to market_conditions.json, kept verbatim except for
+# its trend strength block, which never affected the returned condition
+def original_market_condition(current_price, ma_5, ma_7, ma_21, ma_200):
+    # Order the values from highest to lowest
+    values = sorted(
+        [("Current Price", current_price), ("5-MA", ma_5), ("7-MA", ma_7), ("21-MA", ma_21), ("200-MA", ma_200)],
+        key=lambda x: x[1],
+        reverse=True
+    )
+
+    # Extract just the labels for comparison
+    order = [label for label, value in values]
+
+    # Determine market condition
+    if order == ["Current Price", "5-MA", "7-MA", "21-MA", "200-MA"] or \
+            order == ["5-MA", "Current Price", "7-MA", "21-MA", "200-MA"] or \
+            order == ["21-MA", "Current Price", "5-MA", "7-MA", "200-MA"] or \
+            order == ["Current Price", "21-MA", "5-MA", "7-MA", "200-MA"] or \
+            order == ["21-MA", "Current Price", "5-MA", "7-MA", "200-MA"] or \
+            order == ["Current Price", "7-MA", "5-MA", "21-MA", "200-MA"] or \
+            order == ["21-MA", "Current Price", "7-MA", "5-MA", "200-MA"] or \
+            order == ["Current Price", "21-MA", "7-MA", "5-MA", "200-MA"] or \
+            order == ["Current Price", "7-MA", "21-MA", "5-MA", "200-MA"] or \
+            order == ["7-MA", "21-MA", "Current Price", "5-MA", "200-MA"] or \
+            order == ["Current Price", "5-MA", "21-MA", "7-MA", "200-MA"] or \
+            order == ["Current Price", "200-MA", "5-MA", "7-MA", "21-MA"] or \
+            order == ["Current Price", "5-MA", "200-MA", "7-MA", "21-MA"] or \
+            order == ["Current Price", "5-MA", "7-MA", "200-MA", "21-MA"] or \
+            order == ["Current Price", "5-MA", "200-MA", "7-MA", "21-MA"] or \
+            order == ["Current Price", "5-MA", "7-MA", "200-MA", "21-MA"] or \
+            order == ["Current Price", "21-MA", "200-MA", "5-MA", "7-MA"] or \
+            order == ["21-MA", "Current Price", "200-MA", "5-MA", "7-MA"] or \
+            order == ["Current Price", "200-MA", "5-MA", "21-MA", "7-MA"] or \
+            order == ["5-MA", "Current Price", "7-MA", "200-MA", "21-MA"] or \
+            order == ["Current Price", "7-MA", "5-MA", "200-MA", "21-MA"] or \
+            order == ["Current Price", "7-MA", "200-MA", "5-MA", "21-MA"] or \
+            order == ["Current Price", "200-MA", "21-MA", "5-MA", "7-MA"] or \
+            order == ["Current Price", "200-MA", "5-MA", "7-MA", "21-MA"] or \
+            order == ["5-MA", "21-MA", "Current Price", "200-MA", "7-MA"] or \
+            order == ["21-MA", "Current Price", "200-MA", "7-MA", "5-MA"] or \
+            order == ["21-MA", "5-MA", "Current Price", "7-MA", "200-MA"]:
+        return "Bullish"
+
+    elif order == ["200-MA", "21-MA", "Current Price", "5-MA", "7-MA"] or \
+        order == ["200-MA", "Current Price", "5-MA", "7-MA", "21-MA"] or \
+        order == ["200-MA", "5-MA", "Current Price", "7-MA", "21-MA"] or \
+        order == ["200-MA", "21-MA", "Current Price", "7-MA", "5-MA"] or \
+        order == ["200-MA", "Current Price", "21-MA", "7-MA", "5-MA"] or \
+        order == ["200-MA", "Current Price", "5-MA", "21-MA", "7-MA"] or \
+        order == ["200-MA", "Current Price", "21-MA", "5-MA", "7-MA"] or \
+        order == ["200-MA", "Current Price", "7-MA", "5-MA", "21-MA"] or \
+        order == ["21-MA", "200-MA", "Current Price", "5-MA", "7-MA"] or \
+        order == ["21-MA", "200-MA", "Current Price", "7-MA", "5-MA"] or \
+        order == ["200-MA", "Current Price", "21-MA", "5-MA", "7-MA"] or \
+        order == ["200-MA", "Current Price", "7-MA", "21-MA", "5-MA"] or \
+        order == ["5-MA", "200-MA", "Current Price", "21-MA", "7-MA"] or \
+            order == ["200-MA", "Current Price", "7-MA", "21-MA", "5-MA"]:
+        market_condition = "Shortbull"
+
+    elif order == ["21-MA", "7-MA", "5-MA", "Current Price", "200-MA"] or \
+            order == ["7-MA", "5-MA", "Current Price", "21-MA", "200-MA"] or \
+            order == ["21-MA", "7-MA", "Current Price", "5-MA", "200-MA"] or \
+            order == ["5-MA", "7-MA", "Current Price", "21-MA", "200-MA"] or \
+            order == ["5-MA", "7-MA", "21-MA", "Current Price", "200-MA"] or \
+            order == ["7-MA", "21-MA", "5-MA", "Current Price", "200-MA"] or \
+            order == ["21-MA", "5-MA", "7-MA", "Current Price", "200-MA"] or \
+            order == ["5-MA", "21-MA", "7-MA", "Current Price", "200-MA"] or \
+            order == ["7-MA", "5-MA", "21-MA", "Current Price", "200-MA"] or \
+            order == ["7-MA", "21-MA", "5-MA", "Current Price", "200-MA"] or \
+            order == ["5-MA", "7-MA", "Current Price", "200-MA", "21-MA"] or \
+            order == ["7-MA", "5-MA", "Current Price", "200-MA", "21-MA"] or \
+            order == ["7-MA", "5-MA", "Current Price", "200-MA", "21-MA"] or \
+            order == ["5-MA", "21-MA", "7-MA", "Current Price", "200-MA"] or \
+            order == ["7-MA", "Current Price", "5-MA", "200-MA", "21-MA"] or \
+            order == ["5-MA", "7-MA", "Current Price", "21-MA", "200-MA"] or \
+            order == ["7-MA", "Current Price", "5-MA", "21-MA", "200-MA"]:
+        return "Longbear"
+
+    elif order == ["200-MA", "21-MA", "7-MA", "5-MA", "Current Price"] or \
+            order == ["200-MA", "7-MA", "5-MA", "Current Price", "21-MA"] or \
+            order == ["200-MA", "21-MA", "7-MA", "Current Price", "5-MA"] or \
+            order == ["200-MA", "7-MA", "21-MA", "5-MA", "Current Price"] or \
+            order == ["7-MA", "5-MA", "200-MA", "21-MA", "Current Price"] or \
+            order == ["7-MA", "200-MA", "5-MA", "21-MA", "Current Price"] or \
+            order == ["200-MA", "5-MA", "7-MA", "Current Price", "21-MA"] or \
+            order == ["200-MA", "7-MA", "5-MA", "21-MA", "Current Price"] or \
+            order == ["21-MA", "200-MA", "7-MA", "5-MA", "Current Price"] or \
+            order == ["21-MA", "7-MA", "5-MA", "200-MA", "Current Price"] or \
+            order == ["21-MA", "7-MA", "200-MA", "5-MA", "Current Price"] or \
+            order == ["200-MA", "21-MA", "5-MA", "7-MA", "Current Price"] or \
+            order == ["21-MA", "200-MA", "5-MA", "7-MA", "Current Price"] or \
+            order == ["200-MA", "7-MA", "21-MA", "Current Price", "5-MA"] or \
+            order == ["200-MA", "5-MA", "7-MA", "21-MA", "Current Price"] or \
+            order == ["5-MA", "200-MA", "7-MA", "21-MA", "Current Price"] or \
+            order == ["5-MA", "200-MA", "7-MA", "Current Price", "21-MA"] or \
+            order == ["5-MA", "7-MA", "200-MA", "Current Price", "21-MA"] or \
+            order == ["5-MA", "7-MA", "200-MA", "21-MA", "Current Price"] or \
+            order == ["200-MA", "5-MA", "21-MA", "7-MA", "Current Price"] or \
+            order == ["7-MA", "5-MA", "200-MA", "Current Price", "21-MA"] or \
+            order == ["21-MA", "7-MA", "5-MA", "200-MA", "Current Price"] or \
+            order == ["7-MA", "5-MA", "21-MA", "200-MA", "Current Price"] or \
+            order == ["7-MA", "21-MA", "5-MA", "200-MA", "Current Price"] or \
+            order == ["21-MA", "200-MA", "7-MA", "Current Price", "5-MA"] or \
+            order == ["7-MA", "200-MA", "Current Price", "5-MA", "21-MA"] or \
+            order == ["21-MA", "5-MA", "200-MA", "7-MA", "Current Price"] or \
+            order == ["21-MA", "7-MA", "200-MA", "5-MA", "Current Price"] or \
+            order == ["200-MA", "21-MA", "5-MA", "7-MA", "Current Price"] or \
+            order == ["200-MA", "5-MA", "7-MA", "Current Price", "21-MA"] or \
+            order == ["7-MA", "5-MA", "21-MA", "200-MA", "Current Price"] or \
+            order == ["7-MA", "200-MA", "5-MA", "21-MA", "Current Price"] or \
+            order == ["200-MA", "7-MA", "Current Price", "5-MA", "21-MA"]:
+        market_condition = "Bearish"
+
+    elif order == ["200-MA", "21-MA", "Current Price", "5-MA", "7-MA"] or \
+            order == ["200-MA", "Current Price", "5-MA", "7-MA", "21-MA"] or \
+            order == ["200-MA", "5-MA", "Current Price", "7-MA", "21-MA"] or \
+            order == ["200-MA", "21-MA", "Current Price", "7-MA", "5-MA"] or \
+            order == ["200-MA", "Current Price", "21-MA", "7-MA", "5-MA"] or \
+            order == ["200-MA", "Current Price", "5-MA", "21-MA", "7-MA"] or \
+            order == ["200-MA", "Current Price", "21-MA", "5-MA", "7-MA"] or \
+            order == ["200-MA", "Current Price", "7-MA", "5-MA", "21-MA"] or \
+            order == ["21-MA", "200-MA", "Current Price", "5-MA", "7-MA"] or \
+            order == ["21-MA", "200-MA", "Current Price", "7-MA", "5-MA"] or \
+            order == ["200-MA", "Current Price", "21-MA", "5-MA", "7-MA"] or \
+            order == ["200-MA", "Current Price", "7-MA", "21-MA", "5-MA"] or \
+            order == ["5-MA", "200-MA", "Current Price", "21-MA", "7-MA"] or \
+            order == ["200-MA", "Current Price", "7-MA", "21-MA", "5-MA"] or \
+            order == ["200-MA", "21-MA", "5-MA", "Current Price", "7-MA"]:
+        return "Shortbull"
+
+    else:
+        market_condition = "Neutral"
+
+    return market_condition
+
+
+def test_all_orderings_match_original_chain():
+    for values in itertools.permutations((1.0, 2.0, 3.0, 4.0, 5.0)):
+        assert bot.determine_market_condition(*values) == original_market_condition(*values), values
+
+
+def test_tied_values_match_original_chain():
+    # Every assignment of four levels to the five inputs, so most cases contain ties
+    for values in itertools.product((1.0, 2.0, 3.0, 4.0), repeat=5):
+        assert bot.determine_market_condition(*values) == original_market_condition(*values), values
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bot import calculate_market_pressure, calculate_market_pressure_series
+
+
+def original_market_pressure(prices):
+    # calculate_market_pressure before vectorization: the 9 closed candles before the forming one
+    sample_size = 10
+    if len(prices) < sample_size:
+        return {'bullish_avg': 0, 'bearish_avg': 0}
+    candle_size_data = {'bullish': [], 'bearish': []}
+    for index in range(-sample_size, -1):
+        candle = prices.iloc[index]
+        candle_size = candle['high'] - candle['low']
+        if candle['close'] > candle['open']:
+            candle_size_data['bullish'].append(candle_size)
+        else:
+            candle_size_data['bearish'].append(candle_size)
+    bullish_avg = np.mean(candle_size_data['bullish']) if candle_size_data['bullish'] else 0
+    bearish_avg = np.mean(candle_size_data['bearish']) if candle_size_data['bearish'] else 0
+    return {'bullish_avg': bullish_avg, 'bearish_avg': bearish_avg}
+
+
+def candles(count=400, seed=4):
+    rng = np.random.default_rng(seed)
+    open_ = np.round(rng.uniform(99, 101, count), 1)
+    close = np.round(rng.uniform(99, 101, count), 1)  # Rounded so some candles close at their open
+    close[100:130] = open_[100:130] + 0.5  # A run of only bullish candles
+    close[200:230] = open_[200:230] - 0.5  # and of only bearish ones
+    high = np.maximum(open_, close) + rng.uniform(0, 1, count)
+    low = np.minimum(open_, close) - rng.uniform(0, 1, count)
+    return pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close})
+
+
+def test_market_pressure_matches_original_loop():
+    prices = candles()
+    for end in range(1, len(prices) + 1):
+        window = prices.iloc[:end]
+        assert calculate_market_pressure(window) == pytest.approx(original_market_pressure(window))
+
+
+def test_market_pressure_series_matches_original_loop():
+    prices = candles()
+    series = calculate_market_pressure_series(prices)
+    for row in range(len(prices)):
+        expected = original_market_pressure(prices.iloc[:row + 1])
+        assert series.iloc[row].to_dict() == pytest.approx(expected, rel=1e-9, abs=1e-12)
@@ -0,0 +1,29 @@
+import asyncio
+import os
+import threading
+
+import pandas as pd
+
+import multi_monitor
+
+
+def test_every_symbol_gets_a_worker_thread(monkeypatch):
+    # More symbols than the default executor's min(32, cpu_count + 4) workers
+    symbols = [f"COIN{index}USDT" for index in range(min(32, (os.cpu_count() or 1) + 4) + 8)]
+    barrier = threading.Barrier(len(symbols), timeout=5)
+    stop_event = threading.Event()
+    monkeypatch.setattr(multi_monitor, 'warm_start', lambda *args: barrier.wait())
+    monkeypatch.setattr(multi_monitor, 'get_historical_prices', lambda *args, **kwargs: pd.DataFrame())
+    monkeypatch.setattr(multi_monitor, 'get_price_data', lambda *args: {'current_price': 1.0})
+
+    monitor = multi_monitor.MultiSymbolMonitor(symbols, max_concurrency=2, tick_interval=0.01)
+    assert monitor.thread_count == 4 + len(symbols)
+
+    async def run():
+        task = asyncio.create_task(monitor.run(stop_event))
+        await asyncio.sleep(0.2)
+        stop_event.set()
+        await task
+
+    asyncio.run(run())  # Every warm start has to block at the barrier at once to get past it
+    assert not barrier.broken
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+import state
+from mock_exchange import MockExchange
+from order_gateway import POSITION_KEY, OrderGateway
+
+
+@pytest.fixture
+def exchange(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(state, '_store', None)
+    server = MockExchange(port=0, prices={'BTCUSDT': 50000.0}).start_in_background()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def gateway(exchange, **settings):
+    with open('settings.json', 'w') as file:
+        json.dump(dict({'symbol': 'BTCUSDT', 'amount': '1000'}, **settings), file)
+    return OrderGateway(exchange.api_key, exchange.api_secret, 'spot', exchange.url)
+
+
+def test_quote_amount_is_converted_at_the_market_price(exchange):
+    orders = gateway(exchange, amount_unit='quote')
+    assert orders.market_buy_trade()
+    assert exchange.orders[-1]['origQty'] == '0.02000'  # 1000 USDT at 50000
+
+    assert orders.close_market_buy_trade()
+    assert (exchange.orders[-1]['side'], exchange.orders[-1]['origQty']) == ('SELL', '0.02000')
+    assert state.get_state().get_item(POSITION_KEY, 'BTCUSDT') is None
+
+
+def test_quote_amount_is_converted_at_the_limit_price(exchange):
+    assert gateway(exchange, amount_unit='quote', limit_price='40000').limit_buy_trade(amount=999)
+    assert (exchange.orders[-1]['origQty'], exchange.orders[-1]['price']) == ('0.02497', '40000.00')
+
+
+def test_base_amount_is_sent_as_the_quantity(exchange):
+    assert gateway(exchange, amount='0.5', amount_unit='base').market_sell_trade()
+    assert exchange.orders[-1]['origQty'] == '0.50000'
+
+
+@pytest.mark.parametrize('unit', [None, 'usdt'])
+def test_no_order_without_an_amount_unit(exchange, unit):
+    orders = gateway(exchange, **({'amount_unit': unit} if unit else {}))
+    assert orders.market_buy_trade() is False
+    assert orders.close_market_buy_trade() is False
+    assert exchange.orders == []
@@ -0,0 +1,29 @@
+from position import Position, PositionState
+
+
+def test_failed_close_keeps_the_generation():
+    position = PositionState()
+    assert position.compare_and_set(Position.FLAT, Position.OPENING)
+    assert position.compare_and_set(Position.OPENING, Position.OPEN_LONG)
+    generation, version = position.generation, position.version
+
+    assert position.compare_and_set(Position.OPEN_LONG, Position.CLOSING)
+    assert position.compare_and_set(Position.CLOSING, Position.OPEN_LONG)  # Close failed, rolled back
+    assert position.generation == generation
+    assert position.version > version  # Waiters still see the round trip
+
+
+def test_each_open_is_a_new_generation():
+    position = PositionState()
+    generations = []
+    for opened in (Position.OPEN_LONG, Position.OPEN_SHORT):
+        position.compare_and_set(Position.FLAT, Position.OPENING)
+        position.compare_and_set(Position.OPENING, opened)
+        generations.append(position.generation)
+        position.compare_and_set(opened, Position.CLOSING)
+        position.compare_and_set(Position.CLOSING, Position.FLAT)
+    assert generations[0] != generations[1]
+
+    position.compare_and_set(Position.FLAT, Position.OPENING)
+    position.compare_and_set(Position.OPENING, Position.FLAT)  # Open failed
+    assert position.generation == generations[1] + 1
@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from state import StateStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with open('settings.json', 'w') as file:
+        json.dump({'symbol': 'BTCUSDT'}, file)
+    writes = []
+    write = StateStore._write
+
+    def recording_write(self):
+        writes.append(dict(self.data))
+        write(self)
+    monkeypatch.setattr(StateStore, '_write', recording_write)
+    store = StateStore()
+    store.writes = writes
+    return store
+
+
+def saved():
+    with open('trade_state.json') as file:
+        return json.load(file)
+
+
+def test_each_change_outside_a_batch_is_written(store):
+    store.set('a', 1)
+    store.set_item('trades', 'BTCUSDT', {'price': 1.0})
+    store.set('a', 1)  # Unchanged, not written again
+    assert len(store.writes) == 2
+    assert saved() == {'a': 1, 'trades': {'BTCUSDT': {'price': 1.0}}}
+
+
+def test_nested_batches_write_once(store):
+    with store.batch():
+        store.set('a', 1)
+        with store.batch():
+            store.set_item('last_trade_id', 'BTCUSDT', 'id-1')
+            store.pop('a')
+        assert store.writes == []
+    assert len(store.writes) == 1
+    assert saved() == {'last_trade_id': {'BTCUSDT': 'id-1'}}
+    assert StateStore().get_item('last_trade_id', 'BTCUSDT') == 'id-1'
+
+
+def test_failed_write_is_retried(store, monkeypatch):
+    def failing_write(self):
+        raise OSError('disk full')
+    with monkeypatch.context() as patch:
+        patch.setattr(StateStore, '_write', failing_write)
+        store.set('a', 1)
+    assert store.dirty
+    store.set('b', 2)
+    assert not store.dirty
+    assert saved() == {'a': 1, 'b': 2}
+
+
+def test_position_state_moves_out_of_settings(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    trade = {'symbol': 'btcUSDT', 'trade_type': 'market_buy', 'price': 99187.4, 'market_type': 'futures'}
+    with open('settings.json', 'w') as file:
+        json.dump({'symbol': 'btcUSDT', 'amount': '1000', 'trades': trade, 'last_trade_id': 'id-1'}, file)
+
+    store = StateStore()
+    assert store.get_item('trades', 'BTCUSDT') == trade
+    assert store.get_item('last_trade_id', 'BTCUSDT') == 'id-1'
+    with open('settings.json') as file:
+        assert json.load(file) == {'symbol': 'btcUSDT', 'amount': '1000'}
+    assert StateStore().data == store.data
+
+
+def test_legacy_state_file_is_keyed_by_symbol(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with open('trade_state.json', 'w') as file:
+        json.dump({'trades': {'symbol': 'ethusdt', 'price': 2.0}, 'last_trade_id': 'id-2',
+                   'gateway_position': {'symbol': 'ETHUSDT', 'side': 'BUY', 'quantity': 0.5}}, file)
+    store = StateStore()
+    assert store.get_item('trades', 'ETHUSDT') == {'symbol': 'ethusdt', 'price': 2.0}
+    assert store.get_item('last_trade_id', 'ETHUSDT') == 'id-2'
+    assert store.get_item('gateway_position', 'ETHUSDT')['quantity'] == 0.5
+
+
+def test_unreadable_state_file_starts_empty(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with open('trade_state.json', 'w') as file:
+        file.write('{"trades": ')
+    assert StateStore().data == {}
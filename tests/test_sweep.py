@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import backtest
+import sweep
+
+
+def klines(count=3000, seed=5):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, count)))
+    spread = np.abs(rng.normal(0, 0.001, count)) * close
+    return pd.DataFrame({'close': close, 'high': close + spread, 'low': close - spread})
+
+
+@pytest.mark.parametrize('exit_on', ['trigger', 'signal', 'bar'])
+def test_sweep_matches_run_backtest(exit_on):
+    prices = klines()
+    returns, losses = [0.1, 0.3], [0.2]
+    results = sweep.run_sweep(prices['close'], returns, losses, exit_on=exit_on, workers=2,
+                              highs=prices['high'], lows=prices['low'])
+    assert len(results) == len(returns) * len(losses)
+    for row in results.itertuples():
+        expected = backtest.run_backtest(prices, row.return_percentage, row.loss_risk_percentage,
+                                         exit_on=exit_on)['summary']
+        assert (row.trades, row.profit_loss) == pytest.approx((expected['trades'], expected['profit_loss']))
@@ -0,0 +1,88 @@
+import json
+import queue
+from types import SimpleNamespace
+
+import pytest
+
+import execution_worker
+import executor
+import triggers
+from position import Position, PositionState
+
+
+class Backend:
+    """Execution backend whose orders fail while fail is set."""
+
+    def __init__(self):
+        self.fail = False
+        self.calls = []
+
+    def __getattr__(self, name):
+        def order(**kwargs):
+            self.calls.append((name, self.fail))
+            return not self.fail
+        return order
+
+
+@pytest.fixture
+def trade(tmp_path, monkeypatch):
+    """An open market_buy at 100 (take profit 100.3, stop loss 99.8) with its trigger armed."""
+    monkeypatch.chdir(tmp_path)
+    with open('settings.json', 'w') as file:
+        json.dump({'amount': '1', 'return_percentage': '0.3', 'loss_risk_percentage': '0.2'}, file)
+    backend = Backend()
+    engine = triggers.TriggerEngine(watch=False)
+    log = []
+    monkeypatch.setattr(executor, 'get_current_price', lambda symbol, market_type='spot': 100.0)
+    monkeypatch.setattr(executor, 'log_trade', lambda trade_id, symbol, trade_type, price, market_type, status,
+                        *mas: log.append((trade_id, status)))
+    monkeypatch.setattr(executor, 'get_execution_backend', lambda market_type=None: backend)
+    monkeypatch.setattr(executor, 'get_trigger_engine', lambda: engine)
+    monkeypatch.setattr(executor, 'submit_post_trade_report', lambda: 0)
+    monkeypatch.setattr(execution_worker, '_worker', SimpleNamespace(
+        submit=lambda execute=None, callback=None, **command: (execute or executor.execute_trade)(**command)))
+
+    position = PositionState()
+    signal_queue = queue.Queue()
+    assert executor._open_trade(backend, 'market_buy_trade', Position.OPEN_LONG, signal_queue, position, 'TEST',
+                                'market_buy', 'spot', 'Bullish', 1, 1, 1, 1)
+    return SimpleNamespace(backend=backend, engine=engine, log=log, position=position, signal_queue=signal_queue)
+
+
+def signal_close(trade):
+    return executor._close_trade(trade.backend, 'close_market_buy_trade', 'Closing buy trade', trade.signal_queue,
+                                 trade.position, 'TEST', 'market_buy', 99.9, 'spot', 'Bullish', 1, 1, 1, 1)
+
+
+def test_trigger_still_closes_after_a_failed_close(trade):
+    trade.backend.fail = True
+    assert not signal_close(trade)
+    assert trade.position.state is Position.OPEN_LONG
+
+    trade.backend.fail = False
+    trade.engine.check('TEST', 99.7)
+    assert trade.position.state is Position.FLAT
+    assert trade.backend.calls[-1] == ('close_market_buy_trade', False)
+    assert [status for _, status in trade.log] == ['Opened', 'Closed']
+
+
+def test_failed_trigger_close_is_rearmed(trade):
+    trade.backend.fail = True
+    trade.engine.check('TEST', 99.7)
+    assert trade.position.state is Position.OPEN_LONG
+    assert len(trade.engine.pending('TEST')) == 1
+
+    trade.backend.fail = False
+    trade.engine.check('TEST', 99.7)
+    assert trade.position.state is Position.FLAT
+    assert trade.engine.pending('TEST') == []
+
+
+def test_trigger_of_a_closed_position_is_stale(trade):
+    trigger = trade.engine.pending('TEST')[0]
+    assert signal_close(trade)
+    trade.position.compare_and_set(Position.FLAT, Position.OPENING)
+    trade.position.compare_and_set(Position.OPENING, Position.OPEN_LONG)  # A later position
+
+    assert not executor.close_on_trigger('close_market_buy', 'TEST', dict(trigger, on_fire=None), 'stop_loss', 99.7)
+    assert trade.position.state is Position.OPEN_LONG
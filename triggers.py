@@ -0,0 +1,238 @@
+import bisect
+import itertools
+import logging
+import math
+import time
+from threading import Condition, Event, Lock, Thread
+
+import http_client
+import metrics
+from common import get_settings
+from order_gateway import BASE_URLS, PATHS
+
+trigger_logger = logging.getLogger("triggers")
+
+
+def exit_levels(trade_type, entry_price, profit_margin, loss_margin):
+    """Take-profit and stop-loss prices for a trade; margins are fractions of the entry price."""
+    if trade_type == 'market_buy':
+        return entry_price * (1 + profit_margin), entry_price * (1 - loss_margin)
+    return entry_price * (1 - profit_margin), entry_price * (1 + loss_margin)
+
+
+def crossed(trade_type, take_profit, stop_loss, price):
+    """'take_profit', 'stop_loss' or None; same comparisons as the executor's exit check."""
+    if trade_type == 'market_buy':
+        if price >= take_profit:
+            return 'take_profit'
+        if price <= stop_loss:
+            return 'stop_loss'
+    else:
+        if price <= take_profit:
+            return 'take_profit'
+        if price >= stop_loss:
+            return 'stop_loss'
+    return None
+
+
+class TriggerEngine:
+    """
+    Take-profit/stop-loss levels for any number of open positions.
+
+    Each symbol keeps two sorted lists of (level, seq, trigger_id): levels that
+    fire when the price rises to them and levels that fire when it falls to
+    them. A price tick bisects both lists, so it only touches the levels it
+    crossed. A fired trigger is removed with both of its levels before
+    on_fire(trigger, reason, price) is called outside the lock. The first
+    trigger for a symbol starts a PriceWatcher for it.
+    """
+
+    def __init__(self, watch=True):
+        self.condition = Condition()
+        self.books = {}  # symbol -> {'above': [...], 'below': [...]}
+        self.triggers = {}  # trigger ID -> trigger record
+        self.seq = itertools.count()
+        self.watch = watch
+        self.watchers = {}  # (symbol, market_type) -> PriceWatcher
+
+    def add(self, trigger_id, symbol, trade_type, take_profit, stop_loss, on_fire, market_type='spot', context=None):
+        """Register the exit levels of one open position; replaces a trigger with the same ID."""
+        symbol = symbol.upper()
+        long = trade_type == 'market_buy'
+        trigger = {
+            'id': trigger_id, 'symbol': symbol, 'trade_type': trade_type, 'market_type': market_type,
+            'take_profit': take_profit, 'stop_loss': stop_loss, 'seq': next(self.seq),
+            # Longs take profit on the way up and stop out on the way down; shorts the reverse
+            'above': take_profit if long else stop_loss, 'below': stop_loss if long else take_profit,
+            'on_fire': on_fire, 'context': context or {}, 'registered': time.time(),
+        }
+        with self.condition:
+            if trigger_id in self.triggers:
+                self._remove(self.triggers.pop(trigger_id))
+            book = self.books.setdefault(symbol, {'above': [], 'below': []})
+            bisect.insort(book['above'], (trigger['above'], trigger['seq'], trigger_id))
+            bisect.insort(book['below'], (trigger['below'], trigger['seq'], trigger_id))
+            self.triggers[trigger_id] = trigger
+            self.condition.notify_all()
+        trigger_logger.info(f"Armed {trade_type} {symbol} trigger {trigger_id}: "
+                            f"take profit {take_profit}, stop loss {stop_loss}")
+        if self.watch:
+            self._ensure_watcher(symbol, market_type)
+        return trigger
+
+    def _remove(self, trigger):
+        book = self.books[trigger['symbol']]
+        for side in ('above', 'below'):
+            levels = book[side]
+            key = (trigger[side], trigger['seq'], trigger['id'])
+            index = bisect.bisect_left(levels, key)
+            if index < len(levels) and levels[index] == key:
+                del levels[index]
+        if not book['above'] and not book['below']:
+            del self.books[trigger['symbol']]
+
+    def cancel(self, trigger_id):
+        """Drop a trigger (the position was closed some other way); returns False if it was not armed."""
+        with self.condition:
+            trigger = self.triggers.pop(trigger_id, None)
+            if trigger is None:
+                return False
+            self._remove(trigger)
+        trigger_logger.info(f"Cancelled trigger {trigger_id}")
+        return True
+
+    def check(self, symbol, price, received=None):
+        """Fire every trigger of symbol that price has crossed; returns the fired (trigger, reason) pairs."""
+        symbol = symbol.upper()
+        with metrics.stage('trigger_check'), self.condition:
+            book = self.books.get(symbol)
+            if book is None:
+                return []
+            above, below = book['above'], book['below']
+            hit = [entry[2] for entry in above[:bisect.bisect_right(above, (price, math.inf))]]
+            hit += [entry[2] for entry in below[bisect.bisect_left(below, (price, -1)):]]
+            fired = []
+            for trigger_id in dict.fromkeys(hit):
+                trigger = self.triggers.pop(trigger_id)
+                self._remove(trigger)
+                fired.append((trigger, crossed(trigger['trade_type'], trigger['take_profit'],
+                                               trigger['stop_loss'], price)))
+
+        for trigger, reason in fired:
+            metrics.inc('bot_triggers_fired_total', reason=reason)
+            if received:
+                metrics.observe(metrics.STAGE_SECONDS, time.time() - received, stage='trigger_fire')
+            latency = f" {(time.time() - received) * 1000:.1f} ms after the tick" if received else ""
+            trigger_logger.info(f"{reason} for {trigger['symbol']} trigger {trigger['id']} at {price}{latency}")
+            try:
+                trigger['on_fire'](trigger, reason, price)
+            except Exception as e:
+                trigger_logger.error(f"Error handling trigger {trigger['id']}: {e}")
+        return fired
+
+    def pending(self, symbol=None):
+        """Armed triggers (without their callbacks), optionally for one symbol."""
+        with self.condition:
+            return [{key: value for key, value in trigger.items() if key != 'on_fire'}
+                    for trigger in self.triggers.values() if symbol is None or trigger['symbol'] == symbol.upper()]
+
+    def wait_for_triggers(self, symbol, timeout=None):
+        """Block until symbol has an armed trigger; returns False on timeout."""
+        with self.condition:
+            return self.condition.wait_for(lambda: symbol.upper() in self.books, timeout)
+
+    def _ensure_watcher(self, symbol, market_type):
+        with self.condition:
+            watcher = self.watchers.get((symbol, market_type))
+            if watcher is not None and watcher.is_alive():
+                return watcher
+            watcher = self.watchers[(symbol, market_type)] = PriceWatcher(self, symbol, market_type)
+        return watcher.start()
+
+    def stop(self):
+        with self.condition:
+            watchers, self.watchers = list(self.watchers.values()), {}
+        for watcher in watchers:
+            watcher.stop()
+
+
+class PriceWatcher:
+    """
+    Feeds prices for one symbol into a TriggerEngine, separately from the signal loop.
+
+    With data_feed 'stream' every aggregate trade from the exchange websocket is
+    checked as it arrives; otherwise the ticker price (from exchange_url when
+    set) is polled every trigger_poll_interval seconds, and only while the
+    symbol has armed triggers.
+    """
+
+    def __init__(self, engine, symbol, market_type='spot', poll_interval=None):
+        self.engine = engine
+        self.symbol = symbol.upper()
+        self.market_type = market_type
+        self.poll_interval = poll_interval
+        self.stop_event = Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = Thread(target=self._run, name=f"triggers-{self.symbol}", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        self.stop_event.set()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout)
+
+    def is_alive(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def _run(self):
+        trigger_logger.info(f"Price watcher started for {self.symbol}")
+        if get_settings().data_feed == 'stream':
+            self._stream()
+        else:
+            self._poll()
+
+    def _stream(self):
+        from feed import MarketFeed, trade_stream_url
+
+        def on_event(event):
+            if event['type'] == 'trade':
+                self.engine.check(self.symbol, event['price'], event['received'])
+
+        feed = MarketFeed(self.symbol, market_type=self.market_type,
+                          url=trade_stream_url(self.symbol, self.market_type), on_event=on_event).start()
+        try:
+            self.stop_event.wait()
+        finally:
+            feed.stop()
+
+    def _poll(self):
+        base_url = get_settings().exchange_url or BASE_URLS[self.market_type]
+        url = base_url.rstrip('/') + PATHS[self.market_type]['price']
+        while not self.stop_event.is_set():
+            if not self.engine.wait_for_triggers(self.symbol, timeout=1):
+                continue  # Nothing armed: no requests until a position opens
+            started = time.monotonic()
+            try:
+                data = http_client.get_json(url, params={'symbol': self.symbol},
+                                            endpoint=PATHS[self.market_type]['price'], retries=0)
+                self.engine.check(self.symbol, float(data['price']), time.time())
+            except Exception as e:
+                trigger_logger.warning(f"Trigger price fetch for {self.symbol} failed: {e}")
+            interval = self.poll_interval or get_settings().trigger_poll_interval
+            self.stop_event.wait(max(0.0, interval - (time.monotonic() - started)))
+
+
+_engine = None
+_engine_lock = Lock()
+
+
+def get_trigger_engine():
+    """Return the shared trigger engine."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = TriggerEngine()
+        return _engine